@@ -9,6 +9,22 @@ import traceback
 from src.leitura_dados import LeitorDadosExcel
 from src.upload_arquivo import GestorArquivos
 from src.analise_risco import AnalisadorDados
+from src.leitura_dados import calcular_versao_arquivo
+from src.registro_dados import registro_global
+from src.fragmentos import fragmento, fragmento_periodico
+from src.pagina_comparacao import PaginaComparacao
+from src.pagina_rede import PaginaRede
+from src.rede_escolas import ARQUIVO_CONFIGURACAO as CONFIGURACAO_REDE_ESCOLAS
+from src.exportacao import escrever_exportacao, formatos_disponiveis, TIPOS_EXPORTACAO
+from src.relatorios import escrever_relatorios_zip
+from src.armazenamento_sqlite import obter_repositorio_sqlite
+from src.processamento_fundo import obter_fila_processamento, LABELS_ESTADO, PRONTO
+from src.instrumentacao import instrumentacao_global, medir
+from src.perfil_memoria import perfil_memoria_global, medir_memoria, tamanhos, memoria_processo_mb
+from src.modelo_visao import cache_visoes
+
+# Banco SQLite opcional com as notas processadas (ex.: EDURADAR_SQLITE=dados/notas.sqlite3)
+CAMINHO_BANCO_SQLITE = os.environ.get('EDURADAR_SQLITE')
 
 # Configuração da página
 st.set_page_config(
@@ -62,11 +78,18 @@ class AplicacaoPrincipal:
     def __init__(self):
         self.leitor_dados = LeitorDadosExcel()
         self.gestor_arquivos = GestorArquivos()
-        self.analisador_dados = AnalisadorDados()
+        self.repositorio_sqlite = obter_repositorio_sqlite(CAMINHO_BANCO_SQLITE) if CAMINHO_BANCO_SQLITE else None
+        self.analisador_dados = AnalisadorDados(self.repositorio_sqlite)
+        # Planilhas são processadas em threads de fundo (com cache em disco por conteúdo)
+        self.fila_processamento = obter_fila_processamento()
+        if self.repositorio_sqlite is not None:
+            self.fila_processamento.adicionar_etapa(self.repositorio_sqlite.carregar)
+        self.pagina_comparacao = PaginaComparacao(self.gestor_arquivos, self.leitor_dados)
+        self.pagina_rede = PaginaRede(self.gestor_arquivos)
         
-        # Estado da sessão
-        if 'dados_carregados' not in st.session_state:
-            st.session_state.dados_carregados = None
+        # Estado da sessão (a sessão guarda só o handle; os dados ficam no registro compartilhado)
+        if 'handle_dados' not in st.session_state:
+            st.session_state.handle_dados = None
         if 'info_bimestre_atual' not in st.session_state:
             st.session_state.info_bimestre_atual = None
         if 'ultimo_arquivo_usado' not in st.session_state:
@@ -76,18 +99,22 @@ class AplicacaoPrincipal:
         """
         Função principal que executa a aplicação
         """
-        # Cabeçalho principal
-        self._criar_cabecalho()
-        
-        # Sidebar - Gestão de arquivos e navegação
-        caminho_arquivo, bimestre_selecionado = self._criar_sidebar()
-        
-        # Verificar se precisa recarregar dados
-        if self._precisa_recarregar_dados(caminho_arquivo):
-            self._carregar_dados(caminho_arquivo, bimestre_selecionado)
-        
-        # Área principal - Conteúdo baseado na navegação
-        self._criar_conteudo_principal()
+        # Cada rerun é uma execução na instrumentação (tempos por fase no debug)
+        with medir('rerun'):
+            # Cabeçalho principal
+            self._criar_cabecalho()
+            
+            # Sidebar - Gestão de arquivos e navegação
+            with medir('sidebar'):
+                caminho_arquivo, bimestre_selecionado = self._criar_sidebar()
+            
+            # Verificar se precisa recarregar dados
+            if self._precisa_recarregar_dados(caminho_arquivo):
+                with medir('carregar_dados', os.path.basename(caminho_arquivo or '')):
+                    self._carregar_dados(caminho_arquivo, bimestre_selecionado)
+            
+            # Área principal - Conteúdo baseado na navegação
+            self._criar_conteudo_principal()
 
     def _criar_cabecalho(self):
         """
@@ -106,10 +133,14 @@ class AplicacaoPrincipal:
         """
         st.sidebar.title("🎯 Navegação")
         
-        # Menu principal
+        # Menu principal (a rede de escolas só aparece com escolas.json configurado)
+        paginas = ["📊 Visão Geral", "🔍 Análise Detalhada", "⚠️ Alunos em Risco", "🔀 Comparar Versões"]
+        if os.path.exists(CONFIGURACAO_REDE_ESCOLAS):
+            paginas.append("🏫 Rede de Escolas")
+        paginas.append("📋 Configurações")
         pagina = st.sidebar.selectbox(
             "Escolha a análise:",
-            ["📊 Visão Geral", "🔍 Análise Detalhada", "⚠️ Alunos em Risco", "📋 Configurações"],
+            paginas,
             help="Selecione o tipo de análise que deseja visualizar"
         )
         
@@ -130,62 +161,55 @@ class AplicacaoPrincipal:
         if not caminho_arquivo:
             return False
             
-        if st.session_state.dados_carregados is None:
+        if self._dados_atuais() is None:
             return True
             
         if st.session_state.ultimo_arquivo_usado != caminho_arquivo:
             return True
+        
+        # Arquivo regravado (ex.: upload salvo por outra sessão)
+        handle = st.session_state.handle_dados
+        if handle.versao != calcular_versao_arquivo(caminho_arquivo, handle.bimestre):
+            return True
             
         return False
 
+    def _dados_atuais(self):
+        """
+        Dados da sessão, lidos do registro compartilhado pelo handle
+        """
+        handle = st.session_state.get('handle_dados')
+        if handle is None:
+            return None
+        return handle.dados
+
     def _carregar_dados(self, caminho_arquivo, bimestre_selecionado):
         """
-        Carrega dados do arquivo Excel
+        Carrega dados do arquivo Excel pela fila de processamento em segundo plano.
+        
+        Sem dados na sessão, espera o processamento terminar; com dados, a sessão
+        continua na versão anterior e troca para a nova quando ela fica pronta.
         """
         if not caminho_arquivo or not os.path.exists(caminho_arquivo):
             st.error("❌ Arquivo não encontrado")
             return
         
         try:
-            # Mostrar progress bar
-            progress_bar = st.sidebar.progress(0)
-            status_text = st.sidebar.empty()
-            
-            status_text.text("🔍 Detectando formato do arquivo...")
-            progress_bar.progress(25)
-            
-            status_text.text("📊 Carregando dados das turmas...")
-            progress_bar.progress(50)
+            # Mesmo arquivo na mesma versão devolve o trabalho já existente (nada é reprocessado)
+            trabalho = self.fila_processamento.enviar(caminho_arquivo, bimestre_selecionado)
             
-            # Carregar dados usando a classe melhorada
-            dados_processados, info_bimestre = self.leitor_dados.obter_dados_completos(
-                caminho_arquivo, bimestre_selecionado
-            )
-            
-            progress_bar.progress(75)
-            status_text.text("✅ Processando informações...")
+            if not trabalho.concluido and self._dados_atuais() is None:
+                # Não há versão anterior para mostrar enquanto isso
+                with st.sidebar:
+                    with st.spinner("📊 Carregando dados das turmas..."), medir('aguardar_processamento'):
+                        trabalho.aguardar()
             
-            if dados_processados:
-                st.session_state.dados_carregados = dados_processados
-                st.session_state.info_bimestre_atual = info_bimestre
-                st.session_state.ultimo_arquivo_usado = caminho_arquivo
-                
-                progress_bar.progress(100)
-                status_text.text("🎉 Dados carregados com sucesso!")
-                
-                # Mostrar resumo do carregamento
-                st.sidebar.success(f"✅ {info_bimestre.get('turmas_carregadas', 0)} turmas carregadas")
-                
-                # Limpar progress após 2 segundos
-                import time
-                time.sleep(1)
-                progress_bar.empty()
-                status_text.empty()
-                
+            if trabalho.concluido:
+                self._aplicar_trabalho(trabalho)
             else:
-                st.sidebar.error("❌ Erro ao processar dados")
-                progress_bar.empty()
-                status_text.empty()
+                st.session_state.trabalho_pendente = trabalho.id
+                with st.sidebar:
+                    self._mostrar_status_processamento()
                 
         except Exception as e:
             st.sidebar.error(f"❌ Erro ao carregar dados: {str(e)}")
@@ -195,12 +219,52 @@ class AplicacaoPrincipal:
             if st.sidebar.checkbox("🐛 Mostrar detalhes do erro"):
                 st.sidebar.code(traceback.format_exc())
 
+    def _aplicar_trabalho(self, trabalho):
+        """
+        Troca a sessão para a versão processada (tudo no mesmo rerun)
+        """
+        st.session_state.trabalho_pendente = None
+        handle = trabalho.handle
+        if trabalho.estado == PRONTO and handle is not None:
+            st.session_state.handle_dados = handle
+            st.session_state.info_bimestre_atual = trabalho.info_bimestre
+            st.session_state.ultimo_arquivo_usado = trabalho.caminho
+            # A sessão segura a versão daqui em diante; o trabalho não precisa mais
+            self.fila_processamento.liberar(trabalho)
+            st.sidebar.success(f"✅ {trabalho.info_bimestre.get('turmas_carregadas', 0)} turmas carregadas")
+        elif trabalho.estado == PRONTO:
+            # Outra sessão aplicou e liberou o mesmo trabalho: pede de novo (sai do registro)
+            self._carregar_dados(trabalho.caminho, trabalho.bimestre)
+        elif trabalho.erro:
+            st.sidebar.error(f"❌ Erro ao processar dados: {trabalho.erro}")
+            st.sidebar.error("🔧 Verifique se o arquivo Excel está no formato correto")
+
+    @fragmento_periodico(1)
+    def _mostrar_status_processamento(self):
+        """
+        Acompanha o trabalho pendente da sessão e recarrega a página quando ele termina
+        """
+        trabalho = self.fila_processamento.obter(st.session_state.get('trabalho_pendente'))
+        if trabalho is None:
+            return
+        if trabalho.concluido:
+            st.rerun()
+        st.info(f"{LABELS_ESTADO[trabalho.estado]}: {os.path.basename(trabalho.caminho)}\n\n"
+                "Você continua vendo a versão anterior até a nova ficar pronta.")
+
     def _criar_conteudo_principal(self):
         """
         Cria conteúdo principal baseado na página selecionada
         """
         pagina = st.session_state.get('pagina_atual', '📊 Visão Geral')
-        dados = st.session_state.dados_carregados
+        
+        # A rede de escolas tem as próprias planilhas (não depende do arquivo da sidebar)
+        if pagina == "🏫 Rede de Escolas":
+            with medir('pagina', pagina), medir_memoria('pagina', pagina):
+                self.pagina_rede.criar()
+            return
+        
+        dados = self._dados_atuais()
         
         if not dados:
             self._mostrar_tela_inicial()
@@ -208,14 +272,17 @@ class AplicacaoPrincipal:
         
         # Roteamento de páginas
         try:
-            if pagina == "📊 Visão Geral":
-                self._mostrar_visao_geral(dados)
-            elif pagina == "🔍 Análise Detalhada":
-                self._mostrar_analise_detalhada(dados)
-            elif pagina == "⚠️ Alunos em Risco":
-                self._mostrar_alunos_risco(dados)
-            elif pagina == "📋 Configurações":
-                self._mostrar_configuracoes()
+            with medir('pagina', pagina), medir_memoria('pagina', pagina):
+                if pagina == "📊 Visão Geral":
+                    self._mostrar_visao_geral(dados)
+                elif pagina == "🔍 Análise Detalhada":
+                    self._mostrar_analise_detalhada(dados)
+                elif pagina == "⚠️ Alunos em Risco":
+                    self._mostrar_alunos_risco(dados)
+                elif pagina == "🔀 Comparar Versões":
+                    self._mostrar_comparacao_versoes(dados)
+                elif pagina == "📋 Configurações":
+                    self._mostrar_configuracoes()
                 
         except Exception as e:
             st.error(f"❌ Erro ao processar os dados: {str(e)}")
@@ -228,7 +295,7 @@ class AplicacaoPrincipal:
             
             # Botão para limpar cache
             if st.button("🔄 Limpar dados e recarregar"):
-                st.session_state.dados_carregados = None
+                st.session_state.handle_dados = None
                 st.session_state.info_bimestre_atual = None
                 st.session_state.ultimo_arquivo_usado = None
                 st.rerun()
@@ -276,6 +343,7 @@ class AplicacaoPrincipal:
         """
         self.analisador_dados.criar_resumo_geral(dados)
 
+    @fragmento
     def _mostrar_analise_detalhada(self, dados):
         """
         Mostra página de análise detalhada
@@ -303,6 +371,107 @@ class AplicacaoPrincipal:
         """
         self.analisador_dados.criar_lista_alunos_risco(dados)
 
+    def _mostrar_comparacao_versoes(self, dados):
+        """
+        Mostra página de comparação entre versões
+        """
+        self.pagina_comparacao.criar(dados, st.session_state.ultimo_arquivo_usado)
+
+    def _mostrar_exportacao_lote(self):
+        """
+        Exporta alunos, alunos em risco ou resumo por turma de vários bimestres em um arquivo
+        """
+        st.subheader("📥 Exportação em Lote")
+        
+        bimestres = self.gestor_arquivos.catalogo.bimestres_disponiveis()
+        if not bimestres:
+            st.info("Nenhum bimestre disponível para exportar")
+            return
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            selecionados = st.multiselect(
+                "Bimestres:", list(bimestres), default=list(bimestres),
+                format_func=self.gestor_arquivos._get_nome_bimestre_display
+            )
+        with col2:
+            tipo = st.selectbox("Conteúdo:", list(TIPOS_EXPORTACAO), format_func=TIPOS_EXPORTACAO.get)
+        with col3:
+            formato = st.selectbox("Formato:", formatos_disponiveis(), key='formato_exportacao_lote')
+        
+        area = self.gestor_arquivos.area_temporaria
+        if st.button("⚙️ Gerar arquivo", disabled=not selecionados):
+            try:
+                lista_dados = []
+                for bim in selecionados:
+                    entrada = bimestres[bim]
+                    bimestre = (entrada.get('formato') or {}).get('bimestre') or bim
+                    handle, _ = registro_global.carregar(
+                        entrada['caminho'], bimestre, self.leitor_dados.obter_dados_completos
+                    )
+                    if handle:
+                        lista_dados.append(handle.dados)
+                
+                caminho, linhas = area.criar(
+                    self.gestor_arquivos._dono_temporarios(),
+                    lambda f: escrever_exportacao(f, tipo, lista_dados, formato),
+                    sufixo=f".{formato}"
+                )
+                anterior = st.session_state.get('exportacao_lote')
+                if anterior:
+                    area.remover(anterior['caminho'])
+                st.session_state.exportacao_lote = {
+                    'caminho': caminho,
+                    'nome': f"{tipo}_{'_'.join(selecionados)}.{formato}",
+                    'linhas': linhas
+                }
+            except Exception as e:
+                st.error(f"❌ Erro na exportação: {str(e)}")
+        
+        exportacao = st.session_state.get('exportacao_lote')
+        if exportacao and area.tocar(exportacao['caminho']):
+            st.success(f"✅ {exportacao['linhas']} linhas exportadas")
+            with open(exportacao['caminho'], 'rb') as f:
+                st.download_button("📥 Baixar arquivo", data=f, file_name=exportacao['nome'])
+
+    def _mostrar_relatorios_turmas(self):
+        """
+        Gera um zip com o relatório HTML de cada turma do bimestre carregado
+        """
+        st.subheader("🖨️ Relatórios por Turma")
+        
+        dados = self._dados_atuais()
+        if not dados:
+            st.info("Carregue um bimestre para gerar os relatórios")
+            return
+        
+        area = self.gestor_arquivos.area_temporaria
+        if st.button("🖨️ Gerar relatórios (zip)"):
+            try:
+                with st.spinner("Gerando relatórios..."):
+                    caminho, total = area.criar(
+                        self.gestor_arquivos._dono_temporarios(),
+                        lambda f: escrever_relatorios_zip(f, dados),
+                        sufixo='.zip'
+                    )
+                anterior = st.session_state.get('relatorios_turmas')
+                if anterior:
+                    area.remover(anterior['caminho'])
+                bimestre = dados.get('info_bimestre', {}).get('bimestre') or 'bimestre'
+                st.session_state.relatorios_turmas = {
+                    'caminho': caminho,
+                    'nome': f"relatorios_{bimestre}.zip",
+                    'total': total
+                }
+            except Exception as e:
+                st.error(f"❌ Erro ao gerar relatórios: {str(e)}")
+        
+        relatorios = st.session_state.get('relatorios_turmas')
+        if relatorios and area.tocar(relatorios['caminho']):
+            st.success(f"✅ {relatorios['total']} relatórios gerados")
+            with open(relatorios['caminho'], 'rb') as f:
+                st.download_button("📥 Baixar relatórios", data=f, file_name=relatorios['nome'])
+
     def _mostrar_configuracoes(self):
         """
         Mostra página de configurações
@@ -325,15 +494,23 @@ class AplicacaoPrincipal:
             st.subheader("🔧 Ações do Sistema")
             
             if st.button("🔄 Recarregar dados atuais"):
-                st.session_state.dados_carregados = None
+                st.session_state.handle_dados = None
                 st.success("✅ Dados serão recarregados na próxima navegação")
             
             if st.button("🗑️ Limpar cache completo"):
-                for key in ['dados_carregados', 'info_bimestre_atual', 'ultimo_arquivo_usado']:
+                for key in ['handle_dados', 'info_bimestre_atual', 'ultimo_arquivo_usado']:
                     if key in st.session_state:
                         del st.session_state[key]
                 st.success("✅ Cache limpo com sucesso")
         
+        # Exportação em lote (todas as turmas dos bimestres escolhidos)
+        st.markdown("---")
+        self._mostrar_exportacao_lote()
+        
+        # Relatórios impressos por turma (conselho de classe)
+        st.markdown("---")
+        self._mostrar_relatorios_turmas()
+        
         # Configurações de visualização
         st.markdown("---")
         st.subheader("🎨 Configurações de Visualização")
@@ -347,7 +524,7 @@ class AplicacaoPrincipal:
             auto_refresh = st.checkbox("🔄 Auto-refresh (5 min)", value=False)
             notificacoes_sound = st.checkbox("🔔 Notificações sonoras", value=False)
         
-        if mostrar_detalhes_debug and st.session_state.dados_carregados:
+        if mostrar_detalhes_debug and self._dados_atuais():
             st.markdown("---")
             st.subheader("🐛 Informações de Debug")
             
@@ -355,9 +532,159 @@ class AplicacaoPrincipal:
                 st.json(st.session_state.info_bimestre_atual)
             
             with st.expander("Ver estatísticas detalhadas"):
-                dados = st.session_state.dados_carregados
+                dados = self._dados_atuais()
                 st.write("**Resumo geral:**", dados.get('resumo_geral', {}))
                 st.write("**Número de turmas:**", len(dados.get('turmas', {})))
+            
+            with st.expander("Ver versões em memória (compartilhadas entre sessões)"):
+                st.dataframe(registro_global.versoes(), use_container_width=True, hide_index=True)
+            
+            with st.expander("Ver fila de processamento"):
+                trabalhos = [t.resumo() for t in self.fila_processamento.trabalhos()]
+                for resumo in trabalhos:
+                    resumo['estado'] = LABELS_ESTADO[resumo['estado']]
+                st.dataframe(trabalhos, use_container_width=True, hide_index=True)
+            
+            with st.expander("Ver tempos por fase (instrumentação)"):
+                self._mostrar_instrumentacao()
+            
+            with st.expander("Ver uso de memória"):
+                self._mostrar_memoria()
+    
+    def _mostrar_memoria(self):
+        """
+        Tamanho dos dados em memória (datasets, caches, sessão) e perfil com tracemalloc
+        """
+        pico_processo = memoria_processo_mb()
+        if pico_processo is not None:
+            st.write(f"**Pico de memória do processo:** {pico_processo} MB")
+        
+        if st.button("📏 Medir tamanhos em memória"):
+            # Registro e caches são compartilhados: não entram na conta da sessão
+            compartilhados = (registro_global, cache_visoes, instrumentacao_global, self.fila_processamento)
+            st.write("**Datasets no registro (por versão):**")
+            st.dataframe(tamanhos(registro_global.dados_por_versao()), use_container_width=True, hide_index=True)
+            
+            painel_por_escopo = {}
+            for (versao, escopo, _), valor in cache_visoes.itens():
+                painel_por_escopo.setdefault(f"{versao} {escopo or '(página)'}", []).append(valor)
+            st.write("**Caches:**")
+            st.dataframe(tamanhos({
+                **{f"painéis {nome}": valores for nome, valores in painel_por_escopo.items()},
+                'execuções da instrumentação': instrumentacao_global.execucoes(),
+                'medições de memória': perfil_memoria_global.medicoes()
+            }), use_container_width=True, hide_index=True)
+            
+            st.write("**Esta sessão (st.session_state):**")
+            st.dataframe(tamanhos(dict(st.session_state.items()), excluir=compartilhados),
+                         use_container_width=True, hide_index=True)
+        
+        st.markdown("---")
+        if not perfil_memoria_global.ativo:
+            st.caption("O perfil de alocações (tracemalloc) deixa o processo mais lento; "
+                       "ative só enquanto investiga.")
+            if st.button("▶️ Ativar perfil de alocações"):
+                perfil_memoria_global.ativar()
+                st.rerun()
+            return
+        
+        memoria = perfil_memoria_global.memoria_rastreada()
+        if memoria is None:
+            # Desativado por outra sessão entre a verificação e a leitura
+            st.caption("Perfil de alocações desativado.")
+            return
+        atual, pico = memoria
+        col1, col2 = st.columns(2)
+        col1.metric("Alocado desde a ativação", f"{atual / 1024:.1f} MB")
+        col2.metric("Pico desde a ativação", f"{pico / 1024:.1f} MB")
+        
+        medicoes = perfil_memoria_global.medicoes()
+        if medicoes:
+            st.write("**Medições (carga de dados e páginas):**")
+            st.dataframe([{k: v for k, v in m.items() if k != 'locais'} for m in medicoes],
+                         use_container_width=True, hide_index=True)
+            indice = st.selectbox(
+                "Locais que mais alocaram na medição:", range(len(medicoes)),
+                format_func=lambda i: f"{medicoes[i]['quando']} {medicoes[i]['nome']}: {medicoes[i]['detalhe']}"
+            )
+            st.dataframe(medicoes[indice]['locais'], use_container_width=True, hide_index=True)
+        
+        st.write("**Maiores alocações vivas agora:**")
+        st.dataframe(perfil_memoria_global.top_alocacoes(), use_container_width=True, hide_index=True)
+        
+        if st.button("⏹️ Desativar perfil de alocações"):
+            perfil_memoria_global.desativar()
+            perfil_memoria_global.limpar()
+            st.rerun()
+    
+    def _mostrar_instrumentacao(self):
+        """
+        Tempos por fase e contadores das execuções recentes (reruns, fila de processamento, API)
+        """
+        if not instrumentacao_global.ativa:
+            st.info("Instrumentação desligada (EDURADAR_INSTRUMENTACAO=0)")
+            return
+        
+        execucoes = instrumentacao_global.execucoes()
+        if not execucoes:
+            st.info("Nenhuma execução medida ainda")
+            return
+        
+        st.write(f"**Fases nas últimas {len(execucoes)} execuções:**")
+        st.dataframe(instrumentacao_global.resumo_fases(), use_container_width=True, hide_index=True)
+        
+        contadores = instrumentacao_global.contadores()
+        if contadores:
+            st.write("**Contadores (desde o início do processo):**")
+            st.dataframe(
+                [{'contador': nome, 'valor': valor} for nome, valor in sorted(contadores.items())],
+                use_container_width=True, hide_index=True
+            )
+        
+        st.write("**Execuções recentes:**")
+        st.dataframe([e.resumo() for e in execucoes], use_container_width=True, hide_index=True)
+        
+        rotulos = {e.id: f"#{e.id} {e.resumo()['execucao']} ({e.duracao_ms:.0f} ms)" for e in execucoes}
+        id_escolhido = st.selectbox("Detalhar execução:", list(rotulos), format_func=rotulos.get)
+        execucao = instrumentacao_global.obter(id_escolhido)
+        if execucao is not None:
+            st.plotly_chart(self._criar_grafico_chama(execucao.blocos()), use_container_width=True)
+        
+        if st.button("🧹 Limpar medições"):
+            instrumentacao_global.limpar()
+            st.rerun()
+    
+    def _criar_grafico_chama(self, blocos):
+        """
+        Gráfico em chama: uma barra por trecho, na linha da profundidade, do início ao fim
+        """
+        import plotly.graph_objects as go
+        
+        rotulos = [b['nome'] if b['detalhe'] is None else f"{b['nome']}: {b['detalhe']}" for b in blocos]
+        fig = go.Figure(go.Bar(
+            orientation='h',
+            y=[b['profundidade'] for b in blocos],
+            x=[max(b['duracao_ms'], 0.01) for b in blocos],
+            base=[b['inicio_ms'] for b in blocos],
+            text=rotulos,
+            textposition='inside',
+            insidetextanchor='start',
+            marker_color=['#dc3545' if b['erro'] else '#667eea' for b in blocos],
+            marker_line_color='white',
+            marker_line_width=1,
+            hovertext=[f"{r}<br>{b['duracao_ms']:.1f} ms (início {b['inicio_ms']:.1f} ms)" for r, b in zip(rotulos, blocos)],
+            hoverinfo='text'
+        ))
+        profundidade_maxima = max(b['profundidade'] for b in blocos)
+        fig.update_layout(
+            height=80 + 40 * (profundidade_maxima + 1),
+            bargap=0.05,
+            margin=dict(l=10, r=10, t=10, b=30),
+            xaxis_title="ms",
+            yaxis=dict(autorange='reversed', showticklabels=False),
+            showlegend=False
+        )
+        return fig
 
 # Função principal
 def main():
@@ -0,0 +1,4 @@
+# Pacote de medições de desempenho (planilhas sintéticas + tempos por fase)
+#
+#   python -m benchmarks.gerador_planilhas --turmas 6 --alunos 40 --saida /tmp/notas.xlsx
+#   python -m benchmarks.medir_desempenho --turmas 6 19 --alunos 40 200
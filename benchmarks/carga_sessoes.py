@@ -0,0 +1,463 @@
+# Módulo responsável pelo teste de carga do app.py com várias sessões simultâneas
+#
+# Sobe o app.py de verdade (streamlit run, só em 127.0.0.1) e abre uma conexão
+# websocket por professor, falando o mesmo protocolo do navegador: cada sessão
+# escolhe o bimestre, passa pela visão geral, análise detalhada (troca de turma,
+# de UC e dos filtros da lista) e alunos em risco, com uma pausa entre os
+# cliques. Ao final mostra a latência dos reruns (p50/p95/p99, no total e por
+# passo) e a memória residente do servidor.
+#
+# Uso:
+#   python -m benchmarks.carga_sessoes --sessoes 50
+#   python -m benchmarks.carga_sessoes --sessoes 20 --ciclos 3 --pausa 0.5
+#   python -m benchmarks.carga_sessoes --sessoes 50 --sintetico 6 170
+#
+# A latência vai do envio do clique até o servidor terminar o rerun (sem o
+# desenho no navegador). Widgets dentro de fragmentos reexecutam só o
+# fragmento, como no navegador.
+#
+# Por padrão usa as planilhas de dados/; com --sintetico TURMAS ALUNOS gera as do
+# 2º e 3º bimestre numa pasta temporária e sobe o app a partir dela.
+#
+# O AppTest do Streamlit não serve aqui: cada execução dele troca o Runtime
+# global do processo, então sessões simultâneas quebram umas às outras.
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from collections import defaultdict
+
+try:
+    from websockets.sync.client import connect as conectar_websocket
+except ImportError:  # websockets vem com o Streamlit; versões antigas não têm o cliente síncrono
+    conectar_websocket = None
+
+from src.perfil_memoria import memoria_residente_mb
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP = os.path.join(RAIZ, 'app.py')
+
+PAGINA_VISAO_GERAL = "📊 Visão Geral"
+PAGINA_ANALISE = "🔍 Análise Detalhada"
+PAGINA_RISCO = "⚠️ Alunos em Risco"
+
+ROTULO_PAGINA = "Escolha a análise:"
+ROTULO_BIMESTRE = "Escolha o bimestre:"
+ROTULO_TURMA = "Selecione a turma para análise detalhada:"
+ROTULO_UC = "UC:"
+ROTULO_SITUACAO = "Filtrar por situação:"
+ROTULO_ORDEM = "Ordenar por:"
+
+PERCENTIS = (50, 95, 99)
+INTERVALO_MEMORIA = 0.25
+TEMPO_SUBIDA_SERVIDOR = 60
+
+# Valores de ForwardMsg.script_finished
+_RERUN_INTERROMPIDO = 2
+
+
+def percentil(valores, p):
+    """
+    Percentil p (0-100) com interpolação linear entre as posições vizinhas
+    """
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    posicao = (len(ordenados) - 1) * p / 100
+    abaixo = int(posicao)
+    acima = min(abaixo + 1, len(ordenados) - 1)
+    return ordenados[abaixo] + (ordenados[acima] - ordenados[abaixo]) * (posicao - abaixo)
+
+
+def resumir_latencias(segundos):
+    """
+    {'reruns', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'} de uma lista de durações
+    """
+    resumo = {'reruns': len(segundos)}
+    for p in PERCENTIS:
+        valor = percentil(segundos, p)
+        resumo[f"p{p}_ms"] = round(valor * 1000, 1) if valor is not None else None
+    resumo['max_ms'] = round(max(segundos) * 1000, 1) if segundos else None
+    return resumo
+
+
+class ServidorApp:
+    """
+    streamlit run app.py num processo separado, numa porta livre de 127.0.0.1
+    """
+
+    def __init__(self, pasta_trabalho, porta=None):
+        self.pasta_trabalho = pasta_trabalho
+        self.porta = porta or _porta_livre()
+        self.processo = None
+        self._log = None
+
+    @property
+    def url_websocket(self):
+        return f"ws://127.0.0.1:{self.porta}/_stcore/stream"
+
+    @property
+    def pid(self):
+        return self.processo.pid if self.processo else None
+
+    def __enter__(self):
+        self._log = tempfile.TemporaryFile()
+        self.processo = subprocess.Popen(
+            [
+                sys.executable, '-m', 'streamlit', 'run', APP,
+                '--server.headless', 'true',
+                '--server.address', '127.0.0.1',
+                '--server.port', str(self.porta),
+                '--server.fileWatcherType', 'none',
+                '--browser.gatherUsageStats', 'false'
+            ],
+            cwd=self.pasta_trabalho, stdout=self._log, stderr=subprocess.STDOUT
+        )
+        try:
+            self._aguardar()
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, tipo_erro, erro, tb):
+        if self.processo is not None and self.processo.poll() is None:
+            self.processo.terminate()
+            try:
+                self.processo.wait(10)
+            except subprocess.TimeoutExpired:
+                self.processo.kill()
+        if self._log is not None:
+            self._log.close()
+        return False
+
+    def _aguardar(self):
+        limite = time.monotonic() + TEMPO_SUBIDA_SERVIDOR
+        while time.monotonic() < limite:
+            if self.processo.poll() is not None:
+                raise RuntimeError(f"o servidor terminou ao subir:\n{self.saida()}")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{self.porta}/_stcore/health", timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f"o servidor não respondeu em {TEMPO_SUBIDA_SERVIDOR} s:\n{self.saida()}")
+
+    def saida(self, limite=2000):
+        self._log.seek(0)
+        return self._log.read().decode('utf-8', 'replace')[-limite:]
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class MonitorMemoria:
+    """
+    Amostra a memória residente do servidor numa thread enquanto o teste roda
+    """
+
+    def __init__(self, pid, intervalo=INTERVALO_MEMORIA):
+        self.pid = pid
+        self.intervalo = intervalo
+        self.amostras = []
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._amostrar, name='monitor-memoria', daemon=True)
+
+    def __enter__(self):
+        self.inicial_mb = memoria_residente_mb(self.pid)
+        self._thread.start()
+        return self
+
+    def __exit__(self, tipo_erro, erro, tb):
+        self._parar.set()
+        self._thread.join()
+        self.final_mb = memoria_residente_mb(self.pid)
+        return False
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            valor = memoria_residente_mb(self.pid)
+            if valor is not None:
+                self.amostras.append(valor)
+
+    def resumo(self):
+        valores = [v for v in self.amostras + [self.final_mb] if v is not None]
+        return {
+            'inicial_mb': self.inicial_mb,
+            'pico_mb': max(valores) if valores else None,
+            'final_mb': self.final_mb
+        }
+
+
+class SessaoProfessor:
+    """
+    Uma conexão com o servidor seguindo o roteiro de navegação; guarda a duração de cada rerun.
+
+    Guarda os widgets da última resposta (selectbox e radio, pelo rótulo) e só
+    envia o estado dos que foram alterados: os demais ficam no valor padrão,
+    como acontece para quem ainda não mexeu neles.
+    """
+
+    def __init__(self, numero, url, semente=0, pausa=0.0, timeout=120):
+        self.numero = numero
+        self.url = url
+        self.rng = random.Random(f"{semente}-{numero}")
+        self.pausa = pausa
+        self.timeout = timeout
+        self.latencias = []  # (passo, segundos)
+        self.erros = []
+        self.widgets = {}  # rótulo -> (proto, fragment_id)
+        self.estados = {}  # id do widget -> WidgetState enviado
+
+    def executar(self, ciclos=1):
+        try:
+            with conectar_websocket(self.url, subprotocols=['streamlit'], max_size=None,
+                                    open_timeout=self.timeout) as ws:
+                self.ws = ws
+                self._rerun('abrir')
+                self._escolher('bimestre', ROTULO_BIMESTRE, obrigatorio=False)
+                for _ in range(ciclos):
+                    self._escolher('visao_geral', ROTULO_PAGINA, PAGINA_VISAO_GERAL)
+                    self._escolher('analise_detalhada', ROTULO_PAGINA, PAGINA_ANALISE)
+                    self._escolher('trocar_turma', ROTULO_TURMA)
+                    self._escolher('trocar_uc', ROTULO_UC)
+                    self._escolher('filtrar_situacao', ROTULO_SITUACAO)
+                    self._escolher('ordenar', ROTULO_ORDEM)
+                    self._escolher('alunos_risco', ROTULO_PAGINA, PAGINA_RISCO)
+        except Exception as e:
+            # Timeout, conexão recusada/fechada: a sessão para aqui
+            self.erros.append(f"sessão {self.numero}: {type(e).__name__}: {e}")
+        return self
+
+    def _escolher(self, passo, rotulo, opcao=None, obrigatorio=True):
+        """
+        Muda o widget para opcao (ou outra opção qualquer, sorteada) e espera o rerun
+        """
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        if rotulo not in self.widgets:
+            if obrigatorio:
+                self.erros.append(f"sessão {self.numero}, {passo}: widget \"{rotulo}\" não encontrado")
+            return
+        proto, fragmento = self.widgets[rotulo]
+        opcoes = list(proto.options)
+        atual = self.estados.get(proto.id)
+        atual = atual.string_value if atual is not None else (opcoes[proto.default] if opcoes else None)
+
+        if opcao is None:
+            outras = [o for o in opcoes if o != atual]
+            if not outras:
+                return
+            opcao = self.rng.choice(outras)
+        elif opcao not in opcoes:
+            self.erros.append(f"sessão {self.numero}, {passo}: opção \"{opcao}\" não existe em \"{rotulo}\"")
+            return
+
+        self.estados[proto.id] = WidgetState(id=proto.id, string_value=opcao)
+        self._rerun(passo, fragmento)
+
+    def _rerun(self, passo, fragmento=''):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        if self.pausa and self.latencias:
+            time.sleep(self.rng.uniform(0, 2 * self.pausa))
+
+        mensagem = BackMsg()
+        mensagem.rerun_script.query_string = ''
+        mensagem.rerun_script.widget_states.widgets.extend(self.estados.values())
+        if fragmento:
+            mensagem.rerun_script.fragment_id = fragmento
+
+        inicio = time.perf_counter()
+        self.ws.send(mensagem.SerializeToString())
+        novos = {}
+        while True:
+            resposta = ForwardMsg()
+            resposta.ParseFromString(self.ws.recv(timeout=self.timeout))
+            tipo = resposta.WhichOneof('type')
+            if tipo == 'delta':
+                self._ler_delta(resposta.delta, novos, passo)
+            elif tipo == 'script_finished' and resposta.script_finished != _RERUN_INTERROMPIDO:
+                break
+        self.latencias.append((passo, time.perf_counter() - inicio))
+
+        if fragmento:
+            # Só o fragmento foi redesenhado: os widgets de fora continuam valendo
+            self.widgets = {
+                rotulo: widget for rotulo, widget in self.widgets.items() if widget[1] != fragmento
+            }
+            self.widgets.update(novos)
+        else:
+            self.widgets = novos
+        ids_atuais = {proto.id for proto, _ in self.widgets.values()}
+        self.estados = {id_widget: estado for id_widget, estado in self.estados.items() if id_widget in ids_atuais}
+
+    def _ler_delta(self, delta, widgets, passo):
+        if delta.WhichOneof('type') != 'new_element':
+            return
+        elemento = delta.new_element
+        tipo = elemento.WhichOneof('type')
+        if tipo in ('selectbox', 'radio'):
+            proto = getattr(elemento, tipo)
+            widgets[proto.label] = (proto, delta.fragment_id)
+        elif tipo == 'exception':
+            self.erros.append(f"sessão {self.numero}, {passo}: {elemento.exception.type}: "
+                              f"{elemento.exception.message}")
+
+
+def executar_carga(url, pid, sessoes, ciclos=1, pausa=0.0, rampa=0.0, semente=0, timeout=120):
+    """
+    Roda as sessões em paralelo (início espalhado pela rampa, em segundos) e junta as medições
+    """
+    professores = [SessaoProfessor(i + 1, url, semente, pausa, timeout) for i in range(sessoes)]
+    threads = [
+        threading.Thread(target=professor.executar, args=(ciclos,), name=f"professor-{professor.numero}")
+        for professor in professores
+    ]
+
+    with MonitorMemoria(pid) as monitor:
+        inicio = time.perf_counter()
+        for i, thread in enumerate(threads):
+            if rampa and i:
+                time.sleep(rampa / sessoes)
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+
+    por_passo = defaultdict(list)
+    for professor in professores:
+        for passo, segundos in professor.latencias:
+            por_passo[passo].append(segundos)
+    todas = [segundos for valores in por_passo.values() for segundos in valores]
+
+    return {
+        'sessoes': sessoes,
+        'ciclos': ciclos,
+        'pausa_s': pausa,
+        'duracao_s': round(duracao, 2),
+        'reruns_por_s': round(len(todas) / duracao, 2) if duracao else None,
+        'latencia': resumir_latencias(todas),
+        'por_passo': {passo: resumir_latencias(valores) for passo, valores in por_passo.items()},
+        'memoria_servidor': monitor.resumo(),
+        'erros': [erro for professor in professores for erro in professor.erros]
+    }
+
+
+def preparar_pasta_sintetica(pasta, turmas, alunos, semente):
+    """
+    Gera as planilhas do 2º e 3º bimestre em pasta/dados com os nomes que o catálogo procura
+    """
+    from benchmarks.gerador_planilhas import gerar_planilha
+    from src.catalogo_dados import ARQUIVOS_BIMESTRE
+
+    pasta_dados = os.path.join(pasta, 'dados')
+    os.makedirs(pasta_dados, exist_ok=True)
+    for formato in ('2_bimestre', '3_bimestre'):
+        gerar_planilha(os.path.join(pasta_dados, ARQUIVOS_BIMESTRE[formato]), formato, turmas, alunos, semente)
+
+
+def formatar_relatorio(resultado):
+    linhas = [
+        f"{resultado['sessoes']} sessões x {resultado['ciclos']} ciclo(s), pausa média {resultado['pausa_s']} s: "
+        f"{resultado['latencia']['reruns']} reruns em {resultado['duracao_s']} s "
+        f"({resultado['reruns_por_s']} reruns/s)",
+        '',
+        f"  {'passo':<18} {'reruns':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx. ms':>9}"
+    ]
+
+    def linha(nome, resumo):
+        valores = ' '.join(
+            f"{'—' if resumo[chave] is None else format(resumo[chave], '.0f'):>9}"
+            for chave in ('p50_ms', 'p95_ms', 'p99_ms', 'max_ms')
+        )
+        return f"  {nome:<18} {resumo['reruns']:>7} {valores}"
+
+    for passo, resumo in resultado['por_passo'].items():
+        linhas.append(linha(passo, resumo))
+    linhas.append(linha('total', resultado['latencia']))
+
+    memoria = resultado['memoria_servidor']
+    linhas.append('')
+    linhas.append(f"Memória residente do servidor: {memoria['inicial_mb']} MB no início, "
+                  f"pico de {memoria['pico_mb']} MB, {memoria['final_mb']} MB no fim")
+
+    erros = resultado['erros']
+    if erros:
+        linhas.append(f"\n✗ {len(erros)} erro(s):")
+        linhas.extend(f"  - {erro}" for erro in erros[:20])
+        if len(erros) > 20:
+            linhas.append(f"  ... e mais {len(erros) - 20}")
+    else:
+        linhas.append("✓ Nenhum erro nas sessões")
+    return '\n'.join(linhas)
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.carga_sessoes',
+        description='Teste de carga do app.py com várias sessões simultâneas (servidor local + websocket).'
+    )
+    parser.add_argument('--sessoes', type=int, default=10, help='sessões simultâneas (padrão: 10)')
+    parser.add_argument('--ciclos', type=int, default=1, help='voltas no roteiro de navegação por sessão')
+    parser.add_argument('--pausa', type=float, default=0.0,
+                        help='pausa média entre cliques, em segundos (sorteada entre 0 e o dobro)')
+    parser.add_argument('--rampa', type=float, default=0.0, help='segundos para iniciar todas as sessões')
+    parser.add_argument('--sintetico', nargs=2, type=int, metavar=('TURMAS', 'ALUNOS'),
+                        help='usa planilhas sintéticas numa pasta temporária em vez de dados/')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--timeout', type=float, default=120, help='tempo máximo de cada rerun (s)')
+    parser.add_argument('--saida', help='grava o resultado em JSON neste arquivo')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    if conectar_websocket is None:
+        print("O teste de carga precisa do pacote websockets (>= 11), instalado com o Streamlit.", file=sys.stderr)
+        return 2
+
+    pasta_temporaria = None
+    try:
+        pasta_trabalho = RAIZ
+        if args.sintetico:
+            # O app lê de dados/ relativo à pasta em que o servidor roda
+            pasta_temporaria = tempfile.TemporaryDirectory(prefix='carga-')
+            preparar_pasta_sintetica(pasta_temporaria.name, *args.sintetico, args.semente)
+            pasta_trabalho = pasta_temporaria.name
+
+        with ServidorApp(pasta_trabalho) as servidor:
+            resultado = executar_carga(servidor.url_websocket, servidor.pid, args.sessoes, args.ciclos,
+                                       args.pausa, args.rampa, args.semente, args.timeout)
+    except RuntimeError as e:
+        print(f"Erro ao subir o app: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if pasta_temporaria is not None:
+            pasta_temporaria.cleanup()
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=1)
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=1))
+    else:
+        print(formatar_relatorio(resultado))
+    return 1 if resultado['erros'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
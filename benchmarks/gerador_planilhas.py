@@ -0,0 +1,208 @@
+# Módulo responsável por gerar planilhas de notas sintéticas (determinísticas) para as medições
+#
+# Mesmo layout das planilhas da secretaria: linha 1 com o título da turma,
+# linha 2 com o bimestre, linha 3 com o cabeçalho e os alunos a partir da
+# linha 4 (NÚMERO | ALUNO | UCP1 | FALTAS | UCP2 | FALTAS | UCP3 | FALTAS | ICT | FALTAS).
+#
+# As 6 primeiras turmas usam os nomes de planilha que o leitor procura no
+# formato pedido; as demais recebem nomes de outras turmas da escola (como no
+# arquivo real, que tem 19 planilhas) e só pesam na abertura/detecção.
+#
+# Uso:
+#   python -m benchmarks.gerador_planilhas --formato 2_bimestre --turmas 19 --alunos 45 --saida /tmp/notas.xlsx
+
+import argparse
+import io
+import random
+import re
+import sys
+import zipfile
+from datetime import datetime
+
+from openpyxl import Workbook
+
+from src.leitura_dados import LeitorDadosExcel
+
+FORMATOS = ('2_bimestre', '3_bimestre', '4_bimestre')
+SEMENTE_PADRAO = 2025
+# Datas fixas nas propriedades do arquivo: mesma semente, mesmo conteúdo
+DATA_FIXA = datetime(2025, 1, 1)
+
+NOMES = [
+    'ANA', 'BRUNA', 'CARLOS', 'DANIEL', 'EDUARDA', 'FELIPE', 'GABRIEL', 'HELENA', 'ISABELA', 'JOÃO',
+    'JÚLIA', 'KAUÃ', 'LARISSA', 'LUCAS', 'MARIA', 'MATHEUS', 'NICOLAS', 'PEDRO', 'RAFAELA', 'SOFIA',
+    'THIAGO', 'VITÓRIA', 'YASMIN', 'EMANUEL', 'ALLANY', 'ARTHUR', 'BEATRIZ', 'CAUÃ', 'DAVI', 'LÍVIA'
+]
+SOBRENOMES = [
+    'SILVA', 'SANTOS', 'OLIVEIRA', 'SOUZA', 'RODRIGUES', 'FERREIRA', 'ALVES', 'PEREIRA', 'LIMA', 'GOMES',
+    'COSTA', 'RIBEIRO', 'MARTINS', 'CARVALHO', 'ALMEIDA', 'LOPES', 'SOARES', 'FERNANDES', 'VIEIRA', 'BARBOSA',
+    'ROCHA', 'DIAS', 'NASCIMENTO', 'ANDRADE', 'MOREIRA', 'NUNES', 'MARQUES', 'MACHADO', 'MENDES', 'FREITAS'
+]
+TURMAS_EXTRAS = ['1º ano C', '1º ano D', '2º ano B', '2º ano C', '3º ano C', '3º ano D', '1º ano H',
+                 '2º ano H', '3º ano F', '1º ano J', '2º ano J', '3º ano I', '3º ano J']
+CURSOS = ['INTELIGÊNCIA ARTIFICIAL', 'RECURSOS HUMANOS', 'ADMINISTRAÇÃO', 'INFORMÁTICA']
+SITUACOES_MATRICULA = ['(Transferido)', '(Desistente)', '(Remanejado)']
+CABECALHO = ['NÚMERO', 'ALUNO', 'UCP1', 'FALTAS', 'UCP2', 'FALTAS', 'UCP3', 'FALTAS', 'ICT', 'FALTAS']
+
+
+def nomes_planilhas(formato, n_turmas):
+    """
+    Nomes das n_turmas planilhas: primeiro as que o leitor lê no formato, depois as extras
+    """
+    turmas_formato = LeitorDadosExcel().formatos_suportados[formato]['turmas']
+    nomes = list(turmas_formato[:n_turmas])
+    extras = iter(TURMAS_EXTRAS)
+    indice = 0
+    while len(nomes) < n_turmas:
+        base = next(extras, None)
+        if base is None:
+            indice += 1
+            extras = iter(TURMAS_EXTRAS)
+            continue
+        nome = base if indice == 0 else f"{base}{indice + 1}"
+        nomes.append(nome)
+    return nomes
+
+
+def _sujar_numero(rng, valor, casas=1):
+    """
+    Como o valor aparece na planilha real: número, texto com vírgula, espaços, traço...
+    """
+    sorteio = rng.random()
+    if sorteio < 0.75:
+        return valor
+    if sorteio < 0.88:
+        return f"{valor:.{casas}f}".replace('.', ',')
+    if sorteio < 0.94:
+        return f" {valor:g} "
+    if sorteio < 0.97:
+        return int(round(valor))
+    return rng.choice(['-', 'FT', '', '—'])
+
+
+def gerar_linhas_turma(rng, n_alunos, ucs_lancadas):
+    """
+    Linhas dos alunos de uma turma (valores realistas com células "sujas")
+    """
+    # Cada turma tem um nível e uma assiduidade próprios
+    nivel = rng.gauss(7.0, 0.8)
+    assiduidade = rng.uniform(1.0, 4.0)
+    linhas = []
+    numero = 0
+    for _ in range(n_alunos):
+        numero += 1
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+        if rng.random() < 0.04:
+            nome += f" {rng.choice(SITUACOES_MATRICULA)}"
+        if rng.random() < 0.03:
+            nome = f"  {nome.lower()} "
+
+        # Alunos com dificuldade tendem a faltar mais
+        dificuldade = rng.random() < 0.15
+        linha = [float(numero), nome]
+        for uc in range(3):
+            if uc >= ucs_lancadas or rng.random() < 0.02:
+                linha += [None, None]
+                continue
+            nota = rng.gauss(nivel - (2.5 if dificuldade else 0), 1.6)
+            nota = round(min(10.0, max(0.0, nota)) * 2) / 2
+            faltas = float(min(40, int(rng.expovariate(1 / (assiduidade * (3 if dificuldade else 1))))))
+            linha += [_sujar_numero(rng, nota), _sujar_numero(rng, faltas, casas=0)]
+
+        # Projeto (ICT) só para parte das turmas/alunos
+        if rng.random() < 0.6:
+            linha += [round(rng.uniform(5, 10) * 2) / 2, float(int(rng.expovariate(0.5)))]
+        else:
+            linha += [None, None]
+        linhas.append(linha)
+
+        # Linhas em branco no meio da lista (alunos removidos)
+        if rng.random() < 0.02:
+            linhas.append([None] * len(CABECALHO))
+    return linhas
+
+
+def gerar_planilha(caminho, formato='3_bimestre', n_turmas=6, n_alunos=40, semente=SEMENTE_PADRAO,
+                   ucs_lancadas=3):
+    """
+    Gera o .xlsx e retorna {'caminho', 'formato', 'planilhas', 'alunos_por_planilha', 'linhas'}
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"formato desconhecido: {formato} (use {', '.join(FORMATOS)})")
+
+    rng = random.Random(f"{semente}-{formato}-{n_turmas}-{n_alunos}")
+    wb = Workbook(write_only=True)
+    wb.properties.created = DATA_FIXA
+    wb.properties.modified = DATA_FIXA
+    titulo_bimestre = f"{formato[0]}º BIMESTRE"
+    total_linhas = 0
+
+    for nome_planilha in nomes_planilhas(formato, n_turmas):
+        ws = wb.create_sheet(title=nome_planilha[:31])
+        curso = CURSOS[0] if nome_planilha in LeitorDadosExcel().formatos_suportados[formato]['turmas'] \
+            else rng.choice(CURSOS[1:])
+        ws.append([f"{nome_planilha} - {curso} - MATUTINO - NOTAS E FREQUÊNCIA 2025"])
+        ws.append([None, None, titulo_bimestre])
+        ws.append(CABECALHO)
+        linhas = gerar_linhas_turma(rng, n_alunos, ucs_lancadas)
+        for linha in linhas:
+            ws.append(linha)
+        # Linhas vazias no fim, como nas planilhas preenchidas à mão
+        for _ in range(rng.randint(0, 3)):
+            ws.append([None] * len(CABECALHO))
+        total_linhas += len(linhas)
+
+    _salvar_deterministico(wb, caminho)
+    return {
+        'caminho': caminho,
+        'formato': formato,
+        'planilhas': n_turmas,
+        'alunos_por_planilha': n_alunos,
+        'linhas': total_linhas
+    }
+
+
+def _salvar_deterministico(wb, caminho):
+    """
+    Salva com data fixa nas entradas do zip (o openpyxl usa a hora atual),
+    para a mesma semente gerar o mesmo arquivo byte a byte
+    """
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    with zipfile.ZipFile(buffer) as origem, zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as destino:
+        for item in origem.infolist():
+            conteudo = origem.read(item.filename)
+            if item.filename == 'docProps/core.xml':
+                # O openpyxl grava a hora do salvamento em dcterms:modified
+                data = DATA_FIXA.strftime('%Y-%m-%dT%H:%M:%SZ').encode()
+                conteudo = re.sub(rb'(<dcterms:modified[^>]*>)[^<]*', rb'\g<1>' + data, conteudo)
+            destino.writestr(zipfile.ZipInfo(item.filename, date_time=DATA_FIXA.timetuple()[:6]), conteudo,
+                             compress_type=zipfile.ZIP_DEFLATED)
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.gerador_planilhas',
+        description='Gera uma planilha de notas sintética (determinística) no formato de um bimestre.'
+    )
+    parser.add_argument('--formato', choices=FORMATOS, default='3_bimestre')
+    parser.add_argument('--turmas', type=int, default=6, help='número de planilhas (padrão: 6)')
+    parser.add_argument('--alunos', type=int, default=40, help='alunos por planilha (padrão: 40)')
+    parser.add_argument('--ucs-lancadas', type=int, default=3, choices=[0, 1, 2, 3],
+                        help='UCs com notas já lançadas (padrão: 3)')
+    parser.add_argument('--semente', type=int, default=SEMENTE_PADRAO)
+    parser.add_argument('--saida', required=True, help='caminho do .xlsx gerado')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    info = gerar_planilha(args.saida, args.formato, args.turmas, args.alunos, args.semente, args.ucs_lancadas)
+    print(f"{info['caminho']}: {info['planilhas']} planilhas x {info['alunos_por_planilha']} alunos "
+          f"({info['formato']}, {info['linhas']} linhas)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+# Módulo responsável por medir o tempo de cada fase do pipeline com planilhas sintéticas
+#
+# Fases (cada uma medida separadamente, sobre o resultado da anterior):
+#   detectar      - identificar o bimestre pelos nomes das planilhas
+#   validar       - validação de estrutura feita no upload
+#   ler           - abrir o .xlsx e ler as planilhas das turmas (pandas)
+#   processar     - classificar os alunos de cada turma
+#   agregar       - estatísticas por turma e resumo geral
+#   analisar      - estatísticas por UC, lista de risco, filtros e resumo das turmas
+#   modelo_visao  - o que as páginas montam antes de desenhar (painéis das UCs, tabela de turmas)
+#
+# Uso:
+#   python -m benchmarks.medir_desempenho
+#   python -m benchmarks.medir_desempenho --turmas 6 19 --alunos 40 200 --formato 2_bimestre 3_bimestre
+#   python -m benchmarks.medir_desempenho --comparar benchmarks/resultados/anterior.json
+#
+# O resultado vai em JSON (benchmarks/resultados/ por padrão) com o commit atual,
+# para comparar medições de commits diferentes com --comparar.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.gerador_planilhas import FORMATOS, SEMENTE_PADRAO, gerar_planilha
+from src.leitura_dados import LeitorDadosExcel, calcular_versao_arquivo
+from src.nucleo_analise import (
+    FILTROS_SITUACAO, calcular_estatisticas_uc, coletar_alunos_risco,
+    filtrar_ordenar_alunos, resumo_turmas
+)
+
+FASES = ('detectar', 'validar', 'ler', 'processar', 'agregar', 'analisar', 'modelo_visao')
+UCS = ('UCP 1', 'UCP 2', 'UCP 3')
+ORDENS = ('Nome', 'Média', 'Total de Faltas', 'Situação')
+PASTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+# Diferença abaixo disso é ruído de medição ao comparar
+LIMIAR_VARIACAO = 0.10
+
+
+def _cronometrar(funcao, picos=None, fase=None):
+    """
+    Executa funcao() sem a saída de print e retorna (resultado, segundos).
+    Com picos (dict) e o tracemalloc ligado, guarda em picos[fase] o pico de memória (bytes) da fase.
+    """
+    medir_pico = picos is not None and tracemalloc.is_tracing()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if medir_pico:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        resultado = funcao()
+        duracao = time.perf_counter() - inicio
+        if medir_pico:
+            picos[fase] = tracemalloc.get_traced_memory()[1] - base
+    return resultado, duracao
+
+
+def executar_fases(caminho, leitor=None, analisador=None, picos=None):
+    """
+    Roda o pipeline uma vez sobre o arquivo, retornando {fase: segundos} e os dados processados.
+    Com picos (dict) e o tracemalloc ligado, preenche o pico de memória de cada fase.
+    """
+    from src.analise_risco import AnalisadorDados
+    from src.upload_arquivo import validar_estrutura_arquivo
+
+    leitor = leitor or LeitorDadosExcel()
+    analisador = analisador or AnalisadorDados()
+    tempos = {}
+
+    def fase(nome, funcao):
+        resultado, tempos[nome] = _cronometrar(funcao, picos, nome)
+        return resultado
+
+    info = fase('detectar', lambda: leitor.detectar_bimestre_arquivo(caminho))
+    fase('validar', lambda: validar_estrutura_arquivo(caminho))
+
+    dados_brutos, info_bimestre = fase('ler', lambda: leitor.carregar_dados_bimestre(caminho, info['bimestre']))
+    if not dados_brutos:
+        raise ValueError(f"{caminho}: {info_bimestre.get('descricao')}")
+
+    alunos_por_turma = fase('processar', lambda: {
+        nome: leitor.processar_turma_completa(dados['dataframe'], nome, info_bimestre)
+        for nome, dados in dados_brutos.items()
+    })
+
+    versao = info_bimestre.get('versao_arquivo') or calcular_versao_arquivo(caminho, info['bimestre'])
+    dados_processados = fase('agregar', lambda: leitor.agregar_turmas(alunos_por_turma, info_bimestre, versao))
+
+    def analisar():
+        for dados_turma in dados_processados['turmas'].values():
+            alunos = dados_turma['alunos']
+            for uc in UCS:
+                calcular_estatisticas_uc(alunos, uc)
+            for situacao in ['Todos'] + list(FILTROS_SITUACAO):
+                for ordem in ORDENS:
+                    filtrar_ordenar_alunos(alunos, situacao, ordem)
+        coletar_alunos_risco(dados_processados)
+        resumo_turmas(dados_processados)
+    fase('analisar', analisar)
+
+    def montar_modelo_visao():
+        pd.DataFrame(resumo_turmas(dados_processados))
+        for dados_turma in dados_processados['turmas'].values():
+            for uc in UCS:
+                analisador._montar_painel_uc(dados_turma['alunos'], uc)
+    fase('modelo_visao', montar_modelo_visao)
+
+    return tempos, dados_processados
+
+
+def medir_picos_memoria(caminho):
+    """
+    Pico de memória (KB) de cada fase numa execução com o tracemalloc ligado (separada da de tempo)
+    """
+    # Execução sem medir antes: imports tardios (plotly...) não contam como pico de uma fase
+    executar_fases(caminho)
+    picos = {}
+    ja_rastreando = tracemalloc.is_tracing()
+    if not ja_rastreando:
+        tracemalloc.start()
+    try:
+        executar_fases(caminho, picos=picos)
+    finally:
+        if not ja_rastreando:
+            tracemalloc.stop()
+    return {fase: round(pico / 1024, 1) for fase, pico in picos.items()}
+
+
+def medir_cenario(caminho, repeticoes=5, aquecimento=1):
+    """
+    Mediana/mínimo/máximo (ms) de cada fase em várias repetições sobre o mesmo arquivo
+    """
+    from src.analise_risco import AnalisadorDados
+
+    leitor = LeitorDadosExcel()
+    analisador = AnalisadorDados()
+    for _ in range(aquecimento):
+        executar_fases(caminho, leitor, analisador)
+
+    amostras = {fase: [] for fase in FASES}
+    dados_processados = None
+    for _ in range(repeticoes):
+        tempos, dados_processados = executar_fases(caminho, leitor, analisador)
+        for fase in FASES:
+            amostras[fase].append(tempos[fase] * 1000)
+
+    fases = {
+        fase: {
+            'mediana_ms': round(statistics.median(valores), 3),
+            'min_ms': round(min(valores), 3),
+            'max_ms': round(max(valores), 3)
+        }
+        for fase, valores in amostras.items()
+    }
+    return {
+        'fases': fases,
+        'total_ms': round(sum(f['mediana_ms'] for f in fases.values()), 3),
+        'alunos_processados': dados_processados['resumo_geral']['total_alunos'],
+        'turmas_processadas': dados_processados['resumo_geral']['total_turmas']
+    }
+
+
+def commit_atual():
+    """
+    Commit do repositório (com * quando há mudanças não commitadas), ou None fora do git
+    """
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=raiz,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+        alterado = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=raiz,
+                                  capture_output=True, text=True, timeout=30).stdout.strip()
+    except Exception:
+        return None
+    if not commit:
+        return None
+    return f"{commit}*" if alterado else commit
+
+
+def chave_cenario(cenario):
+    return f"{cenario['formato']}/{cenario['turmas']}t/{cenario['alunos']}a"
+
+
+def executar_medicoes(formatos, lista_turmas, lista_alunos, repeticoes, semente=SEMENTE_PADRAO,
+                      pasta_planilhas=None, verboso=False):
+    """
+    Gera as planilhas de cada combinação e mede as fases; retorna o documento de resultados
+    """
+    cenarios = []
+    with tempfile.TemporaryDirectory(prefix='bench-notas-') as pasta_temporaria:
+        pasta = pasta_planilhas or pasta_temporaria
+        os.makedirs(pasta, exist_ok=True)
+        for formato in formatos:
+            for n_turmas in lista_turmas:
+                for n_alunos in lista_alunos:
+                    caminho = os.path.join(pasta, f"notas-{formato}-{n_turmas}t-{n_alunos}a-s{semente}.xlsx")
+                    gerar_planilha(caminho, formato, n_turmas, n_alunos, semente)
+                    cenario = {
+                        'formato': formato,
+                        'turmas': n_turmas,
+                        'alunos': n_alunos,
+                        'tamanho_bytes': os.path.getsize(caminho)
+                    }
+                    cenario.update(medir_cenario(caminho, repeticoes))
+                    cenarios.append(cenario)
+                    if verboso:
+                        print(f"{chave_cenario(cenario)}: {cenario['total_ms']:.1f} ms", file=sys.stderr)
+
+    return {
+        'executado_em': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_atual(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'parametros': {
+            'formatos': list(formatos),
+            'turmas': list(lista_turmas),
+            'alunos': list(lista_alunos),
+            'repeticoes': repeticoes,
+            'semente': semente
+        },
+        'cenarios': cenarios
+    }
+
+
+def comparar_resultados(anterior, atual):
+    """
+    Linhas {cenario, fase, antes_ms, depois_ms, variacao} para os cenários presentes nos dois
+    """
+    por_chave = {chave_cenario(c): c for c in anterior.get('cenarios', [])}
+    linhas = []
+    for cenario in atual['cenarios']:
+        base = por_chave.get(chave_cenario(cenario))
+        if base is None:
+            continue
+        for fase in FASES + ('total',):
+            if fase == 'total':
+                antes, depois = base['total_ms'], cenario['total_ms']
+            elif fase in base['fases']:
+                antes, depois = base['fases'][fase]['mediana_ms'], cenario['fases'][fase]['mediana_ms']
+            else:
+                continue
+            linhas.append({
+                'cenario': chave_cenario(cenario),
+                'fase': fase,
+                'antes_ms': antes,
+                'depois_ms': depois,
+                'variacao': round((depois - antes) / antes, 3) if antes > 0 else None
+            })
+    return linhas
+
+
+def formatar_tabela(resultado):
+    """
+    Tabela de texto: uma linha por cenário, uma coluna por fase (mediana em ms)
+    """
+    cabecalho = ['cenário'] + list(FASES) + ['total']
+    linhas = [cabecalho]
+    for cenario in resultado['cenarios']:
+        linhas.append(
+            [chave_cenario(cenario)]
+            + [f"{cenario['fases'][fase]['mediana_ms']:.1f}" for fase in FASES]
+            + [f"{cenario['total_ms']:.1f}"]
+        )
+    larguras = [max(len(linha[i]) for linha in linhas) for i in range(len(cabecalho))]
+    return '\n'.join(
+        '  '.join(valor.ljust(larguras[i]) if i == 0 else valor.rjust(larguras[i]) for i, valor in enumerate(linha))
+        for linha in linhas
+    )
+
+
+def formatar_comparacao(linhas, commit_anterior, commit_atual):
+    saida = [f"Comparação {commit_anterior or '?'} -> {commit_atual or '?'} (mediana, ms):"]
+    for linha in linhas:
+        variacao = linha['variacao']
+        if variacao is None:
+            marca = ''
+        elif variacao > LIMIAR_VARIACAO:
+            marca = '  ▲ mais lento'
+        elif variacao < -LIMIAR_VARIACAO:
+            marca = '  ▼ mais rápido'
+        else:
+            marca = ''
+        percentual = f"{variacao * 100:+.1f}%" if variacao is not None else '—'
+        saida.append(f"  {linha['cenario']:<26} {linha['fase']:<13} {linha['antes_ms']:>10.1f} "
+                     f"{linha['depois_ms']:>10.1f} {percentual:>8}{marca}")
+    return '\n'.join(saida)
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.medir_desempenho',
+        description='Mede o tempo de cada fase (detecção, leitura, processamento, agregação, '
+                    'análise e modelo das páginas) com planilhas sintéticas.'
+    )
+    parser.add_argument('--formato', nargs='+', choices=FORMATOS, default=['3_bimestre'])
+    parser.add_argument('--turmas', nargs='+', type=int, default=[6, 19],
+                        help='número de planilhas por arquivo (padrão: 6 19)')
+    parser.add_argument('--alunos', nargs='+', type=int, default=[40, 200],
+                        help='alunos por planilha (padrão: 40 200)')
+    parser.add_argument('--repeticoes', type=int, default=5, help='repetições por cenário (padrão: 5)')
+    parser.add_argument('--semente', type=int, default=SEMENTE_PADRAO)
+    parser.add_argument('--saida', help='arquivo JSON do resultado (padrão: benchmarks/resultados/<data>-<commit>.json)')
+    parser.add_argument('--comparar', metavar='ANTERIOR.json', help='resultado anterior para comparar')
+    parser.add_argument('--manter-planilhas', metavar='PASTA', help='guarda as planilhas geradas nesta pasta')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    parser.add_argument('--verboso', action='store_true')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+
+    anterior = None
+    if args.comparar:
+        try:
+            with open(args.comparar, encoding='utf-8') as f:
+                anterior = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler {args.comparar}: {e}", file=sys.stderr)
+            return 2
+
+    resultado = executar_medicoes(args.formato, args.turmas, args.alunos, args.repeticoes,
+                                  args.semente, args.manter_planilhas, args.verboso)
+
+    saida = args.saida
+    if not saida:
+        os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+        nome = f"{datetime.now():%Y%m%d-%H%M%S}-{(resultado['commit'] or 'sem-git').rstrip('*')}.json"
+        saida = os.path.join(PASTA_RESULTADOS, nome)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1)
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False, indent=1))
+    else:
+        print(formatar_tabela(resultado))
+        print(f"\nResultado salvo em {saida}")
+        if anterior is not None:
+            print()
+            print(formatar_comparacao(comparar_resultados(anterior, resultado),
+                                      anterior.get('commit'), resultado['commit']))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
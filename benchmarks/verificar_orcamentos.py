@@ -0,0 +1,259 @@
+# Módulo responsável por verificar os orçamentos de desempenho (tempo e memória por fase)
+#
+# Roda os cenários fixos de benchmarks/orcamentos.json com planilhas sintéticas e
+# compara cada fase com o orçamento e com a linha de base gravada (com tolerância,
+# corrigida pela velocidade da máquina medida no momento).
+# Serve para o fechamento do bimestre não ficar lento de novo sem ninguém notar
+# depois de mexer em processar_aluno_por_uc ou nas páginas.
+#
+# Uso:
+#   python -m benchmarks.verificar_orcamentos
+#   python -m benchmarks.verificar_orcamentos --cenario mil_alunos --fator-orcamento 2
+#   python -m benchmarks.verificar_orcamentos --gravar-linha-base
+#
+# Códigos de saída (para CI/scripts):
+#   0 - tudo dentro do orçamento e da linha de base
+#   1 - alguma fase acima do orçamento ou mais lenta que a linha de base + tolerância
+#   2 - arquivo de orçamentos inválido / cenário desconhecido
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.gerador_planilhas import SEMENTE_PADRAO, gerar_planilha
+from benchmarks.medir_desempenho import medir_cenario, medir_picos_memoria, commit_atual
+
+SAIDA_OK = 0
+SAIDA_FALHA = 1
+SAIDA_CONFIGURACAO = 2
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_ORCAMENTOS = os.path.join(PASTA, 'orcamentos.json')
+ARQUIVO_LINHA_BASE = os.path.join(PASTA, 'linha_base.json')
+
+OK = 'ok'
+ACIMA_ORCAMENTO = 'acima do orçamento'
+REGRESSAO = 'mais lento que a linha de base'
+MEMORIA_ACIMA = 'memória acima do orçamento'
+
+
+def carregar_json(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def medir_referencia(repeticoes=5):
+    """
+    Menor tempo (ms) de uma carga fixa em Python puro: mede a velocidade da máquina naquele momento.
+
+    A comparação com a linha de base é corrigida pela razão entre esta medida e
+    a gravada junto com a base, para uma máquina mais lenta (ou ocupada) não
+    parecer regressão do código.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        valores = {f"aluno {i}": i * 1.5 for i in range(100000)}
+        sorted(valores.items(), key=lambda item: -item[1])
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return round(min(tempos), 3)
+
+
+def medir_cenarios(orcamentos, nomes=None, repeticoes=None, semente=SEMENTE_PADRAO):
+    """
+    {cenário: {fase: {'mediana_ms', 'min_ms', 'pico_kb'}, 'referencia_ms': ms}} para os
+    cenários pedidos (todos por padrão)
+    """
+    repeticoes = repeticoes or orcamentos.get('repeticoes', 5)
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix='orcamentos-') as pasta:
+        for nome, cenario in orcamentos['cenarios'].items():
+            if nomes and nome not in nomes:
+                continue
+            caminho = os.path.join(pasta, f"{nome}.xlsx")
+            gerar_planilha(caminho, cenario['formato'], cenario['turmas'], cenario['alunos'], semente)
+            referencia_ms = medir_referencia()
+            medicao = medir_cenario(caminho, repeticoes)
+            picos = medir_picos_memoria(caminho)
+            fases = {
+                fase: {'mediana_ms': valores['mediana_ms'], 'min_ms': valores['min_ms'], 'pico_kb': picos.get(fase)}
+                for fase, valores in medicao['fases'].items()
+            }
+            fases['total'] = {
+                'mediana_ms': medicao['total_ms'],
+                'min_ms': round(sum(f['min_ms'] for f in fases.values()), 3),
+                'pico_kb': None
+            }
+            fases['referencia_ms'] = referencia_ms
+            resultados[nome] = fases
+    return resultados
+
+
+def verificar(resultados, orcamentos, linha_base=None, fator_orcamento=1.0):
+    """
+    Uma linha por (cenário, fase) medida, com orçamento, linha de base e situação.
+
+    O orçamento vale para a mediana; a comparação com a linha de base usa o
+    menor tempo das repetições, bem menos sensível a uma máquina ocupada, e a
+    base é corrigida pela velocidade da máquina (medir_referencia).
+    Além da tolerância proporcional há uma folga fixa em ms: numa fase de
+    ~30 ms, 15 ms de ruído já são +50%, mas uma fase que fica 10x mais lenta
+    passa da folga mesmo sendo curta.
+    """
+    tolerancia = orcamentos.get('tolerancia_linha_base', 0.3)
+    folga_ms = orcamentos.get('folga_linha_base_ms', 25)
+    base_cenarios = (linha_base or {}).get('cenarios', {})
+    linhas = []
+    for nome, fases in resultados.items():
+        limites = orcamentos['cenarios'][nome].get('orcamentos', {})
+        base_cenario = base_cenarios.get(nome, {})
+        fator_maquina = 1.0
+        if fases.get('referencia_ms') and base_cenario.get('referencia_ms'):
+            fator_maquina = fases['referencia_ms'] / base_cenario['referencia_ms']
+
+        for fase, medido in fases.items():
+            if fase == 'referencia_ms':
+                continue
+            limite = limites.get(fase, {})
+            limite_ms = limite['ms'] * fator_orcamento if 'ms' in limite else None
+            limite_kb = limite['pico_kb'] * fator_orcamento if 'pico_kb' in limite else None
+            base_ms = base_cenario.get(fase, {}).get('min_ms')
+            if base_ms:
+                base_ms = round(base_ms * fator_maquina, 3)
+
+            problemas = []
+            if limite_ms is not None and medido['mediana_ms'] > limite_ms:
+                problemas.append(ACIMA_ORCAMENTO)
+            if limite_kb is not None and medido['pico_kb'] is not None and medido['pico_kb'] > limite_kb:
+                problemas.append(MEMORIA_ACIMA)
+            if base_ms and medido['min_ms'] > base_ms * (1 + tolerancia) + folga_ms:
+                problemas.append(REGRESSAO)
+
+            linhas.append({
+                'cenario': nome,
+                'fase': fase,
+                'mediana_ms': medido['mediana_ms'],
+                'orcamento_ms': limite_ms,
+                'min_ms': medido['min_ms'],
+                'linha_base_min_ms': base_ms,
+                'variacao': round(medido['min_ms'] / base_ms - 1, 3) if base_ms else None,
+                'pico_kb': medido['pico_kb'],
+                'orcamento_kb': limite_kb,
+                'situacao': ', '.join(problemas) or OK
+            })
+    return linhas
+
+
+def formatar_relatorio(linhas, tolerancia, folga_ms=25):
+    """
+    Relatório em texto (tabela por cenário + resumo das falhas)
+    """
+    def numero(valor, casas=1):
+        return '—' if valor is None else f"{valor:.{casas}f}"
+
+    saida = []
+    cenario_atual = None
+    for linha in linhas:
+        if linha['cenario'] != cenario_atual:
+            cenario_atual = linha['cenario']
+            saida.append(f"\n{cenario_atual}")
+            saida.append(f"  {'fase':<13} {'mediana ms':>11} {'orçamento':>10} {'mín. ms':>9} {'base':>9} "
+                         f"{'var.':>8} {'pico KB':>9} {'orçamento':>10}  situação")
+        variacao = '—' if linha['variacao'] is None else f"{linha['variacao'] * 100:+.0f}%"
+        marca = '✓' if linha['situacao'] == OK else '✗'
+        saida.append(
+            f"  {linha['fase']:<13} {numero(linha['mediana_ms']):>11} {numero(linha['orcamento_ms'], 0):>10} "
+            f"{numero(linha['min_ms']):>9} {numero(linha['linha_base_min_ms']):>9} {variacao:>8} "
+            f"{numero(linha['pico_kb'], 0):>9} {numero(linha['orcamento_kb'], 0):>10}  {marca} {linha['situacao']}"
+        )
+
+    falhas = [l for l in linhas if l['situacao'] != OK]
+    saida.append('')
+    if falhas:
+        saida.append(f"✗ {len(falhas)} fase(s) fora do orçamento "
+                     f"(tolerância da linha de base: {tolerancia:.0%} + {folga_ms:g} ms):")
+        for linha in falhas:
+            saida.append(f"  - {linha['cenario']}/{linha['fase']}: {linha['situacao']}")
+    else:
+        saida.append(f"✓ Todas as {len(linhas)} fases dentro do orçamento")
+    return '\n'.join(saida)
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.verificar_orcamentos',
+        description='Verifica os orçamentos de tempo e memória por fase com planilhas sintéticas.'
+    )
+    parser.add_argument('--orcamentos', default=ARQUIVO_ORCAMENTOS, help='arquivo de orçamentos (JSON)')
+    parser.add_argument('--linha-base', default=ARQUIVO_LINHA_BASE, help='linha de base gravada (JSON)')
+    parser.add_argument('--cenario', nargs='+', help='só estes cenários (padrão: todos)')
+    parser.add_argument('--repeticoes', type=int, help='repetições por cenário (padrão: do arquivo)')
+    parser.add_argument('--fator-orcamento', type=float, default=1.0,
+                        help='multiplica os orçamentos (máquinas mais lentas, ex.: 2)')
+    parser.add_argument('--gravar-linha-base', action='store_true',
+                        help='grava as medições como nova linha de base (não falha por regressão)')
+    parser.add_argument('--json', action='store_true', help='imprime o resultado em JSON')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+
+    try:
+        orcamentos = carregar_json(args.orcamentos)
+        cenarios = orcamentos['cenarios']
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro ao ler {args.orcamentos}: {e}", file=sys.stderr)
+        return SAIDA_CONFIGURACAO
+    desconhecidos = [c for c in (args.cenario or []) if c not in cenarios]
+    if desconhecidos:
+        print(f"Cenário desconhecido: {', '.join(desconhecidos)} (disponíveis: {', '.join(cenarios)})",
+              file=sys.stderr)
+        return SAIDA_CONFIGURACAO
+
+    linha_base = None
+    if not args.gravar_linha_base and os.path.exists(args.linha_base):
+        try:
+            linha_base = carregar_json(args.linha_base)
+        except (OSError, ValueError) as e:
+            print(f"Linha de base ignorada ({args.linha_base}): {e}", file=sys.stderr)
+
+    resultados = medir_cenarios(orcamentos, args.cenario, args.repeticoes)
+    linhas = verificar(resultados, orcamentos, linha_base, args.fator_orcamento)
+
+    if args.gravar_linha_base:
+        # Gravar só alguns cenários mantém os demais da linha de base anterior
+        cenarios_base = {}
+        if os.path.exists(args.linha_base):
+            try:
+                cenarios_base = carregar_json(args.linha_base).get('cenarios', {})
+            except (OSError, ValueError):
+                pass
+        cenarios_base.update(resultados)
+        conteudo = {
+            'gravada_em': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit_atual(),
+            'cenarios': cenarios_base
+        }
+        with open(args.linha_base, 'w', encoding='utf-8') as f:
+            json.dump(conteudo, f, ensure_ascii=False, indent=1)
+
+    if args.json:
+        print(json.dumps({'resultados': resultados, 'verificacao': linhas}, ensure_ascii=False, indent=1))
+    else:
+        if linha_base is not None:
+            print(f"Linha de base: {args.linha_base} (commit {linha_base.get('commit') or '?'})")
+        print(formatar_relatorio(linhas, orcamentos.get('tolerancia_linha_base', 0.3),
+                                 orcamentos.get('folga_linha_base_ms', 25)))
+        if args.gravar_linha_base:
+            print(f"\nLinha de base gravada em {args.linha_base}")
+
+    return SAIDA_FALHA if any(l['situacao'] != OK for l in linhas) else SAIDA_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
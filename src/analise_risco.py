@@ -1,25 +1,25 @@
 # Módulo responsável pela análise e visualização dos dados melhorada
 
+import io
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+from src import nucleo_analise
+from src.fragmentos import fragmento
+from src.mapeamento_colunas import UCS_PADRAO
+from src.modelo_visao import ModeloVisaoLazy
+from src.exportacao import escrever_exportacao, formatos_disponiveis
+
+# Plotly só é importado na primeira vez que um gráfico é desenhado (ver _plotly_go):
+# os cálculos ficam em src/nucleo_analise.py, que não depende de Streamlit nem Plotly
 
 class AnalisadorDados:
-    def __init__(self):
-        self.cores_situacao = {
-            'ALTO_RISCO': '#FF4B4B',      # Vermelho
-            'RISCO_MODERADO': '#FFA500',   # Laranja
-            'ATENCAO': '#FFD700',          # Amarelo
-            'OK': '#00C851'                # Verde
-        }
-        self.labels_situacao = {
-            'ALTO_RISCO': 'Alto Risco',
-            'RISCO_MODERADO': 'Risco Moderado',
-            'ATENCAO': 'Atenção',
-            'OK': 'Situação OK'
-        }
+    def __init__(self, repositorio_sqlite=None):
+        # Opcional: com um RepositorioNotasSQLite as listas saem de consultas indexadas
+        self.repositorio_sqlite = repositorio_sqlite
+        self.cores_situacao = dict(nucleo_analise.CORES_SITUACAO)
+        self.labels_situacao = dict(nucleo_analise.LABELS_SITUACAO)
 
     def criar_resumo_geral(self, dados_processados):
         """
@@ -72,11 +72,7 @@ class AnalisadorDados:
             )
         
         with col4:
-            percentual_sucesso = 0
-            total = resumo.get('total_alunos', 0)
-            if total > 0:
-                alunos_ok = resumo.get('alunos_ok', 0) + resumo.get('alunos_atencao', 0)
-                percentual_sucesso = round((alunos_ok / total) * 100, 1)
+            percentual_sucesso = nucleo_analise.percentual_situacao_boa(resumo)
             
             st.metric(
                 "% Situação Boa", 
@@ -98,26 +94,8 @@ class AnalisadorDados:
             st.warning("Nenhuma turma encontrada")
             return
         
-        # Preparar dados para tabela
-        tabela_dados = []
-        
-        for nome_turma, dados_turma in turmas_dados.items():
-            stats = dados_turma['estatisticas']
-            contadores = stats['contadores_situacao']
-            
-            tabela_dados.append({
-                'Turma': nome_turma.replace(' - IA', ''),
-                'Total Alunos': stats['total_alunos'],
-                'Alto Risco': contadores['ALTO_RISCO'],
-                'Risco Moderado': contadores['RISCO_MODERADO'],
-                'Atenção': contadores['ATENCAO'],
-                'Situação OK': contadores['OK'],
-                'Média da Turma': stats['media_turma'],
-                '% Risco': stats['percentual_risco']
-            })
-        
         # Criar DataFrame e mostrar
-        df_resumo = pd.DataFrame(tabela_dados)
+        df_resumo = pd.DataFrame(nucleo_analise.resumo_turmas(dados_processados))
         
         # Estilizar tabela
         def colorir_percentual_risco(val):
@@ -163,6 +141,8 @@ class AnalisadorDados:
         """
         st.subheader("📊 Visualização por Turmas")
         
+        go = _plotly_go()
+
         # Preparar dados para gráfico empilhado
         fig = go.Figure()
         
@@ -227,6 +207,9 @@ class AnalisadorDados:
         alunos = dados_turma['alunos']
         stats = dados_turma['estatisticas']
         
+        # Cada painel da página só é calculado quando aberto (memoizado por versão dos dados)
+        modelo = ModeloVisaoLazy(dados_processados, escopo='analise_detalhada').sub_modelo(turma_selecionada)
+        
         # Cabeçalho
         st.title(f"🔍 Análise Detalhada - {turma_selecionada.replace(' - IA', '')}")
         st.info(f"📅 **Bimestre:** {info_bimestre.get('descricao', 'N/A')}")
@@ -245,90 +228,103 @@ class AnalisadorDados:
             st.metric("Alunos Problemáticos", alunos_problema)
         
         # Análise por UC (matérias)
-        self._criar_analise_por_uc(alunos)
+        self._criar_analise_por_uc(alunos, modelo)
         
         # Lista detalhada de alunos
-        self._criar_lista_detalhada_alunos(alunos)
+        self._criar_lista_detalhada_alunos(alunos, modelo)
     
-    def _criar_analise_por_uc(self, alunos):
+    def calcular_estatisticas_uc(self, alunos, uc_nome):
+        """
+        Calcula estatísticas de uma UC (sem renderizar nada)
+        """
+        return nucleo_analise.calcular_estatisticas_uc(alunos, uc_nome)
+    
+    def _criar_figura_pizza_uc(self, uc_nome, contadores_uc):
+        """
+        Cria gráfico pizza da situação na UC
+        """
+        go = _plotly_go()
+        fig_pizza = go.Figure(data=[go.Pie(
+            labels=[self.labels_situacao[k] for k in contadores_uc.keys()],
+            values=list(contadores_uc.values()),
+            marker_colors=[self.cores_situacao[k] for k in contadores_uc.keys()],
+            hole=0.3
+        )])
+        
+        fig_pizza.update_layout(
+            title=f'Distribuição de Situações - {uc_nome}',
+            height=400
+        )
+        return fig_pizza
+    
+    def _montar_painel_uc(self, alunos, uc_nome):
+        """
+        Monta estatísticas + gráfico de uma UC (chamado só quando o painel é aberto)
+        """
+        estatisticas = self.calcular_estatisticas_uc(alunos, uc_nome)
+        if estatisticas is None:
+            return None
+        return {
+            'estatisticas': estatisticas,
+            'figura': self._criar_figura_pizza_uc(uc_nome, estatisticas['contadores'])
+        }
+    
+    @fragmento
+    def _criar_analise_por_uc(self, alunos, modelo=None):
         """
         Cria análise específica por UC (matéria)
         """
         st.subheader("📚 Análise por UC (Matérias)")
         
-        # Coletar dados por UC
-        dados_ucs = {'UCP 1': [], 'UCP 2': [], 'UCP 3': []}
+        if modelo is None:
+            modelo = ModeloVisaoLazy(None)
         
-        for aluno in alunos:
-            for uc_nome, uc_dados in aluno['ucs'].items():
-                if uc_dados['nota'] > 0:  # Só considerar notas lançadas
-                    dados_ucs[uc_nome].append({
-                        'nome': aluno['nome'],
-                        'nota': uc_dados['nota'],
-                        'faltas': uc_dados['faltas'],
-                        'situacao': aluno['situacao_por_uc'][uc_nome]
-                    })
-        
-        # Criar tabs para cada UC
-        tabs = st.tabs(['UCP 1', 'UCP 2', 'UCP 3'])
-        
-        for i, (uc_nome, tab) in enumerate(zip(dados_ucs.keys(), tabs)):
-            with tab:
-                dados_uc = dados_ucs[uc_nome]
-                
-                if not dados_uc:
-                    st.info(f"📝 Nenhuma nota lançada ainda para {uc_nome}")
-                    continue
-                
-                # Estatísticas da UC
-                notas = [d['nota'] for d in dados_uc]
-                faltas = [d['faltas'] for d in dados_uc]
-                
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Média UC", f"{sum(notas)/len(notas):.1f}")
-                with col2:
-                    st.metric("Maior Nota", f"{max(notas):.1f}")
-                with col3:
-                    st.metric("Menor Nota", f"{min(notas):.1f}")
-                with col4:
-                    st.metric("Média Faltas", f"{sum(faltas)/len(faltas):.1f}")
-                
-                # Contar situações nesta UC
-                contadores_uc = {'ALTO_RISCO': 0, 'RISCO_MODERADO': 0, 'ATENCAO': 0, 'OK': 0}
-                for d in dados_uc:
-                    contadores_uc[d['situacao']] += 1
-                
-                # Gráfico pizza da situação na UC
-                fig_pizza = go.Figure(data=[go.Pie(
-                    labels=[self.labels_situacao[k] for k in contadores_uc.keys()],
-                    values=list(contadores_uc.values()),
-                    marker_colors=[self.cores_situacao[k] for k in contadores_uc.keys()],
-                    hole=0.3
-                )])
-                
-                fig_pizza.update_layout(
-                    title=f'Distribuição de Situações - {uc_nome}',
-                    height=400
-                )
-                
-                st.plotly_chart(fig_pizza, use_container_width=True)
-                
-                # Lista de alunos em risco nesta UC
-                alunos_risco_uc = [d for d in dados_uc if d['situacao'] in ['ALTO_RISCO', 'RISCO_MODERADO']]
-                if alunos_risco_uc:
-                    st.subheader(f"⚠️ Alunos em Risco em {uc_nome}")
-                    for aluno_risco in alunos_risco_uc:
-                        situacao_cor = self.cores_situacao[aluno_risco['situacao']]
-                        st.markdown(f"""
-                        <div style="padding: 10px; margin: 5px; border-left: 5px solid {situacao_cor}; background-color: #f8f9fa;">
-                            <strong>{aluno_risco['nome']}</strong><br>
-                            📊 Nota: {aluno_risco['nota']:.1f} | 📅 Faltas: {aluno_risco['faltas']}<br>
-                            🚨 Situação: {self.labels_situacao[aluno_risco['situacao']]}
-                        </div>
-                        """, unsafe_allow_html=True)
+        # Seletor no lugar de st.tabs: as tabs renderizam todas as UCs a cada rerun,
+        # aqui só a UC aberta é calculada
+        uc_nome = st.radio(
+            "UC:",
+            nucleo_analise.ucs_dos_alunos(alunos) or list(UCS_PADRAO),
+            horizontal=True,
+            label_visibility="collapsed"
+        )
+        
+        painel = modelo.painel(('uc', uc_nome), lambda: self._montar_painel_uc(alunos, uc_nome))
+        
+        if painel is None:
+            st.info(f"📝 Nenhuma nota lançada ainda para {uc_nome}")
+            return
+        
+        estatisticas = painel['estatisticas']
+        
+        # Estatísticas da UC
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Média UC", f"{estatisticas['media']:.1f}")
+        with col2:
+            st.metric("Maior Nota", f"{estatisticas['maior_nota']:.1f}")
+        with col3:
+            st.metric("Menor Nota", f"{estatisticas['menor_nota']:.1f}")
+        with col4:
+            st.metric("Média Faltas", f"{estatisticas['media_faltas']:.1f}")
+        
+        st.plotly_chart(painel['figura'], use_container_width=True)
+        
+        # Lista de alunos em risco nesta UC
+        alunos_risco_uc = estatisticas['alunos_risco']
+        if alunos_risco_uc:
+            st.subheader(f"⚠️ Alunos em Risco em {uc_nome}")
+            for aluno_risco in alunos_risco_uc:
+                situacao_cor = self.cores_situacao[aluno_risco['situacao']]
+                st.markdown(f"""
+                <div style="padding: 10px; margin: 5px; border-left: 5px solid {situacao_cor}; background-color: #f8f9fa;">
+                    <strong>{aluno_risco['nome']}</strong><br>
+                    📊 Nota: {aluno_risco['nota']:.1f} | 📅 Faltas: {aluno_risco['faltas']}<br>
+                    🚨 Situação: {self.labels_situacao[aluno_risco['situacao']]}
+                </div>
+                """, unsafe_allow_html=True)
 
-    def _criar_lista_detalhada_alunos(self, alunos):
+    @fragmento
+    def _criar_lista_detalhada_alunos(self, alunos, modelo=None):
         """
         Cria lista detalhada de todos os alunos
         """
@@ -349,28 +345,13 @@ class AnalisadorDados:
                 ["Nome", "Média", "Total de Faltas", "Situação"]
             )
         
-        # Aplicar filtros
-        alunos_filtrados = alunos.copy()
-        
-        if situacao_filtro != "Todos":
-            mapa_filtro = {
-                "Alto Risco": "ALTO_RISCO",
-                "Risco Moderado": "RISCO_MODERADO", 
-                "Atenção": "ATENCAO",
-                "OK": "OK"
-            }
-            alunos_filtrados = [a for a in alunos_filtrados if a['situacao_geral'] == mapa_filtro[situacao_filtro]]
-        
-        # Aplicar ordenação
-        if ordem_filtro == "Nome":
-            alunos_filtrados.sort(key=lambda x: x['nome'])
-        elif ordem_filtro == "Média":
-            alunos_filtrados.sort(key=lambda x: x['media_geral'], reverse=True)
-        elif ordem_filtro == "Total de Faltas":
-            alunos_filtrados.sort(key=lambda x: x['total_faltas'], reverse=True)
-        elif ordem_filtro == "Situação":
-            ordem_situacao = ['ALTO_RISCO', 'RISCO_MODERADO', 'ATENCAO', 'OK']
-            alunos_filtrados.sort(key=lambda x: ordem_situacao.index(x['situacao_geral']))
+        if modelo is None:
+            modelo = ModeloVisaoLazy(None)
+        
+        alunos_filtrados = modelo.painel(
+            ('lista', situacao_filtro, ordem_filtro),
+            lambda: self.filtrar_ordenar_alunos(alunos, situacao_filtro, ordem_filtro)
+        )
         
         # Mostrar resultados
         st.info(f"📊 Mostrando {len(alunos_filtrados)} de {len(alunos)} alunos")
@@ -400,6 +381,12 @@ class AnalisadorDados:
                     if aluno['projeto']['nota'] > 0:
                         st.write(f"Projeto: **{aluno['projeto']['nota']:.1f}** (Faltas: {aluno['projeto']['faltas']})")
 
+    def filtrar_ordenar_alunos(self, alunos, situacao_filtro, ordem_filtro):
+        """
+        Aplica filtro de situação e ordenação na lista de alunos (sem renderizar nada)
+        """
+        return nucleo_analise.filtrar_ordenar_alunos(alunos, situacao_filtro, ordem_filtro)
+
     def criar_lista_alunos_risco(self, dados_processados):
         """
         Cria lista específica de alunos que necessitam atenção
@@ -409,43 +396,18 @@ class AnalisadorDados:
             return
         
         info_bimestre = dados_processados.get('info_bimestre', {})
-        turmas_dados = dados_processados.get('turmas', {})
         
         # Cabeçalho
         st.title("⚠️ Alunos que Necessitam Atenção Especial")
         st.info(f"📅 **Bimestre:** {info_bimestre.get('descricao', 'N/A')}")
         
-        # Coletar todos os alunos em risco
-        alunos_risco = []
-        
-        for nome_turma, dados_turma in turmas_dados.items():
-            for aluno in dados_turma['alunos']:
-                if aluno['situacao_geral'] in ['ALTO_RISCO', 'RISCO_MODERADO']:
-                    aluno_info = aluno.copy()
-                    aluno_info['nome_turma'] = nome_turma.replace(' - IA', '')
-                    
-                    # Identificar UCs específicas em risco
-                    ucs_risco = []
-                    for uc_nome, situacao_uc in aluno['situacao_por_uc'].items():
-                        if situacao_uc in ['ALTO_RISCO', 'RISCO_MODERADO']:
-                            ucs_risco.append({
-                                'uc': uc_nome,
-                                'nota': aluno['ucs'][uc_nome]['nota'],
-                                'faltas': aluno['ucs'][uc_nome]['faltas'],
-                                'situacao': situacao_uc
-                            })
-                    
-                    aluno_info['ucs_risco'] = ucs_risco
-                    alunos_risco.append(aluno_info)
+        # Coletar todos os alunos em risco (já ordenados por gravidade)
+        alunos_risco = self.coletar_alunos_risco(dados_processados)
         
         if not alunos_risco:
             st.success("🎉 Nenhum aluno necessita atenção especial no momento!")
             return
         
-        # Ordenar por gravidade
-        ordem_gravidade = ['ALTO_RISCO', 'RISCO_MODERADO']
-        alunos_risco.sort(key=lambda x: (ordem_gravidade.index(x['situacao_geral']), x['media_geral']))
-        
         # Estatísticas gerais
         col1, col2, col3 = st.columns(3)
         
@@ -459,6 +421,9 @@ class AnalisadorDados:
         with col3:
             st.metric("Risco Moderado", risco_moderado, delta=f"-{risco_moderado}", delta_color="inverse")
         
+        # Baixar a lista (gerada uma vez por versão dos dados e formato)
+        self._criar_download_lista_risco(dados_processados)
+        
         st.markdown("---")
         
         # Lista detalhada
@@ -495,5 +460,76 @@ class AnalisadorDados:
             if i < len(alunos_risco):
                 st.markdown("---")
 
-# Instância global para usar em outras partes do código
-analisador_global = AnalisadorDados()
\ No newline at end of file
+    def _criar_download_lista_risco(self, dados_processados):
+        """
+        Botão para baixar a lista de alunos em risco (CSV, XLSX ou Parquet)
+        """
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            formato = st.selectbox("Formato:", formatos_disponiveis(), key='formato_exportacao_risco')
+        
+        conteudo = ModeloVisaoLazy(dados_processados, escopo='exportacao').painel(
+            ('risco', formato), lambda: self._exportar_para_bytes('risco', dados_processados, formato)
+        )
+        with col2:
+            st.write("")
+            st.download_button(
+                f"📥 Baixar lista ({formato.upper()})",
+                data=conteudo,
+                file_name=f"alunos_risco.{formato}"
+            )
+    
+    def _exportar_para_bytes(self, tipo, dados_processados, formato):
+        buffer = io.BytesIO()
+        escrever_exportacao(buffer, tipo, [dados_processados], formato)
+        return buffer.getvalue()
+
+    def coletar_alunos_risco(self, dados_processados):
+        """
+        Lista de alunos em risco com as UCs em risco, do mais grave para o menos grave
+        """
+        versao = dados_processados.get('versao')
+        if self.repositorio_sqlite is not None and versao and self.repositorio_sqlite.contem(versao):
+            return self._coletar_alunos_risco_sqlite(versao)
+        
+        return nucleo_analise.coletar_alunos_risco(dados_processados)
+    
+    def _coletar_alunos_risco_sqlite(self, versao):
+        """
+        Mesma lista de coletar_alunos_risco, via consultas indexadas no SQLite
+        """
+        alunos = self.repositorio_sqlite.alunos_por_situacao(versao)
+        ucs_risco = self.repositorio_sqlite.ucs_em_risco([a['id'] for a in alunos])
+        for aluno in alunos:
+            aluno['nome_turma'] = nucleo_analise.nome_turma_exibicao(aluno['turma'])
+            aluno['ucs_risco'] = ucs_risco[aluno['id']]
+        return alunos
+
+
+def _plotly_go():
+    """
+    plotly.graph_objects, importado só quando um gráfico é desenhado
+    """
+    import plotly.graph_objects as go
+    return go
+
+
+# Instância global criada no primeiro uso (importar o módulo não instancia nada)
+_analisador_global = None
+
+
+def obter_analisador_global():
+    """
+    Instância global do analisador, usada em outras partes do código
+    """
+    global _analisador_global
+    if _analisador_global is None:
+        _analisador_global = AnalisadorDados()
+    return _analisador_global
+
+
+def __getattr__(nome):
+    # Compatibilidade com "from src.analise_risco import analisador_global"
+    if nome == 'analisador_global':
+        return obter_analisador_global()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
\ No newline at end of file
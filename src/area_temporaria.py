@@ -0,0 +1,297 @@
+# Módulo responsável pela área gerenciada de arquivos temporários (uploads usados sem salvar)
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+
+PASTA_PADRAO = os.path.join(tempfile.gettempdir(), 'analise-notas-temporarios')
+COTA_TOTAL_PADRAO_MB = 1024
+COTA_POR_SESSAO_PADRAO_MB = 200
+# Arquivo sem uso há mais tempo que isso é apagado mesmo que a sessão não tenha avisado
+IDADE_MAXIMA_PADRAO_SEGUNDOS = 6 * 60 * 60
+PREFIXO_PASTA_PROCESSO = 'processo-'
+
+
+class CotaExcedidaError(ValueError):
+    """
+    Não há espaço na área temporária mesmo depois de liberar o que era possível
+    """
+
+
+class DonoArquivos:
+    """
+    Identifica a sessão dona de arquivos temporários.
+
+    Fica guardado no st.session_state; quando a sessão termina e o objeto é
+    coletado, os arquivos da sessão são apagados automaticamente.
+    """
+
+    def __init__(self, area):
+        self.id = uuid.uuid4().hex
+        self._finalizador = weakref.finalize(self, area.liberar_dono, self.id)
+
+    def encerrar(self):
+        """
+        Apaga agora os arquivos da sessão (não espera a coleta do objeto)
+        """
+        self._finalizador()
+
+    def __repr__(self):
+        return f"DonoArquivos(id={self.id!r})"
+
+
+class AreaTemporaria:
+    """
+    Arquivos temporários com dono, contagem de referências, cota e despejo LRU.
+
+    Cada processo usa a subpasta processo-<pid>; na inicialização as subpastas
+    de processos que já terminaram são apagadas. Arquivos com leitura em
+    andamento (em_uso) nunca são apagados; os demais saem do menos usado
+    recentemente para o mais, primeiro dentro da cota da sessão e depois da
+    cota total.
+    """
+
+    def __init__(self, pasta_base=PASTA_PADRAO, cota_total_mb=COTA_TOTAL_PADRAO_MB,
+                 cota_por_sessao_mb=COTA_POR_SESSAO_PADRAO_MB,
+                 idade_maxima_segundos=IDADE_MAXIMA_PADRAO_SEGUNDOS):
+        self.pasta_base = pasta_base
+        self.pasta = os.path.join(pasta_base, f"{PREFIXO_PASTA_PROCESSO}{os.getpid()}")
+        self.cota_total = cota_total_mb * 1024 * 1024
+        self.cota_por_sessao = cota_por_sessao_mb * 1024 * 1024
+        self.idade_maxima_segundos = idade_maxima_segundos
+        self._lock = threading.Lock()
+        # caminho -> {'dono', 'tamanho', 'referencias', 'ultimo_uso'}; ordem = LRU (mais antigo primeiro)
+        self._arquivos = OrderedDict()
+
+        os.makedirs(self.pasta, exist_ok=True)
+        self.limpar_processos_encerrados()
+
+    # ===== Criação e uso =====
+
+    def novo_dono(self):
+        return DonoArquivos(self)
+
+    def criar(self, dono, escrever, sufixo='.xlsx', tamanho_previsto=0):
+        """
+        Cria um arquivo da sessão dono com o conteúdo gravado por escrever(f).
+
+        Antes de gravar, libera espaço para tamanho_previsto; depois de gravar,
+        confere as cotas com o tamanho real. Retorna (caminho, resultado de escrever).
+        """
+        self.expirar()
+        with self._lock:
+            self._liberar_espaco(dono, tamanho_previsto)
+
+        # A pasta pode ter sido apagada por fora (ex.: limpeza do /tmp)
+        os.makedirs(self.pasta, exist_ok=True)
+        fd, caminho = tempfile.mkstemp(dir=self.pasta, prefix='upload-', suffix=sufixo)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                resultado = escrever(f)
+            tamanho = os.path.getsize(caminho)
+
+            with self._lock:
+                self._liberar_espaco(dono, tamanho)
+                self._arquivos[caminho] = {
+                    'dono': dono,
+                    'tamanho': tamanho,
+                    'referencias': 0,
+                    'ultimo_uso': time.monotonic()
+                }
+        except BaseException:
+            self._apagar(caminho)
+            raise
+        return caminho, resultado
+
+    def tocar(self, caminho):
+        """
+        Marca o arquivo como usado agora; retorna False se ele não existe mais
+        """
+        with self._lock:
+            entrada = self._arquivos.get(caminho)
+            if entrada is None:
+                return False
+            entrada['ultimo_uso'] = time.monotonic()
+            self._arquivos.move_to_end(caminho)
+            return True
+
+    @contextmanager
+    def em_uso(self, caminho):
+        """
+        Impede que o arquivo seja apagado enquanto o bloco estiver executando.
+        Caminhos que não pertencem à área passam direto.
+        """
+        with self._lock:
+            entrada = self._arquivos.get(caminho)
+            if entrada is not None:
+                entrada['referencias'] += 1
+                entrada['ultimo_uso'] = time.monotonic()
+                self._arquivos.move_to_end(caminho)
+        try:
+            yield
+        finally:
+            if entrada is not None:
+                with self._lock:
+                    entrada['referencias'] -= 1
+                    if entrada.get('remover') and entrada['referencias'] == 0:
+                        self._remover_entrada(caminho)
+
+    # ===== Remoção =====
+
+    def remover(self, caminho):
+        """
+        Apaga um arquivo da área (adiado até a última leitura terminar)
+        """
+        with self._lock:
+            entrada = self._arquivos.get(caminho)
+            if entrada is None:
+                return
+            if entrada['referencias'] > 0:
+                entrada['remover'] = True
+            else:
+                self._remover_entrada(caminho)
+
+    def liberar_dono(self, dono):
+        """
+        Apaga todos os arquivos da sessão dono (chamado quando a sessão termina)
+        """
+        with self._lock:
+            caminhos = [c for c, e in self._arquivos.items() if e['dono'] == dono]
+        for caminho in caminhos:
+            self.remover(caminho)
+
+    def expirar(self):
+        """
+        Apaga arquivos sem uso há mais de idade_maxima_segundos
+        """
+        limite = time.monotonic() - self.idade_maxima_segundos
+        with self._lock:
+            for caminho, entrada in list(self._arquivos.items()):
+                if entrada['ultimo_uso'] >= limite:
+                    break
+                if entrada['referencias'] == 0:
+                    self._remover_entrada(caminho)
+
+    def limpar_processos_encerrados(self):
+        """
+        Apaga as subpastas deixadas por processos que já terminaram
+        (ou, sem como saber se o processo roda, que estão paradas há mais que a idade máxima).
+        Pastas de processos ainda rodando nunca são apagadas: cada um expira os próprios arquivos.
+        """
+        try:
+            nomes = os.listdir(self.pasta_base)
+        except OSError:
+            return 0
+
+        removidas = 0
+        limite = time.time() - self.idade_maxima_segundos
+        for nome in nomes:
+            if not nome.startswith(PREFIXO_PASTA_PROCESSO):
+                continue
+            caminho = os.path.join(self.pasta_base, nome)
+            if caminho == self.pasta:
+                continue
+            try:
+                pid = int(nome[len(PREFIXO_PASTA_PROCESSO):])
+            except ValueError:
+                continue
+            ativo = _processo_ativo(pid)
+            if ativo or (ativo is None and _modificado_depois(caminho, limite)):
+                continue
+            shutil.rmtree(caminho, ignore_errors=True)
+            removidas += 1
+        return removidas
+
+    # ===== Consulta =====
+
+    def uso(self):
+        """
+        Resumo da área: arquivos, bytes ocupados e cotas
+        """
+        with self._lock:
+            return {
+                'arquivos': len(self._arquivos),
+                'bytes_ocupados': sum(e['tamanho'] for e in self._arquivos.values()),
+                'em_leitura': sum(1 for e in self._arquivos.values() if e['referencias'] > 0),
+                'cota_total': self.cota_total,
+                'cota_por_sessao': self.cota_por_sessao
+            }
+
+    # ===== Auxiliares (chamar com self._lock) =====
+
+    def _liberar_espaco(self, dono, tamanho_novo):
+        """
+        Despeja por LRU até o novo arquivo caber nas cotas da sessão e total
+        """
+        if tamanho_novo > self.cota_por_sessao or tamanho_novo > self.cota_total:
+            raise CotaExcedidaError(
+                f"arquivo de {tamanho_novo} bytes não cabe na área temporária"
+            )
+
+        for cota, do_dono in ((self.cota_por_sessao, True), (self.cota_total, False)):
+            ocupado = sum(e['tamanho'] for e in self._arquivos.values()
+                          if not do_dono or e['dono'] == dono)
+            for caminho, entrada in list(self._arquivos.items()):
+                if ocupado + tamanho_novo <= cota:
+                    break
+                if (do_dono and entrada['dono'] != dono) or entrada['referencias'] > 0:
+                    continue
+                ocupado -= entrada['tamanho']
+                self._remover_entrada(caminho)
+            if ocupado + tamanho_novo > cota:
+                raise CotaExcedidaError("área temporária cheia (arquivos em leitura no momento)")
+
+    def _remover_entrada(self, caminho):
+        self._arquivos.pop(caminho, None)
+        self._apagar(caminho)
+
+    def _apagar(self, caminho):
+        try:
+            os.unlink(caminho)
+        except OSError:
+            pass
+
+
+def _processo_ativo(pid):
+    """
+    True/False se o processo pid está rodando; None se não há como saber
+    """
+    if os.name == 'nt':
+        # os.kill no Windows encerra o processo; fica só o critério de idade
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _modificado_depois(pasta, limite):
+    try:
+        return max([os.path.getmtime(pasta)] +
+                   [os.path.getmtime(os.path.join(pasta, n)) for n in os.listdir(pasta)]) > limite
+    except OSError:
+        return False
+
+
+_area_global = None
+_area_global_lock = threading.Lock()
+
+
+def obter_area_temporaria():
+    """
+    Área temporária única no processo (criada e limpa na primeira chamada)
+    """
+    global _area_global
+    with _area_global_lock:
+        if _area_global is None:
+            _area_global = AreaTemporaria()
+        return _area_global
@@ -0,0 +1,218 @@
+# Módulo responsável pelo armazenamento opcional das notas processadas em SQLite
+
+import sqlite3
+import threading
+from datetime import datetime
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS bimestre (
+    id INTEGER PRIMARY KEY,
+    versao TEXT NOT NULL UNIQUE,
+    codigo TEXT,
+    descricao TEXT,
+    carregado_em TEXT
+);
+CREATE TABLE IF NOT EXISTS turma (
+    id INTEGER PRIMARY KEY,
+    nome TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS aluno (
+    id INTEGER PRIMARY KEY,
+    bimestre_id INTEGER NOT NULL REFERENCES bimestre(id) ON DELETE CASCADE,
+    turma_id INTEGER NOT NULL REFERENCES turma(id),
+    posicao INTEGER NOT NULL,
+    nome TEXT NOT NULL,
+    media_geral REAL,
+    total_faltas REAL,
+    situacao_geral TEXT,
+    nota_projeto REAL,
+    faltas_projeto REAL
+);
+CREATE TABLE IF NOT EXISTS uc_result (
+    aluno_id INTEGER NOT NULL REFERENCES aluno(id) ON DELETE CASCADE,
+    uc TEXT NOT NULL,
+    nota REAL,
+    faltas REAL,
+    situacao TEXT,
+    PRIMARY KEY (aluno_id, uc)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_aluno_situacao ON aluno (bimestre_id, situacao_geral, media_geral);
+CREATE INDEX IF NOT EXISTS idx_aluno_turma ON aluno (bimestre_id, turma_id, posicao);
+"""
+
+SITUACOES_RISCO = ('ALTO_RISCO', 'RISCO_MODERADO')
+# Versões mantidas no banco; as mais antigas saem a cada carga nova
+MAX_VERSOES_GRAVADAS = 8
+# Abaixo do limite de 999 parâmetros por consulta das versões antigas do SQLite
+TAMANHO_LOTE_PARAMETROS = 500
+
+
+class RepositorioNotasSQLite:
+    """
+    Notas processadas em tabelas normalizadas (bimestre, turma, aluno, uc_result).
+
+    Cada versão de dados entra uma vez, com executemany em uma única
+    transação; só as max_versoes mais recentes ficam no banco (uma versão
+    removida volta a ser calculada em memória pelo analisador). A lista de alunos em risco do analisador (a que percorria todos
+    os alunos) roda como consulta indexada; o resumo por turma já sai das
+    estatísticas pré-calculadas de cada turma e não passa pelo banco.
+    """
+
+    def __init__(self, caminho_banco=':memory:', max_versoes=MAX_VERSOES_GRAVADAS):
+        self.caminho_banco = caminho_banco
+        self.max_versoes = max_versoes
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(caminho_banco, check_same_thread=False)
+        self._conexao.row_factory = sqlite3.Row
+        with self._lock:
+            if caminho_banco != ':memory:':
+                self._conexao.execute('PRAGMA journal_mode=WAL')
+            self._conexao.execute('PRAGMA foreign_keys=ON')
+            self._conexao.executescript(ESQUEMA)
+
+    def fechar(self):
+        with self._lock:
+            self._conexao.close()
+
+    # ===== Carga =====
+
+    def carregar(self, dados_processados):
+        """
+        Grava uma versão dos dados processados (não faz nada se já estiver gravada).
+        Retorna o id do bimestre no banco.
+        """
+        versao = dados_processados.get('versao')
+        info = dados_processados.get('info_bimestre', {})
+
+        with self._lock:
+            existente = self._conexao.execute(
+                'SELECT id FROM bimestre WHERE versao = ?', (versao,)
+            ).fetchone()
+            if existente:
+                return existente['id']
+
+            with self._conexao:
+                cursor = self._conexao.execute(
+                    'INSERT INTO bimestre (versao, codigo, descricao, carregado_em) VALUES (?, ?, ?, ?)',
+                    (versao, info.get('bimestre'), info.get('descricao'), datetime.now().isoformat())
+                )
+                bimestre_id = cursor.lastrowid
+
+                nomes_turmas = list(dados_processados.get('turmas', {}).keys())
+                self._conexao.executemany(
+                    'INSERT OR IGNORE INTO turma (nome) VALUES (?)',
+                    [(nome,) for nome in nomes_turmas]
+                )
+                ids_turmas = self._ids_turmas(nomes_turmas)
+
+                proximo_id = self._conexao.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM aluno').fetchone()[0]
+                linhas_alunos = []
+                linhas_ucs = []
+                for nome_turma, dados_turma in dados_processados.get('turmas', {}).items():
+                    for posicao, aluno in enumerate(dados_turma['alunos']):
+                        aluno_id = proximo_id
+                        proximo_id += 1
+                        linhas_alunos.append((
+                            aluno_id, bimestre_id, ids_turmas[nome_turma], posicao, aluno['nome'],
+                            aluno['media_geral'], aluno['total_faltas'], aluno['situacao_geral'],
+                            aluno['projeto']['nota'], aluno['projeto']['faltas']
+                        ))
+                        for uc_nome, uc_dados in aluno['ucs'].items():
+                            linhas_ucs.append((
+                                aluno_id, uc_nome, uc_dados['nota'], uc_dados['faltas'],
+                                aluno['situacao_por_uc'].get(uc_nome)
+                            ))
+
+                self._conexao.executemany(
+                    'INSERT INTO aluno (id, bimestre_id, turma_id, posicao, nome, media_geral, total_faltas, '
+                    'situacao_geral, nota_projeto, faltas_projeto) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    linhas_alunos
+                )
+                self._conexao.executemany(
+                    'INSERT INTO uc_result (aluno_id, uc, nota, faltas, situacao) VALUES (?, ?, ?, ?, ?)',
+                    linhas_ucs
+                )
+                self._remover_versoes_antigas()
+        return bimestre_id
+
+    def contem(self, versao):
+        with self._lock:
+            return self._conexao.execute(
+                'SELECT 1 FROM bimestre WHERE versao = ?', (versao,)
+            ).fetchone() is not None
+
+    # ===== Consultas =====
+
+    def alunos_por_situacao(self, versao, situacoes=SITUACOES_RISCO):
+        """
+        Alunos da versão com situação geral em situacoes, do mais grave para o menos
+        """
+        marcadores = ', '.join('?' for _ in situacoes)
+        ordem = ' '.join(f"WHEN '{s}' THEN {i}" for i, s in enumerate(situacoes))
+        return self._consultar(f"""
+            SELECT a.id, t.nome AS turma, a.nome, a.media_geral, a.total_faltas, a.situacao_geral
+            FROM aluno a
+            JOIN bimestre b ON b.id = a.bimestre_id
+            JOIN turma t ON t.id = a.turma_id
+            WHERE b.versao = ? AND a.situacao_geral IN ({marcadores})
+            ORDER BY CASE a.situacao_geral {ordem} END, a.media_geral, a.turma_id, a.posicao
+        """, (versao, *situacoes))
+
+    def ucs_em_risco(self, ids_alunos):
+        """
+        UCs em risco de cada aluno: {aluno_id: [{'uc', 'nota', 'faltas', 'situacao'}]}
+        """
+        resultado = {aluno_id: [] for aluno_id in ids_alunos}
+        ids_alunos = list(ids_alunos)
+        for inicio in range(0, len(ids_alunos), TAMANHO_LOTE_PARAMETROS):
+            lote = ids_alunos[inicio:inicio + TAMANHO_LOTE_PARAMETROS]
+            marcadores = ', '.join('?' for _ in lote)
+            for linha in self._consultar(f"""
+                SELECT aluno_id, uc, nota, faltas, situacao
+                FROM uc_result
+                WHERE aluno_id IN ({marcadores}) AND situacao IN ('ALTO_RISCO', 'RISCO_MODERADO')
+                ORDER BY aluno_id, uc
+            """, tuple(lote)):
+                resultado[linha['aluno_id']].append({
+                    'uc': linha['uc'], 'nota': linha['nota'],
+                    'faltas': linha['faltas'], 'situacao': linha['situacao']
+                })
+        return resultado
+
+    def _consultar(self, sql, parametros=()):
+        with self._lock:
+            return [dict(linha) for linha in self._conexao.execute(sql, parametros)]
+
+    def _remover_versoes_antigas(self):
+        """
+        Apaga as versões além das max_versoes mais recentes (alunos e UCs saem em cascata).
+        Chamar com self._lock, dentro da transação da carga.
+        """
+        self._conexao.execute(
+            'DELETE FROM bimestre WHERE id NOT IN (SELECT id FROM bimestre ORDER BY id DESC LIMIT ?)',
+            (self.max_versoes,)
+        )
+
+    def _ids_turmas(self, nomes_turmas):
+        if not nomes_turmas:
+            return {}
+        marcadores = ', '.join('?' for _ in nomes_turmas)
+        linhas = self._conexao.execute(
+            f'SELECT id, nome FROM turma WHERE nome IN ({marcadores})', nomes_turmas
+        )
+        return {linha['nome']: linha['id'] for linha in linhas}
+
+
+_repositorios = {}
+_repositorios_lock = threading.Lock()
+
+
+def obter_repositorio_sqlite(caminho_banco):
+    """
+    Repositório SQLite compartilhado no processo para o arquivo de banco informado
+    """
+    with _repositorios_lock:
+        if caminho_banco not in _repositorios:
+            _repositorios[caminho_banco] = RepositorioNotasSQLite(caminho_banco)
+        return _repositorios[caminho_banco]
@@ -0,0 +1,300 @@
+# Módulo responsável pelo repositório de backups endereçado por conteúdo
+
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from src.catalogo_dados import calcular_hash_arquivo
+from src.escrita_atomica import trava_arquivo, gravar_atomico
+
+PASTA_BACKUPS = 'backups'
+NOME_MANIFESTO = 'manifesto.json'
+TAMANHO_BLOCO = 1024 * 1024
+# Blobs mais novos que isso não são apagados pela coleta (podem estar
+# sendo gravados por um backup que ainda não entrou no manifesto)
+CARENCIA_BLOBS_SEGUNDOS = 600
+
+_repositorios = {}
+_repositorios_lock = threading.Lock()
+
+
+def obter_repositorio_backups(pasta_dados):
+    """
+    Retorna o repositório de backups (compartilhado no processo) da pasta informada
+    """
+    chave = os.path.abspath(pasta_dados)
+    with _repositorios_lock:
+        repositorio = _repositorios.get(chave)
+        if repositorio is None:
+            repositorio = RepositorioBackups(pasta_dados)
+            _repositorios[chave] = repositorio
+        return repositorio
+
+
+class RepositorioBackups:
+    """
+    Backups guardados uma única vez por conteúdo.
+
+    Cada versão vira um blob comprimido em dados/backups/objetos/<hh>/<hash>.xlsx.gz
+    e o manifesto (dados/backups/manifesto.json) registra (bimestre, data, hash).
+    Salvar de novo um conteúdo que já existe só acrescenta uma linha no
+    manifesto: nenhum byte extra de blob e nenhuma cópia do arquivo.
+    """
+
+    def __init__(self, pasta_dados):
+        self.pasta_dados = pasta_dados
+        self.pasta_backups = os.path.join(pasta_dados, PASTA_BACKUPS)
+        self.pasta_objetos = os.path.join(self.pasta_backups, 'objetos')
+        self.caminho_manifesto = os.path.join(self.pasta_backups, NOME_MANIFESTO)
+        self._lock = threading.Lock()
+        self._manifesto = None
+        self._mtime_manifesto = None
+
+    # ===== Escrita =====
+
+    def criar_backup(self, caminho_origem, bimestre, hash_conteudo=None,
+                     timestamp=None, nome_arquivo=None):
+        """
+        Registra o conteúdo atual de caminho_origem como backup do bimestre.
+
+        nome_arquivo='' registra o backup sem nome de origem (backups antigos
+        que só tinham a data no nome). Retorna a entrada do manifesto;
+        entrada['novo_blob'] indica se algum byte foi gravado (False quando o
+        conteúdo já estava no repositório).
+        """
+        if hash_conteudo is None:
+            hash_conteudo = calcular_hash_arquivo(caminho_origem)
+
+        caminho_blob = self.caminho_blob(hash_conteudo)
+        novo_blob = self._gravar_blob(caminho_origem, caminho_blob)
+
+        entrada = {
+            'bimestre': bimestre,
+            'nome_arquivo': nome_arquivo if nome_arquivo is not None else os.path.basename(caminho_origem),
+            'timestamp': timestamp or datetime.now().strftime('%Y%m%d_%H%M%S'),
+            'hash': hash_conteudo,
+            'tamanho': os.path.getsize(caminho_origem)
+        }
+
+        def acrescentar(entradas):
+            # Sob a trava do manifesto a coleta de órfãos não roda: se ela apagou
+            # o blob antes daqui, ele é gravado de novo; se vier depois, a
+            # entrada já está no manifesto e o blob fica.
+            nonlocal novo_blob
+            if self._gravar_blob(caminho_origem, caminho_blob):
+                novo_blob = True
+            entrada['tamanho_comprimido'] = os.path.getsize(caminho_blob)
+            return entradas + [entrada]
+
+        self._alterar_manifesto(acrescentar)
+
+        entrada = dict(entrada)
+        entrada['novo_blob'] = novo_blob
+        return entrada
+
+    def restaurar(self, hash_conteudo, caminho_destino):
+        """
+        Descomprime um backup para caminho_destino (troca atômica)
+        """
+        def escrever(f_destino):
+            with self.abrir(hash_conteudo) as f_blob:
+                for bloco in iter(lambda: f_blob.read(TAMANHO_BLOCO), b''):
+                    f_destino.write(bloco)
+
+        with trava_arquivo(caminho_destino):
+            gravar_atomico(caminho_destino, escrever)
+
+    def importar_backups_legados(self):
+        """
+        Move os antigos dados/backup_<data>_<nome>.xlsx para o repositório
+        """
+        importados = 0
+        bytes_liberados = 0
+        for nome in sorted(os.listdir(self.pasta_dados)):
+            if not (nome.startswith('backup_') and nome.endswith('.xlsx')):
+                continue
+            caminho = os.path.join(self.pasta_dados, nome)
+            timestamp, nome_arquivo = self._interpretar_nome_legado(nome)
+
+            entrada = self.criar_backup(caminho, bimestre=None, timestamp=timestamp,
+                                        nome_arquivo=nome_arquivo)
+            bytes_liberados += entrada['tamanho'] - (entrada['tamanho_comprimido'] if entrada['novo_blob'] else 0)
+            os.unlink(caminho)
+            importados += 1
+        return {'importados': importados, 'bytes_liberados': bytes_liberados}
+
+    def manter_somente(self, politica):
+        """
+        Remove do manifesto as entradas que a política de retenção não seleciona
+        e apaga os blobs que deixaram de ser usados.
+
+        A política é avaliada sobre o manifesto lido sob a trava: um backup
+        criado por outra sessão durante a compactação entra na seleção.
+        Retorna {'entradas_removidas', 'entradas_mantidas', 'blobs_removidos', 'bytes_liberados'}.
+        """
+        with trava_arquivo(self.caminho_manifesto):
+            antes = self._carregar_manifesto()
+            manter = politica.selecionar(antes)
+            depois = [e for e in antes if id(e) in manter]
+            if len(depois) != len(antes):
+                self._gravar_manifesto(depois)
+            coleta = self._coletar_blobs_orfaos({e['hash'] for e in depois})
+
+        coleta['entradas_removidas'] = len(antes) - len(depois)
+        coleta['entradas_mantidas'] = len(depois)
+        return coleta
+
+    def _coletar_blobs_orfaos(self, hashes_em_uso):
+        """
+        Apaga blobs que nenhuma entrada do manifesto referencia
+        """
+        blobs_removidos = 0
+        bytes_liberados = 0
+        limite = time.time() - CARENCIA_BLOBS_SEGUNDOS
+        if not os.path.isdir(self.pasta_objetos):
+            return {'blobs_removidos': 0, 'bytes_liberados': 0}
+
+        for raiz, _, nomes in os.walk(self.pasta_objetos):
+            for nome in nomes:
+                if not nome.endswith('.xlsx.gz') or nome.startswith('.'):
+                    continue
+                if nome[:-len('.xlsx.gz')] in hashes_em_uso:
+                    continue
+                caminho = os.path.join(raiz, nome)
+                try:
+                    stat = os.stat(caminho)
+                    if stat.st_mtime > limite:
+                        continue
+                    os.unlink(caminho)
+                except OSError:
+                    continue
+                blobs_removidos += 1
+                bytes_liberados += stat.st_size
+        return {'blobs_removidos': blobs_removidos, 'bytes_liberados': bytes_liberados}
+
+    # ===== Leitura =====
+
+    def listar(self, bimestre=None):
+        """
+        Entradas do manifesto, da mais recente para a mais antiga
+        """
+        entradas = self._ler_manifesto()
+        if bimestre is not None:
+            entradas = [e for e in entradas if e.get('bimestre') == bimestre]
+        return sorted(entradas, key=lambda e: e['timestamp'], reverse=True)
+
+    def abrir(self, hash_conteudo):
+        """
+        Abre o conteúdo descomprimido de um backup (arquivo somente leitura)
+        """
+        return gzip.open(self.caminho_blob(hash_conteudo), 'rb')
+
+    def caminho_blob(self, hash_conteudo):
+        return os.path.join(self.pasta_objetos, hash_conteudo[:2], f"{hash_conteudo}.xlsx.gz")
+
+    def uso_disco(self):
+        """
+        Bytes ocupados pelos blobs e quanto ocupariam sem deduplicação/compressão
+        """
+        entradas = self._ler_manifesto()
+        hashes = {e['hash'] for e in entradas}
+        ocupado = 0
+        for h in hashes:
+            try:
+                ocupado += os.path.getsize(self.caminho_blob(h))
+            except OSError:
+                pass
+        return {
+            'entradas': len(entradas),
+            'versoes_distintas': len(hashes),
+            'bytes_ocupados': ocupado,
+            'bytes_sem_deduplicacao': sum(e.get('tamanho', 0) for e in entradas)
+        }
+
+    # ===== Manifesto =====
+
+    def _ler_manifesto(self):
+        """
+        Manifesto em memória; só relê o arquivo se o mtime mudou
+        """
+        try:
+            mtime = os.stat(self.caminho_manifesto).st_mtime_ns
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            if self._manifesto is None or mtime != self._mtime_manifesto:
+                self._manifesto = self._carregar_manifesto()
+                self._mtime_manifesto = mtime
+            return list(self._manifesto)
+
+    def _carregar_manifesto(self):
+        try:
+            with open(self.caminho_manifesto, 'r', encoding='utf-8') as f:
+                return json.load(f).get('backups', [])
+        except (OSError, ValueError):
+            return []
+
+    def _alterar_manifesto(self, alterar):
+        """
+        Lê, altera e regrava o manifesto sob trava (entre sessões e processos)
+        """
+        with trava_arquivo(self.caminho_manifesto):
+            entradas = alterar(self._carregar_manifesto())
+            self._gravar_manifesto(entradas)
+        return entradas
+
+    def _gravar_manifesto(self, entradas):
+        """
+        Grava o manifesto (quem chama já deve estar com a trava do manifesto)
+        """
+        conteudo = json.dumps({'backups': entradas}, ensure_ascii=False, indent=1)
+        gravar_atomico(self.caminho_manifesto, lambda f: f.write(conteudo.encode('utf-8')))
+        with self._lock:
+            self._manifesto = entradas
+            self._mtime_manifesto = os.stat(self.caminho_manifesto).st_mtime_ns
+
+    # ===== Auxiliares =====
+
+    def _gravar_blob(self, caminho_origem, caminho_blob):
+        """
+        Grava o blob se ele ainda não existe; True se gravou.
+
+        Um blob reaproveitado tem o mtime renovado, para a carência da coleta
+        de órfãos valer a partir deste backup.
+        """
+        with trava_arquivo(caminho_blob):
+            if os.path.exists(caminho_blob):
+                try:
+                    os.utime(caminho_blob)
+                except OSError:
+                    pass
+                return False
+            gravar_atomico(caminho_blob, lambda f: self._comprimir(caminho_origem, f))
+            return True
+
+    def _interpretar_nome_legado(self, nome):
+        """
+        (timestamp, nome_arquivo) de backup_<data>_<hora>[_<nome original>].xlsx.
+
+        Sem o nome original, nome_arquivo é ''. Se a data não puder ser lida,
+        o timestamp fica None (data da importação) e o nome inteiro é mantido.
+        """
+        partes = nome[len('backup_'):-len('.xlsx')].split('_', 2)
+        if len(partes) >= 2:
+            timestamp = '_'.join(partes[:2])
+            try:
+                datetime.strptime(timestamp, '%Y%m%d_%H%M%S')
+            except ValueError:
+                return None, nome
+            return timestamp, partes[2] + '.xlsx' if len(partes) == 3 else ''
+        return None, nome
+
+    def _comprimir(self, caminho_origem, f_destino):
+        with open(caminho_origem, 'rb') as f_origem:
+            with gzip.GzipFile(fileobj=f_destino, mode='wb', mtime=0) as gz:
+                for bloco in iter(lambda: f_origem.read(TAMANHO_BLOCO), b''):
+                    gz.write(bloco)
@@ -0,0 +1,137 @@
+# Módulo responsável pelo cache em disco dos dados processados (indexado pelo conteúdo da planilha)
+
+import json
+import os
+import threading
+
+from src.catalogo_dados import calcular_hash_arquivo
+from src.escrita_atomica import gravar_atomico
+from src.instrumentacao import medir, contar
+from src.leitura_dados import calcular_versao_arquivo
+
+PASTA_CACHE = 'dados/.cache'
+# Mudar quando o processamento das planilhas mudar: invalida todo o cache
+VERSAO_FORMATO = 3
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def obter_cache_processados(pasta_cache=PASTA_CACHE):
+    """
+    Cache (compartilhado no processo) da pasta informada
+    """
+    chave = os.path.abspath(pasta_cache)
+    with _caches_lock:
+        cache = _caches.get(chave)
+        if cache is None:
+            cache = CacheProcessados(pasta_cache)
+            _caches[chave] = cache
+        return cache
+
+
+class CacheProcessados:
+    """
+    Resultado de obter_dados_completos guardado em JSON, por hash do conteúdo + bimestre.
+
+    A chave é o conteúdo e não a versão (caminho + mtime): a mesma planilha
+    copiada, restaurada de backup ou regravada sem mudanças não é processada de
+    novo, e outro processo (CLI, daemon da pasta) pode deixar o resultado pronto
+    para a interface. Ao sair do cache a versão é recalculada para o arquivo atual.
+    """
+
+    def __init__(self, pasta_cache=PASTA_CACHE, max_entradas=32):
+        self.pasta_cache = pasta_cache
+        self.max_entradas = max_entradas
+
+    def chave(self, hash_conteudo, bimestre):
+        return f"v{VERSAO_FORMATO}-{hash_conteudo[:32]}-{bimestre or 'auto'}"
+
+    def _caminho(self, hash_conteudo, bimestre):
+        return os.path.join(self.pasta_cache, f"{self.chave(hash_conteudo, bimestre)}.json")
+
+    def contem(self, hash_conteudo, bimestre):
+        return os.path.exists(self._caminho(hash_conteudo, bimestre))
+
+    def obter(self, hash_conteudo, bimestre):
+        """
+        (dados_processados, info_bimestre) guardados, ou None
+        """
+        caminho = self._caminho(hash_conteudo, bimestre)
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                dados, info_bimestre = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            # Entrada corrompida: descarta e processa de novo
+            print(f"Cache de dados processados ignorado ({os.path.basename(caminho)}): {e}")
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(caminho)  # Marca o uso (a poda remove as menos usadas)
+        except OSError:
+            pass
+        return dados, info_bimestre
+
+    def guardar(self, hash_conteudo, bimestre, dados, info_bimestre):
+        """
+        Grava o resultado (escrita atômica) e poda as entradas mais antigas
+        """
+        conteudo = json.dumps([dados, info_bimestre], ensure_ascii=False).encode('utf-8')
+        os.makedirs(self.pasta_cache, exist_ok=True)
+        gravar_atomico(self._caminho(hash_conteudo, bimestre), lambda f: f.write(conteudo))
+        self._podar()
+
+    def carregador(self, funcao_carregar):
+        """
+        Envolve funcao_carregar(caminho, bimestre) -> (dados, info) com o cache.
+        Pode ser passado direto para registro_global.carregar.
+        """
+        def carregar(caminho, bimestre):
+            with medir('carregar_com_cache', os.path.basename(caminho)):
+                with medir('cache_disco'):
+                    stat = os.stat(caminho)
+                    hash_conteudo = calcular_hash_arquivo(caminho)
+                    versao = calcular_versao_arquivo(caminho, bimestre, stat)
+                    guardado = self.obter(hash_conteudo, bimestre)
+
+                if guardado is not None:
+                    contar('cache_disco.acerto')
+                    dados, info_bimestre = guardado
+                    dados['versao'] = versao
+                    info_bimestre['versao_arquivo'] = versao
+                    dados['info_bimestre'] = info_bimestre
+                    return dados, info_bimestre
+
+                contar('cache_disco.falha')
+                dados, info_bimestre = funcao_carregar(caminho, bimestre)
+                # Só guarda se o arquivo não mudou entre o hash e a leitura
+                if dados and calcular_versao_arquivo(caminho, bimestre) == versao:
+                    try:
+                        with medir('gravar_cache'):
+                            self.guardar(hash_conteudo, bimestre, dados, info_bimestre)
+                    except (OSError, TypeError, ValueError) as e:
+                        print(f"Não foi possível gravar o cache de {caminho}: {e}")
+                return dados, info_bimestre
+
+        return carregar
+
+    def _podar(self):
+        try:
+            entradas = [e for e in os.scandir(self.pasta_cache) if e.name.endswith('.json')]
+        except OSError:
+            return
+        excesso = len(entradas) - self.max_entradas
+        if excesso <= 0:
+            return
+        entradas.sort(key=lambda e: e.stat().st_mtime)
+        for entrada in entradas[:excesso]:
+            try:
+                os.remove(entrada.path)
+            except OSError:
+                pass
@@ -0,0 +1,289 @@
+# Módulo responsável pelo catálogo indexado da pasta de dados
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.leitura_dados import LeitorDadosExcel
+
+NOME_INDICE = '.catalogo.json'
+VERSAO_INDICE = 1
+
+# Arquivo esperado na pasta de dados para cada bimestre
+ARQUIVOS_BIMESTRE = {
+    '2_bimestre': 'NOTAS BIMESTRAIS EPT 2º bimestre.xlsx',
+    '3_bimestre': 'NOTAS BIMESTRAIS EPT 3º bimestre.xlsx',
+    '4_bimestre': 'NOTAS BIMESTRAIS EPT 4º bimestre.xlsx'
+}
+
+# Um catálogo por pasta, compartilhado entre todas as sessões do processo
+_catalogos = {}
+_catalogos_lock = threading.Lock()
+
+
+def obter_catalogo(pasta_dados, arquivos_suportados):
+    """
+    Retorna o catálogo (compartilhado no processo) da pasta informada
+    """
+    chave = os.path.abspath(pasta_dados)
+    with _catalogos_lock:
+        catalogo = _catalogos.get(chave)
+        if catalogo is None:
+            catalogo = CatalogoDados(pasta_dados, arquivos_suportados)
+            _catalogos[chave] = catalogo
+        return catalogo
+
+
+def calcular_hash_arquivo(caminho, tamanho_bloco=1024 * 1024):
+    """
+    Calcula o SHA-256 do arquivo lendo em blocos
+    """
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CatalogoDados:
+    """
+    Índice da pasta dados/ (bimestres, backups, hashes, tamanhos, datas e formato).
+
+    O índice fica salvo em dados/.catalogo.json e é mantido em memória. A cada
+    leitura só é feito um stat na pasta: se o mtime não mudou, o catálogo em
+    memória é devolvido direto. Gravações feitas pelo sistema chamam
+    registrar_arquivo() para atualizar a entrada sem varrer a pasta.
+    """
+
+    def __init__(self, pasta_dados, arquivos_suportados, intervalo_revalidacao=60):
+        self.pasta_dados = pasta_dados
+        self.arquivos_suportados = dict(arquivos_suportados)
+        self.caminho_indice = os.path.join(pasta_dados, NOME_INDICE)
+        # Sobrescritas "in place" feitas por fora não mudam o mtime da pasta,
+        # então de tempos em tempos os arquivos são conferidos um a um
+        self.intervalo_revalidacao = intervalo_revalidacao
+        self._lock = threading.RLock()
+        self._entradas = None
+        self._mtime_pasta = None
+        self._ultima_revalidacao = 0.0
+        self._visao = None
+
+    # ===== Leitura =====
+
+    def obter(self):
+        """
+        Retorna o catálogo atual: {'bimestres': {...}, 'backups': [...]}
+        """
+        mtime_pasta = self._mtime_pasta_atual()
+        agora = time.monotonic()
+        if (self._visao is not None and mtime_pasta == self._mtime_pasta
+                and agora - self._ultima_revalidacao < self.intervalo_revalidacao):
+            return self._visao
+
+        with self._lock:
+            mtime_pasta = self._mtime_pasta_atual()
+            if (self._visao is None or mtime_pasta != self._mtime_pasta
+                    or agora - self._ultima_revalidacao >= self.intervalo_revalidacao):
+                self._sincronizar()
+            return self._visao
+
+    def bimestres_disponiveis(self):
+        """
+        Bimestres com arquivo presente na pasta
+        """
+        return self.obter()['bimestres']
+
+    def backups(self):
+        """
+        Backups ordenados do mais recente para o mais antigo
+        """
+        return self.obter()['backups']
+
+    def entrada(self, nome_arquivo):
+        """
+        Entrada do índice para um arquivo específico (ou None)
+        """
+        self.obter()
+        return self._entradas.get(nome_arquivo)
+
+    # ===== Atualização =====
+
+    def registrar_arquivo(self, caminho, hash_conteudo=None, formato=None):
+        """
+        Atualiza a entrada de um arquivo recém-gravado sem varrer a pasta
+        """
+        nome = os.path.basename(caminho)
+        with self._lock:
+            if self._entradas is None:
+                self._sincronizar()
+            try:
+                stat = os.stat(caminho)
+            except OSError:
+                self._entradas.pop(nome, None)
+            else:
+                anterior = self._entradas.get(nome, {})
+                entrada = self._criar_entrada(nome, stat, anterior)
+                if hash_conteudo:
+                    entrada['hash'] = hash_conteudo
+                if formato:
+                    entrada['formato'] = formato
+                self._entradas[nome] = entrada
+            self._salvar_indice()
+            self._montar_visao()
+
+    def remover_arquivo(self, caminho):
+        """
+        Remove a entrada de um arquivo apagado
+        """
+        self.registrar_arquivo(caminho)
+
+    def invalidar(self):
+        """
+        Força nova sincronização na próxima leitura
+        """
+        with self._lock:
+            self._visao = None
+
+    def _sincronizar(self):
+        """
+        Confere a pasta contra o índice; só recalcula hash/formato do que mudou
+        """
+        if self._entradas is None:
+            self._entradas = self._carregar_indice()
+
+        novas_entradas = {}
+        try:
+            nomes = os.listdir(self.pasta_dados)
+        except OSError:
+            nomes = []
+
+        alterado = False
+        for nome in nomes:
+            if not self._deve_indexar(nome):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.pasta_dados, nome))
+            except OSError:
+                continue
+            anterior = self._entradas.get(nome)
+            if (anterior and anterior.get('tamanho') == stat.st_size
+                    and anterior.get('mtime_ns') == stat.st_mtime_ns):
+                novas_entradas[nome] = anterior
+            else:
+                novas_entradas[nome] = self._criar_entrada(nome, stat, {})
+                alterado = True
+
+        if set(novas_entradas) != set(self._entradas):
+            alterado = True
+
+        self._entradas = novas_entradas
+        if alterado:
+            self._salvar_indice()
+        self._mtime_pasta = self._mtime_pasta_atual()
+        self._ultima_revalidacao = time.monotonic()
+        self._montar_visao()
+
+    def _criar_entrada(self, nome, stat, anterior):
+        """
+        Monta a entrada do índice, reaproveitando hash/formato se nada mudou
+        """
+        caminho = os.path.join(self.pasta_dados, nome)
+        inalterado = (anterior.get('tamanho') == stat.st_size
+                      and anterior.get('mtime_ns') == stat.st_mtime_ns)
+        entrada = {
+            'nome': nome,
+            'tamanho': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'modificado': stat.st_mtime,
+            'tipo': 'backup' if self._eh_backup(nome) else 'bimestre',
+            'hash': anterior.get('hash') if inalterado else None,
+            'formato': anterior.get('formato') if inalterado else None
+        }
+        if entrada['hash'] is None:
+            try:
+                entrada['hash'] = calcular_hash_arquivo(caminho)
+            except OSError:
+                entrada['hash'] = None
+        if entrada['formato'] is None:
+            entrada['formato'] = self._detectar_formato(caminho)
+        return entrada
+
+    def _detectar_formato(self, caminho):
+        """
+        Detecta o bimestre do arquivo (só roda quando o arquivo muda)
+        """
+        info = LeitorDadosExcel().detectar_bimestre_arquivo(caminho)
+        return {
+            'bimestre': info.get('bimestre'),
+            'descricao': info.get('descricao'),
+            'turmas_encontradas': info.get('turmas_encontradas', 0)
+        }
+
+    def _montar_visao(self):
+        """
+        Pré-monta a visão usada pela sidebar para leitura em O(1)
+        """
+        nomes_bimestre = {arquivo: bim for bim, arquivo in self.arquivos_suportados.items()}
+        bimestres = {}
+        backups = []
+        for nome, entrada in self._entradas.items():
+            dados = dict(entrada)
+            dados['caminho'] = os.path.join(self.pasta_dados, nome)
+            if entrada['tipo'] == 'backup':
+                backups.append(dados)
+            elif nome in nomes_bimestre:
+                bimestres[nomes_bimestre[nome]] = dados
+
+        # Manter a ordem de arquivos_suportados
+        bimestres = {bim: bimestres[bim] for bim in self.arquivos_suportados if bim in bimestres}
+        backups.sort(key=lambda x: x['nome'], reverse=True)
+        self._visao = {'bimestres': bimestres, 'backups': backups}
+
+    # ===== Persistência do índice =====
+
+    def _carregar_indice(self):
+        try:
+            with open(self.caminho_indice, 'r', encoding='utf-8') as f:
+                conteudo = json.load(f)
+            if conteudo.get('versao') == VERSAO_INDICE:
+                return conteudo.get('arquivos', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _salvar_indice(self):
+        """
+        Grava o índice de forma atômica (arquivo temporário + rename)
+        """
+        if not os.path.isdir(self.pasta_dados):
+            return
+        caminho_tmp = f"{self.caminho_indice}.{os.getpid()}.tmp"
+        try:
+            with open(caminho_tmp, 'w', encoding='utf-8') as f:
+                json.dump({'versao': VERSAO_INDICE, 'arquivos': self._entradas}, f,
+                          ensure_ascii=False, indent=1)
+            os.replace(caminho_tmp, self.caminho_indice)
+        except OSError as e:
+            print(f"Não foi possível salvar o catálogo: {str(e)}")
+            try:
+                os.unlink(caminho_tmp)
+            except OSError:
+                pass
+        # O rename do índice altera o mtime da pasta; não é uma mudança externa
+        self._mtime_pasta = self._mtime_pasta_atual()
+
+    # ===== Auxiliares =====
+
+    def _mtime_pasta_atual(self):
+        try:
+            return os.stat(self.pasta_dados).st_mtime_ns
+        except OSError:
+            return None
+
+    def _eh_backup(self, nome):
+        return nome.startswith('backup_') and nome.endswith('.xlsx')
+
+    def _deve_indexar(self, nome):
+        return nome.endswith('.xlsx') and not nome.startswith(('.', '~$'))
@@ -0,0 +1,255 @@
+# Módulo responsável pela comparação (diff) entre duas versões processadas das notas
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from src.modelo_visao import cache_visoes, versao_dados
+from src.nucleo_analise import ucs_dos_alunos
+
+# Ordem de gravidade usada para dizer se o aluno melhorou ou piorou
+GRAVIDADE = {'OK': 0, 'ATENCAO': 1, 'RISCO_MODERADO': 2, 'ALTO_RISCO': 3}
+# Diferenças menores que isso são arredondamento, não alteração
+TOLERANCIA = 0.001
+
+_SUFIXO_TURMA = re.compile(r'\s*-\s*(IA|4º Bim)\s*$', re.IGNORECASE)
+# Anotações como "(TRANSFERIDO)" entram e saem do nome entre versões
+_ANOTACAO_NOME = re.compile(r'\([^)]*\)')
+
+
+def normalizar_turma(nome_turma):
+    """
+    Nome da turma sem o sufixo do formato ("1º ano G - IA" -> "1º ano G")
+    """
+    return _SUFIXO_TURMA.sub('', str(nome_turma)).strip()
+
+
+def normalizar_nome(nome):
+    """
+    Chave do aluno: sem anotações entre parênteses, sem acentos, sem espaços
+    repetidos e sem diferença de maiúsculas
+    """
+    sem_acentos = unicodedata.normalize('NFKD', _ANOTACAO_NOME.sub(' ', str(nome))).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sem_acentos.split()).casefold()
+
+
+class ComparadorVersoes:
+    """
+    Compara duas versões dos dados processados (arquivo atual x backup, ou dois bimestres).
+
+    Cada versão vira uma tabela com uma linha por aluno, indexada por
+    (turma, aluno, ocorrência) e memoizada pela versão dos dados. Alinhar as
+    duas tabelas e achar o que mudou são operações de coluna do pandas, sem
+    laço por aluno.
+    """
+
+    def tabela_alunos(self, dados_processados):
+        """
+        Uma linha por aluno com notas, faltas e situações (memoizada por versão)
+        """
+        versao = versao_dados(dados_processados)
+        return cache_visoes.obter(
+            (versao, 'comparacao', 'tabela_alunos'),
+            lambda: self._montar_tabela(dados_processados)
+        )
+
+    def comparar(self, dados_antes, dados_depois, tolerancia=TOLERANCIA):
+        """
+        Conjunto de alterações entre duas versões (memoizado pelo par de versões).
+
+        Retorna dict com:
+        - resumo: contagens (comparados, alterados, pioraram, melhoraram, novos, removidos...)
+        - alteracoes: DataFrame com os alunos que mudaram e o que mudou
+        - transicoes: DataFrame (situação antes, situação depois, quantidade)
+        - novos / removidos: DataFrames com alunos que só existem em uma das versões
+        """
+        chave = (versao_dados(dados_depois), 'comparacao', ('diff', versao_dados(dados_antes), tolerancia))
+        return cache_visoes.obter(
+            chave,
+            lambda: self._comparar_tabelas(
+                self.tabela_alunos(dados_antes), self.tabela_alunos(dados_depois), tolerancia
+            )
+        )
+
+    # ===== Tabela por versão =====
+
+    def _montar_tabela(self, dados_processados):
+        linhas = []
+        for nome_turma, dados_turma in dados_processados.get('turmas', {}).items():
+            for aluno in dados_turma['alunos']:
+                linha = {
+                    'turma': normalizar_turma(nome_turma),
+                    'aluno': normalizar_nome(aluno['nome']),
+                    'nome': aluno['nome'],
+                    'situacao_geral': aluno['situacao_geral'],
+                    'media_geral': aluno['media_geral'],
+                    'total_faltas': aluno['total_faltas'],
+                    'nota_Projeto': aluno['projeto']['nota'],
+                    'faltas_Projeto': aluno['projeto']['faltas']
+                }
+                for uc_nome, uc_dados in aluno['ucs'].items():
+                    linha[f'nota_{uc_nome}'] = uc_dados['nota']
+                    linha[f'faltas_{uc_nome}'] = uc_dados['faltas']
+                    linha[f'situacao_{uc_nome}'] = aluno['situacao_por_uc'].get(uc_nome)
+                linhas.append(linha)
+
+        tabela = pd.DataFrame(linhas)
+        if tabela.empty:
+            return tabela
+        # Alunos homônimos na mesma turma são alinhados pela ordem em que aparecem
+        tabela['ocorrencia'] = tabela.groupby(['turma', 'aluno']).cumcount()
+        tabela = tabela.set_index(['turma', 'aluno', 'ocorrencia'])
+        tabela.attrs['ucs'] = ucs_dos_alunos(
+            aluno for dados_turma in dados_processados['turmas'].values() for aluno in dados_turma['alunos']
+        ) + ['Projeto']
+        return tabela
+
+    # ===== Diferença =====
+
+    def _comparar_tabelas(self, antes, depois, tolerancia):
+        if antes.empty or depois.empty:
+            return self._resultado_vazio(antes, depois)
+
+        juntos = antes.join(depois, how='outer', lsuffix='_antes', rsuffix='_depois')
+        existe_antes = juntos['nome_antes'].notna()
+        existe_depois = juntos['nome_depois'].notna()
+        nas_duas = existe_antes & existe_depois
+
+        # Campos numéricos presentes nas duas versões
+        ucs = [uc for uc in antes.attrs.get('ucs', []) if uc in depois.attrs.get('ucs', [])]
+        campos = [(f'{tipo}_{uc}', f'{uc} {tipo}') for uc in ucs for tipo in ('nota', 'faltas')]
+
+        campos_alterados = pd.Series('', index=juntos.index)
+        mudou_nota = pd.Series(False, index=juntos.index)
+        mudou_falta = pd.Series(False, index=juntos.index)
+        for coluna, rotulo in campos:
+            valor_antes = juntos[f'{coluna}_antes'].astype(float)
+            valor_depois = juntos[f'{coluna}_depois'].astype(float)
+            mudou = nas_duas & ((valor_depois - valor_antes).abs() > tolerancia)
+            if coluna.startswith('nota_'):
+                mudou_nota |= mudou
+            else:
+                mudou_falta |= mudou
+            descricao = rotulo + ': ' + _formatar(valor_antes) + ' → ' + _formatar(valor_depois)
+            separador = np.where(campos_alterados != '', '; ', '')
+            campos_alterados = campos_alterados.where(~mudou, campos_alterados + separador + descricao)
+
+        gravidade_antes = juntos['situacao_geral_antes'].map(GRAVIDADE)
+        gravidade_depois = juntos['situacao_geral_depois'].map(GRAVIDADE)
+        mudou_situacao = nas_duas & (juntos['situacao_geral_antes'] != juntos['situacao_geral_depois'])
+        alterado = mudou_nota | mudou_falta | mudou_situacao
+
+        alteracoes = pd.DataFrame({
+            'turma': juntos.index.get_level_values('turma'),
+            'nome': juntos['nome_depois'].values,
+            'situacao_antes': juntos['situacao_geral_antes'].values,
+            'situacao_depois': juntos['situacao_geral_depois'].values,
+            'media_antes': juntos['media_geral_antes'].round(2).values,
+            'media_depois': juntos['media_geral_depois'].round(2).values,
+            'variacao_media': (juntos['media_geral_depois'] - juntos['media_geral_antes']).round(2).values,
+            'variacao_faltas': (juntos['total_faltas_depois'] - juntos['total_faltas_antes']).values,
+            'tendencia': np.select(
+                [gravidade_depois > gravidade_antes, gravidade_depois < gravidade_antes],
+                ['piorou', 'melhorou'], 'igual'
+            ),
+            'alteracoes': campos_alterados.values
+        })[alterado.values]
+        # Primeiro quem piorou (maior queda de média antes), depois quem melhorou
+        ordem = alteracoes['tendencia'].map({'piorou': 0, 'melhorou': 1, 'igual': 2})
+        alteracoes = alteracoes.assign(_ordem=ordem).sort_values(['_ordem', 'variacao_media']) \
+            .drop(columns='_ordem').reset_index(drop=True)
+
+        transicoes = (
+            juntos[mudou_situacao]
+            .groupby(['situacao_geral_antes', 'situacao_geral_depois'])
+            .size()
+            .rename('quantidade')
+            .reset_index()
+            .rename(columns={'situacao_geral_antes': 'de', 'situacao_geral_depois': 'para'})
+            .sort_values('quantidade', ascending=False)
+            .reset_index(drop=True)
+        )
+
+        novos = self._so_em_uma(juntos[~existe_antes], 'depois')
+        removidos = self._so_em_uma(juntos[~existe_depois], 'antes')
+
+        resumo = {
+            'alunos_comparados': int(nas_duas.sum()),
+            'alunos_alterados': int(alterado.sum()),
+            'notas_alteradas': int(mudou_nota.sum()),
+            'faltas_alteradas': int(mudou_falta.sum()),
+            'mudaram_situacao': int(mudou_situacao.sum()),
+            'pioraram': int((mudou_situacao & (gravidade_depois > gravidade_antes)).sum()),
+            'melhoraram': int((mudou_situacao & (gravidade_depois < gravidade_antes)).sum()),
+            'novos': len(novos),
+            'removidos': len(removidos)
+        }
+        return {
+            'resumo': resumo,
+            'alteracoes': alteracoes,
+            'transicoes': transicoes,
+            'novos': novos,
+            'removidos': removidos
+        }
+
+    def _so_em_uma(self, linhas, lado):
+        return pd.DataFrame({
+            'turma': linhas.index.get_level_values('turma'),
+            'nome': linhas[f'nome_{lado}'].values,
+            'situacao': linhas[f'situacao_geral_{lado}'].values,
+            'media': linhas[f'media_geral_{lado}'].round(2).values
+        })
+
+    def _resultado_vazio(self, antes, depois):
+        colunas_alteracoes = ['turma', 'nome', 'situacao_antes', 'situacao_depois', 'media_antes',
+                              'media_depois', 'variacao_media', 'variacao_faltas', 'tendencia', 'alteracoes']
+        colunas_uma = ['turma', 'nome', 'situacao', 'media']
+        return {
+            'resumo': {
+                'alunos_comparados': 0, 'alunos_alterados': 0, 'notas_alteradas': 0,
+                'faltas_alteradas': 0, 'mudaram_situacao': 0, 'pioraram': 0, 'melhoraram': 0,
+                'novos': len(depois), 'removidos': len(antes)
+            },
+            'alteracoes': pd.DataFrame(columns=colunas_alteracoes),
+            'transicoes': pd.DataFrame(columns=['de', 'para', 'quantidade']),
+            'novos': self._so_em_uma(depois.add_suffix('_depois'), 'depois') if not depois.empty
+            else pd.DataFrame(columns=colunas_uma),
+            'removidos': self._so_em_uma(antes.add_suffix('_antes'), 'antes') if not antes.empty
+            else pd.DataFrame(columns=colunas_uma)
+        }
+
+
+def _formatar(valores):
+    """
+    Valores numéricos como texto curto ("7", "6.5", "-" quando ausente)
+    """
+    texto = valores.round(2).astype(str).str.replace(r'\.0$', '', regex=True)
+    return texto.where(valores.notna(), '-')
+
+
+def conjunto_alteracoes_para_dict(resultado):
+    """
+    Conjunto de alterações em estruturas simples (listas/dicts), pronto para JSON
+    """
+    def registros(df):
+        return df.replace({np.nan: None}).to_dict(orient='records')
+
+    return {
+        'resumo': resultado['resumo'],
+        'alteracoes': registros(resultado['alteracoes']),
+        'transicoes': registros(resultado['transicoes']),
+        'novos': registros(resultado['novos']),
+        'removidos': registros(resultado['removidos'])
+    }
+
+
+comparador_global = ComparadorVersoes()
+
+
+def comparar_versoes(dados_antes, dados_depois):
+    """
+    Atalho para comparador_global.comparar
+    """
+    return comparador_global.comparar(dados_antes, dados_depois)
@@ -0,0 +1,206 @@
+# Módulo responsável pela gravação atômica e pelo travamento de arquivos da pasta de dados
+
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+TAMANHO_BLOCO = 1024 * 1024
+
+# mkstemp cria com 0600; o arquivo final deve ter as permissões de um open() comum
+_umask = None
+
+
+class TamanhoExcedidoError(ValueError):
+    """
+    O conteúdo passou do tamanho máximo permitido
+    """
+
+
+# flock protege entre processos; este lock protege entre threads do mesmo processo
+_locks_processo = {}
+_locks_processo_lock = threading.Lock()
+
+
+def _lock_do_processo(caminho):
+    chave = os.path.abspath(caminho)
+    with _locks_processo_lock:
+        return _locks_processo.setdefault(chave, threading.Lock())
+
+
+@contextmanager
+def trava_arquivo(caminho):
+    """
+    Trava exclusiva de escrita para um arquivo (entre threads e processos).
+
+    Só quem escreve usa a trava; leitores não esperam por ela, porque a troca
+    do arquivo é sempre atômica (ver gravar_atomico).
+    """
+    pasta, nome = os.path.split(os.path.abspath(caminho))
+    caminho_lock = os.path.join(pasta, f".{nome}.lock")
+
+    with _lock_do_processo(caminho):
+        os.makedirs(pasta, exist_ok=True)
+        with open(caminho_lock, 'a+b') as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def gravar_atomico(caminho_destino, escrever, antes_de_trocar=None):
+    """
+    Grava um arquivo sem nunca expor um conteúdo pela metade.
+
+    escrever(f) recebe um arquivo temporário na mesma pasta do destino; depois
+    de fsync ele substitui o destino com os.replace (rename atômico). Quem já
+    estava lendo o arquivo antigo continua lendo a versão antiga até fechar.
+    Se antes_de_trocar(resultado) for informado e devolver False, o temporário
+    é descartado e o destino fica intacto.
+    Retorna o valor devolvido por escrever(f).
+    """
+    pasta = os.path.dirname(os.path.abspath(caminho_destino))
+    os.makedirs(pasta, exist_ok=True)
+    _, extensao = os.path.splitext(caminho_destino)
+
+    fd, caminho_tmp = tempfile.mkstemp(dir=pasta, prefix='.tmp-', suffix=extensao)
+    try:
+        os.chmod(caminho_tmp, _permissoes_destino(caminho_destino))
+        with os.fdopen(fd, 'wb') as f:
+            resultado = escrever(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if antes_de_trocar is not None and antes_de_trocar(resultado) is False:
+            os.unlink(caminho_tmp)
+            return resultado
+        os.replace(caminho_tmp, caminho_destino)
+    except BaseException:
+        try:
+            os.unlink(caminho_tmp)
+        except OSError:
+            pass
+        raise
+
+    _sincronizar_pasta(pasta)
+    return resultado
+
+
+def _permissoes_destino(caminho_destino):
+    """
+    Mantém as permissões do arquivo substituído; arquivo novo segue a umask
+    """
+    try:
+        return stat.S_IMODE(os.stat(caminho_destino).st_mode)
+    except OSError:
+        return 0o666 & ~_umask_processo(os.path.dirname(os.path.abspath(caminho_destino)))
+
+
+def _umask_processo(pasta):
+    """
+    umask do processo sem alterá-la (os.umask() troca a umask de todas as threads).
+    Lida do /proc no Linux; nos outros sistemas, pelas permissões de um arquivo de teste.
+    """
+    global _umask
+    if _umask is not None:
+        return _umask
+    try:
+        with open('/proc/self/status') as f:
+            for linha in f:
+                if linha.startswith('Umask:'):
+                    _umask = int(linha.split()[1], 8)
+                    return _umask
+    except (OSError, ValueError):
+        pass
+    caminho_teste = os.path.join(pasta, f".umask-{os.getpid()}-{threading.get_ident()}")
+    try:
+        fd = os.open(caminho_teste, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        os.close(fd)
+        try:
+            _umask = 0o666 & ~stat.S_IMODE(os.stat(caminho_teste).st_mode)
+        finally:
+            os.remove(caminho_teste)
+    except OSError:
+        return 0o022
+    return _umask
+
+
+def copiar_em_blocos(origem, destino, tamanho_bloco=TAMANHO_BLOCO, tamanho_maximo=None):
+    """
+    Copia de um arquivo aberto para outro em blocos, calculando o SHA-256 junto.
+
+    A memória usada fica limitada a um bloco. Se tamanho_maximo for informado,
+    a cópia para com TamanhoExcedidoError assim que passar do limite.
+    Retorna {'bytes': total copiado, 'hash': sha256 em hexadecimal}.
+    """
+    h = hashlib.sha256()
+    total = 0
+    for bloco in iter(lambda: origem.read(tamanho_bloco), b''):
+        total += len(bloco)
+        if tamanho_maximo is not None and total > tamanho_maximo:
+            raise TamanhoExcedidoError(
+                f"arquivo maior que o limite de {tamanho_maximo} bytes"
+            )
+        h.update(bloco)
+        destino.write(bloco)
+    return {'bytes': total, 'hash': h.hexdigest()}
+
+
+def copiar_atomico(caminho_origem, caminho_destino, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Copia um arquivo (com data de modificação) usando gravar_atomico
+    """
+    def escrever(f_destino):
+        with open(caminho_origem, 'rb') as f_origem:
+            copiar_em_blocos(f_origem, f_destino, tamanho_bloco)
+
+    gravar_atomico(caminho_destino, escrever)
+    stat = os.stat(caminho_origem)
+    os.utime(caminho_destino, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+
+@contextmanager
+def abrir_snapshot(caminho):
+    """
+    Abre o arquivo fixando a versão atual (snapshot).
+
+    Como a troca é feita por rename, o descritor aberto continua apontando para
+    a versão lida mesmo que outro processo salve um arquivo novo no meio da
+    leitura. Retorna (arquivo, stat) onde stat identifica a versão lida.
+    """
+    with open(caminho, 'rb') as f:
+        yield f, os.fstat(f.fileno())
+
+
+def _sincronizar_pasta(pasta):
+    """
+    fsync da pasta para o rename sobreviver a uma queda de energia (POSIX)
+    """
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    try:
+        fd = os.open(pasta, os.O_RDONLY | os.O_DIRECTORY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,282 @@
+# Módulo responsável pela exportação em lote (CSV, XLSX e Parquet) dos dados processados
+
+import csv
+import importlib.util
+import io
+import os
+from itertools import islice
+
+from src.escrita_atomica import gravar_atomico
+from src.nucleo_analise import SITUACOES_RISCO, nome_turma_exibicao, ucs_dos_alunos
+
+TAMANHO_LOTE = 5000
+
+TIPOS_EXPORTACAO = {
+    'alunos': 'Todos os alunos',
+    'risco': 'Alunos em risco',
+    'turmas': 'Resumo por turma'
+}
+
+
+def formatos_disponiveis():
+    """
+    Formatos suportados neste ambiente (Parquet só com pyarrow instalado)
+    """
+    formatos = ['csv', 'xlsx']
+    if importlib.util.find_spec('pyarrow') is not None:
+        formatos.append('parquet')
+    return formatos
+
+
+def _pyarrow():
+    """
+    (pyarrow, pyarrow.parquet), importados só na primeira exportação Parquet
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # Parquet é opcional
+        raise RuntimeError("exportação Parquet requer o pacote pyarrow")
+    return pa, pq
+
+
+class FiltroExportacao:
+    """
+    Filtros aplicados antes de montar qualquer linha.
+
+    Bimestres e turmas descartam o dataset/turma inteiro sem olhar os alunos;
+    situações descartam o aluno antes de ele virar linha.
+    """
+
+    def __init__(self, bimestres=None, turmas=None, situacoes=None):
+        self.bimestres = set(bimestres) if bimestres else None
+        self.turmas = set(turmas) if turmas else None
+        self.situacoes = set(situacoes) if situacoes else None
+
+    def aceita_bimestre(self, codigo):
+        return self.bimestres is None or codigo in self.bimestres
+
+    def aceita_turma(self, nome_turma):
+        return self.turmas is None or nome_turma in self.turmas or \
+            nome_turma_exibicao(nome_turma) in self.turmas
+
+    def aceita_situacao(self, situacao):
+        return self.situacoes is None or situacao in self.situacoes
+
+    def com_situacoes(self, situacoes):
+        """
+        Cópia do filtro restrita às situações informadas (intersecção)
+        """
+        novas = set(situacoes) if self.situacoes is None else self.situacoes & set(situacoes)
+        filtro = FiltroExportacao(self.bimestres, self.turmas, None)
+        filtro.situacoes = novas
+        return filtro
+
+
+# ===== Linhas (geradores: nada é acumulado em memória) =====
+
+def _alunos(lista_dados):
+    for dados in lista_dados:
+        for dados_turma in dados.get('turmas', {}).values():
+            yield from dados_turma['alunos']
+
+
+def colunas(tipo, ucs):
+    """
+    Colunas de cada tipo de exportação
+    """
+    if tipo == 'turmas':
+        return ['bimestre', 'turma', 'total_alunos', 'media_turma', 'percentual_risco',
+                'alto_risco', 'risco_moderado', 'atencao', 'ok']
+
+    base = ['bimestre', 'turma', 'nome', 'situacao_geral', 'media_geral', 'total_faltas']
+    for uc in ucs:
+        base += [f'{uc} nota', f'{uc} faltas', f'{uc} situacao']
+    base += ['Projeto nota', 'Projeto faltas']
+    if tipo == 'risco':
+        base.append('ucs_em_risco')
+    return base
+
+
+def gerar_linhas(tipo, lista_dados, filtro=None, ucs=None):
+    """
+    Gera as linhas (tuplas na ordem de colunas(tipo, ucs)) de todos os datasets
+    """
+    filtro = filtro or FiltroExportacao()
+    if tipo == 'risco':
+        filtro = filtro.com_situacoes(SITUACOES_RISCO)
+    if ucs is None:
+        ucs = ucs_dos_alunos(_alunos(lista_dados))
+
+    for dados in lista_dados:
+        info = dados.get('info_bimestre', {})
+        bimestre = info.get('bimestre')
+        if not filtro.aceita_bimestre(bimestre):
+            continue
+
+        for nome_turma, dados_turma in dados.get('turmas', {}).items():
+            if not filtro.aceita_turma(nome_turma):
+                continue
+            turma = nome_turma_exibicao(nome_turma)
+
+            if tipo == 'turmas':
+                stats = dados_turma['estatisticas']
+                contadores = stats['contadores_situacao']
+                yield (bimestre, turma, stats['total_alunos'], stats['media_turma'],
+                       stats['percentual_risco'], contadores['ALTO_RISCO'],
+                       contadores['RISCO_MODERADO'], contadores['ATENCAO'], contadores['OK'])
+                continue
+
+            for aluno in dados_turma['alunos']:
+                if not filtro.aceita_situacao(aluno['situacao_geral']):
+                    continue
+                linha = [bimestre, turma, aluno['nome'], aluno['situacao_geral'],
+                         round(aluno['media_geral'], 2), aluno['total_faltas']]
+                for uc in ucs:
+                    uc_dados = aluno['ucs'].get(uc)
+                    if uc_dados is None:
+                        linha += [None, None, None]
+                    else:
+                        linha += [uc_dados['nota'], uc_dados['faltas'], aluno['situacao_por_uc'].get(uc)]
+                linha += [aluno['projeto']['nota'], aluno['projeto']['faltas']]
+                if tipo == 'risco':
+                    linha.append(', '.join(
+                        uc for uc, situacao in aluno['situacao_por_uc'].items() if situacao in SITUACOES_RISCO
+                    ))
+                yield tuple(linha)
+
+
+def _em_lotes(linhas, tamanho_lote):
+    linhas = iter(linhas)
+    while True:
+        lote = list(islice(linhas, tamanho_lote))
+        if not lote:
+            return
+        yield lote
+
+
+# ===== Escritores =====
+
+def escrever_csv(f, nomes_colunas, linhas):
+    """
+    CSV em UTF-8 com BOM (abre direto no Excel), linha a linha
+    """
+    texto = io.TextIOWrapper(f, encoding='utf-8-sig', newline='')
+    escritor = csv.writer(texto, delimiter=';')
+    escritor.writerow(nomes_colunas)
+    total = 0
+    for linha in linhas:
+        escritor.writerow(linha)
+        total += 1
+    texto.flush()
+    texto.detach()
+    return total
+
+
+def escrever_xlsx(f, planilhas):
+    """
+    XLSX com openpyxl em modo write-only (linhas vão direto para o arquivo).
+    planilhas: lista de (nome_planilha, nomes_colunas, linhas)
+    """
+    from openpyxl import Workbook  # só quem exporta XLSX paga a importação
+
+    wb = Workbook(write_only=True)
+    totais = {}
+    for nome_planilha, nomes_colunas, linhas in planilhas:
+        ws = wb.create_sheet(title=nome_planilha[:31])
+        ws.append(nomes_colunas)
+        total = 0
+        for linha in linhas:
+            ws.append(linha)
+            total += 1
+        totais[nome_planilha] = total
+    wb.save(f)
+    return totais
+
+
+def escrever_parquet(f, nomes_colunas, linhas, tamanho_lote=TAMANHO_LOTE):
+    """
+    Parquet com um row group por lote (memória limitada ao lote)
+    """
+    pa, pq = _pyarrow()
+
+    schema = pa.schema([(nome, _tipo_parquet(pa, nome)) for nome in nomes_colunas])
+    total = 0
+    with pq.ParquetWriter(f, schema) as escritor:
+        for lote in _em_lotes(linhas, tamanho_lote):
+            escritor.write_table(pa.Table.from_pylist(
+                [dict(zip(nomes_colunas, linha)) for linha in lote], schema=schema
+            ))
+            total += len(lote)
+    return total
+
+
+def _tipo_parquet(pa, nome_coluna):
+    if nome_coluna in ('bimestre', 'turma', 'nome', 'situacao_geral', 'ucs_em_risco') \
+            or nome_coluna.endswith(' situacao'):
+        return pa.string()
+    if nome_coluna in ('total_alunos', 'alto_risco', 'risco_moderado', 'atencao', 'ok'):
+        return pa.int64()
+    return pa.float64()
+
+
+# ===== Exportação =====
+
+def escrever_exportacao(f, tipo, lista_dados, formato, filtro=None):
+    """
+    Escreve um tipo (alunos, risco ou turmas) de vários datasets em um arquivo
+    binário já aberto. Retorna o número de linhas exportadas.
+    """
+    ucs = ucs_dos_alunos(_alunos(lista_dados))
+    nomes_colunas = colunas(tipo, ucs)
+    linhas = gerar_linhas(tipo, lista_dados, filtro, ucs)
+
+    if formato == 'csv':
+        return escrever_csv(f, nomes_colunas, linhas)
+    if formato == 'xlsx':
+        return sum(escrever_xlsx(f, [(TIPOS_EXPORTACAO[tipo], nomes_colunas, linhas)]).values())
+    if formato == 'parquet':
+        return escrever_parquet(f, nomes_colunas, linhas)
+    raise ValueError(f"formato de exportação desconhecido: {formato}")
+
+
+def exportar(tipo, lista_dados, caminho_destino, formato=None, filtro=None):
+    """
+    Exporta um tipo de vários datasets para um arquivo (gravação atômica).
+    O formato sai da extensão se não for informado. Retorna o número de linhas.
+    """
+    formato = formato or os.path.splitext(caminho_destino)[1].lstrip('.').lower()
+    if formato not in ('csv', 'xlsx', 'parquet'):
+        raise ValueError(f"formato de exportação desconhecido: {formato}")
+    return gravar_atomico(
+        caminho_destino, lambda f: escrever_exportacao(f, tipo, lista_dados, formato, filtro)
+    )
+
+
+def exportar_tudo(lista_dados, pasta_destino, formatos=None, filtro=None, prefixo='notas'):
+    """
+    Exporta alunos, alunos em risco e resumo por turma de todos os datasets de uma vez.
+
+    CSV e Parquet geram um arquivo por tipo; XLSX gera uma pasta de trabalho
+    com uma planilha por tipo. Retorna {caminho: linhas exportadas}.
+    """
+    formatos = formatos or formatos_disponiveis()
+    os.makedirs(pasta_destino, exist_ok=True)
+    ucs = ucs_dos_alunos(_alunos(lista_dados))
+    resultado = {}
+
+    for formato in formatos:
+        if formato == 'xlsx':
+            caminho = os.path.join(pasta_destino, f"{prefixo}.xlsx")
+            planilhas = [
+                (TIPOS_EXPORTACAO[tipo], colunas(tipo, ucs), gerar_linhas(tipo, lista_dados, filtro, ucs))
+                for tipo in TIPOS_EXPORTACAO
+            ]
+            totais = gravar_atomico(caminho, lambda f: escrever_xlsx(f, planilhas))
+            resultado[caminho] = sum(totais.values())
+            continue
+
+        for tipo in TIPOS_EXPORTACAO:
+            caminho = os.path.join(pasta_destino, f"{prefixo}_{tipo}.{formato}")
+            resultado[caminho] = exportar(tipo, lista_dados, caminho, formato, filtro)
+    return resultado
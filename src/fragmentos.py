@@ -0,0 +1,29 @@
+# Módulo responsável por isolar partes da página em fragmentos do Streamlit
+
+import streamlit as st
+
+
+def fragmento(funcao):
+    """
+    Decorador: transforma a função em um fragmento reexecutável sozinho.
+
+    Um widget dentro do fragmento só reexecuta o próprio fragmento, e não o
+    app inteiro (CSS, sidebar, validação do arquivo e todos os gráficos).
+    Em versões do Streamlit sem fragmentos a função roda normalmente.
+    """
+    decorador = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    if decorador is None:
+        return funcao
+    return decorador(funcao)
+
+
+def fragmento_periodico(intervalo_segundos):
+    """
+    Decorador: fragmento que também se reexecuta sozinho a cada intervalo_segundos
+    (para acompanhar algo que roda em segundo plano).
+    Em versões do Streamlit sem fragmentos a função roda uma vez por rerun.
+    """
+    decorador = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    if decorador is None:
+        return lambda funcao: funcao
+    return decorador(run_every=intervalo_segundos)
@@ -0,0 +1,274 @@
+# Módulo responsável pela instrumentação (tempos por fase e contadores) das execuções recentes
+#
+#   from src.instrumentacao import medir, contar
+#
+#   with medir('ler_planilha', turma_nome):
+#       df = excel_file.parse(turma_nome)
+#   contar('cache_disco.acerto')
+#
+# Um medir() sem outro aberto na mesma thread inicia uma "execução" (um rerun
+# da página, um trabalho da fila, uma requisição da API); os medir() dentro
+# dele viram trechos filhos. Execuções terminadas ficam num buffer circular
+# com as mais recentes, mostrado nas informações de debug da página de
+# Configurações. Desligar com EDURADAR_INSTRUMENTACAO=0.
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+MAX_EXECUCOES = 100
+
+
+class Trecho:
+    """
+    Uma fase medida: nome, detalhe (turma, página...), início relativo à execução e duração
+    """
+
+    __slots__ = ('nome', 'detalhe', 'inicio', 'duracao', 'filhos', 'erro')
+
+    def __init__(self, nome, detalhe, inicio):
+        self.nome = nome
+        self.detalhe = detalhe
+        self.inicio = inicio
+        self.duracao = None
+        self.filhos = []
+        self.erro = None
+
+    def percorrer(self, profundidade=0):
+        """
+        (profundidade, trecho) deste trecho e de todos os filhos, em ordem
+        """
+        yield profundidade, self
+        for filho in self.filhos:
+            yield from filho.percorrer(profundidade + 1)
+
+
+class Execucao:
+    """
+    Árvore de trechos de uma execução, com os contadores incrementados durante ela
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, raiz, thread, origem):
+        self.id = next(self._ids)
+        self.raiz = raiz
+        self.thread = thread
+        self.iniciada_em = datetime.now()
+        self.contadores = {}
+        self._origem = origem
+
+    @property
+    def duracao_ms(self):
+        return round((self.raiz.duracao or 0) * 1000, 3)
+
+    def resumo(self):
+        """
+        Uma linha para a tabela de execuções recentes
+        """
+        return {
+            'id': self.id,
+            'execucao': self.raiz.nome if self.raiz.detalhe is None else f"{self.raiz.nome}: {self.raiz.detalhe}",
+            'iniciada_em': self.iniciada_em.strftime('%H:%M:%S'),
+            'duracao_ms': self.duracao_ms,
+            'thread': self.thread,
+            'erro': self.raiz.erro,
+            'contadores': ', '.join(f"{nome}={valor}" for nome, valor in sorted(self.contadores.items()))
+        }
+
+    def blocos(self):
+        """
+        Trechos achatados para o gráfico em chama (início e duração em ms)
+        """
+        return [
+            {
+                'nome': trecho.nome,
+                'detalhe': trecho.detalhe,
+                'profundidade': profundidade,
+                'inicio_ms': round(trecho.inicio * 1000, 3),
+                'duracao_ms': round((trecho.duracao or 0) * 1000, 3),
+                'erro': trecho.erro
+            }
+            for profundidade, trecho in self.raiz.percorrer()
+        ]
+
+
+class _Medicao:
+    """
+    Context manager devolvido por Instrumentacao.medir (classe simples: é chamado a cada planilha/turma)
+    """
+
+    __slots__ = ('instrumentacao', 'nome', 'detalhe', 'trecho', 'execucao', 'inicio')
+
+    def __init__(self, instrumentacao, nome, detalhe):
+        self.instrumentacao = instrumentacao
+        self.nome = nome
+        self.detalhe = detalhe
+        self.trecho = None
+        self.execucao = None
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        self.trecho, self.execucao = self.instrumentacao._abrir(self.nome, self.detalhe, self.inicio)
+        return self.trecho
+
+    def __exit__(self, tipo_erro, erro, tb):
+        self.trecho.duracao = time.perf_counter() - self.inicio
+        if tipo_erro is not None:
+            self.trecho.erro = tipo_erro.__name__
+        self.instrumentacao._fechar(self.trecho, self.execucao)
+        return False
+
+
+class _SemMedicao:
+    """
+    Context manager vazio (instrumentação desligada)
+    """
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, tipo_erro, erro, tb):
+        return False
+
+
+_SEM_MEDICAO = _SemMedicao()
+
+
+class Instrumentacao:
+    """
+    Coleta de tempos por fase e contadores, por thread, com as últimas execuções em memória.
+
+    Cada thread (sessão do Streamlit, worker da fila, requisição da API) monta
+    a sua árvore sem travas; o lock só é usado ao guardar a execução terminada.
+    """
+
+    def __init__(self, max_execucoes=MAX_EXECUCOES, ativa=True):
+        self.ativa = ativa
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._execucoes = deque(maxlen=max_execucoes)
+        self._contadores_totais = {}
+
+    def medir(self, nome, detalhe=None):
+        """
+        with medir('fase', detalhe): ... (trecho filho do medir() aberto, ou nova execução)
+        """
+        if not self.ativa:
+            return _SEM_MEDICAO
+        return _Medicao(self, nome, detalhe)
+
+    def contar(self, nome, quantidade=1):
+        """
+        Incrementa um contador na execução atual e no total do processo
+        """
+        if not self.ativa:
+            return
+        pilha = getattr(self._local, 'pilha', None)
+        if pilha:
+            contadores = self._local.execucao.contadores
+            contadores[nome] = contadores.get(nome, 0) + quantidade
+        with self._lock:
+            self._contadores_totais[nome] = self._contadores_totais.get(nome, 0) + quantidade
+
+    def _abrir(self, nome, detalhe, agora):
+        pilha = getattr(self._local, 'pilha', None)
+        if not pilha:
+            trecho = Trecho(nome, detalhe, 0.0)
+            execucao = Execucao(trecho, threading.current_thread().name, agora)
+            self._local.pilha = [trecho]
+            self._local.execucao = execucao
+            return trecho, execucao
+
+        execucao = self._local.execucao
+        trecho = Trecho(nome, detalhe, agora - execucao._origem)
+        pilha[-1].filhos.append(trecho)
+        pilha.append(trecho)
+        return trecho, execucao
+
+    def _fechar(self, trecho, execucao):
+        pilha = self._local.pilha
+        # Sai até o trecho fechado (um filho que não fechou não prende os seguintes)
+        while pilha and pilha[-1] is not trecho:
+            pilha.pop()
+        if pilha:
+            pilha.pop()
+        if not pilha:
+            self._local.execucao = None
+            with self._lock:
+                self._execucoes.append(execucao)
+
+    def execucoes(self):
+        """
+        Execuções guardadas, da mais recente para a mais antiga
+        """
+        with self._lock:
+            return list(reversed(self._execucoes))
+
+    def obter(self, id_execucao):
+        with self._lock:
+            for execucao in self._execucoes:
+                if execucao.id == id_execucao:
+                    return execucao
+        return None
+
+    def contadores(self):
+        with self._lock:
+            return dict(self._contadores_totais)
+
+    def resumo_fases(self):
+        """
+        Por fase (nome do trecho): chamadas, tempo total, médio e máximo nas execuções guardadas
+        """
+        fases = {}
+        for execucao in self.execucoes():
+            for _, trecho in execucao.raiz.percorrer():
+                if trecho.duracao is None:
+                    continue
+                fase = fases.setdefault(trecho.nome, {'chamadas': 0, 'total': 0.0, 'maximo': 0.0, 'erros': 0})
+                fase['chamadas'] += 1
+                fase['total'] += trecho.duracao
+                fase['maximo'] = max(fase['maximo'], trecho.duracao)
+                if trecho.erro:
+                    fase['erros'] += 1
+
+        linhas = [
+            {
+                'fase': nome,
+                'chamadas': fase['chamadas'],
+                'total_ms': round(fase['total'] * 1000, 1),
+                'media_ms': round(fase['total'] * 1000 / fase['chamadas'], 2),
+                'maximo_ms': round(fase['maximo'] * 1000, 1),
+                'erros': fase['erros']
+            }
+            for nome, fase in fases.items()
+        ]
+        linhas.sort(key=lambda linha: linha['total_ms'], reverse=True)
+        return linhas
+
+    def limpar(self):
+        with self._lock:
+            self._execucoes.clear()
+            self._contadores_totais.clear()
+
+
+instrumentacao_global = Instrumentacao(
+    ativa=os.environ.get('EDURADAR_INSTRUMENTACAO', '1').lower() not in ('0', 'false', 'nao', 'não')
+)
+
+
+def medir(nome, detalhe=None):
+    """
+    Atalho para instrumentacao_global.medir
+    """
+    return instrumentacao_global.medir(nome, detalhe)
+
+
+def contar(nome, quantidade=1):
+    """
+    Atalho para instrumentacao_global.contar
+    """
+    instrumentacao_global.contar(nome, quantidade)
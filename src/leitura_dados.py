@@ -1,8 +1,14 @@
 # Arquivo responsável por ler os dados do Excel
 import pandas as pd
 import os
+import hashlib
 from datetime import datetime
 
+from src.escrita_atomica import abrir_snapshot
+from src.instrumentacao import medir, contar
+from src.mapeamento_colunas import mapa_posicional, obter_mapa_colunas
+from src.perfil_memoria import medir_memoria
+
 class LeitorDadosExcel:
     def __init__(self):
         self.formatos_suportados = {
@@ -37,42 +43,75 @@ class LeitorDadosExcel:
         Detecta automaticamente qual bimestre está no arquivo
         """
         try:
-            excel_file = pd.ExcelFile(caminho_arquivo)
-            sheet_names = excel_file.sheet_names
-            
-            for bimestre, config in self.formatos_suportados.items():
-                turmas_encontradas = 0
-                for turma in config['turmas']:
-                    if turma in sheet_names:
-                        turmas_encontradas += 1
-                
-                if turmas_encontradas > 0:
-                    return {
-                        'bimestre': bimestre,
-                        'descricao': config['descricao'],
-                        'turmas_encontradas': turmas_encontradas,
-                        'total_turmas': len(config['turmas']),
-                        'formato': config
-                    }
+            with medir('detectar', os.path.basename(caminho_arquivo)):
+                excel_file = pd.ExcelFile(caminho_arquivo)
+                return self._detectar_por_planilhas(excel_file.sheet_names)
             
+        except Exception as e:
             return {
-                'bimestre': 'desconhecido',
-                'descricao': 'Formato não reconhecido',
+                'bimestre': 'erro',
+                'descricao': f'Erro ao detectar formato: {str(e)}',
                 'turmas_encontradas': 0,
                 'total_turmas': 0
             }
+    
+    def _detectar_por_planilhas(self, sheet_names):
+        """
+        Detecta o bimestre a partir dos nomes das planilhas
+        """
+        for bimestre, config in self.formatos_suportados.items():
+            turmas_encontradas = 0
+            for turma in config['turmas']:
+                if turma in sheet_names:
+                    turmas_encontradas += 1
             
+            if turmas_encontradas > 0:
+                return {
+                    'bimestre': bimestre,
+                    'descricao': config['descricao'],
+                    'turmas_encontradas': turmas_encontradas,
+                    'total_turmas': len(config['turmas']),
+                    'formato': config
+                }
+        
+        return {
+            'bimestre': 'desconhecido',
+            'descricao': 'Formato não reconhecido',
+            'turmas_encontradas': 0,
+            'total_turmas': 0
+        }
+    
+    def carregar_dados_bimestre(self, caminho_arquivo, bimestre_especifico=None):
+        """
+        Carrega dados de um bimestre específico ou detecta automaticamente
+        """
+        # Todas as planilhas são lidas do mesmo descritor: se outro processo salvar
+        # um arquivo novo durante a leitura, continuamos na versão aberta
+        try:
+            with medir('carregar_planilhas', os.path.basename(caminho_arquivo)), \
+                    abrir_snapshot(caminho_arquivo) as (arquivo, stat):
+                with medir('abrir_arquivo'):
+                    excel_file = pd.ExcelFile(arquivo)
+                dados_turmas, info_bimestre = self._carregar_planilhas(
+                    excel_file, bimestre_especifico
+                )
         except Exception as e:
-            return {
+            return None, {
                 'bimestre': 'erro',
                 'descricao': f'Erro ao detectar formato: {str(e)}',
                 'turmas_encontradas': 0,
                 'total_turmas': 0
             }
+        
+        if dados_turmas is not None:
+            info_bimestre['versao_arquivo'] = calcular_versao_arquivo(
+                caminho_arquivo, bimestre_especifico, stat
+            )
+        return dados_turmas, info_bimestre
     
-    def carregar_dados_bimestre(self, caminho_arquivo, bimestre_especifico=None):
+    def _carregar_planilhas(self, excel_file, bimestre_especifico):
         """
-        Carrega dados de um bimestre específico ou detecta automaticamente
+        Lê as planilhas das turmas de um arquivo já aberto
         """
         if bimestre_especifico and bimestre_especifico in self.formatos_suportados:
             formato_usar = self.formatos_suportados[bimestre_especifico]
@@ -82,7 +121,7 @@ class LeitorDadosExcel:
                 'formato': formato_usar
             }
         else:
-            info_bimestre = self.detectar_bimestre_arquivo(caminho_arquivo)
+            info_bimestre = self._detectar_por_planilhas(excel_file.sheet_names)
             if info_bimestre['bimestre'] in ['desconhecido', 'erro']:
                 return None, info_bimestre
         
@@ -93,7 +132,8 @@ class LeitorDadosExcel:
         
         for turma_nome in info_bimestre['formato']['turmas']:
             try:
-                df = pd.read_excel(caminho_arquivo, sheet_name=turma_nome)
+                with medir('ler_planilha', turma_nome):
+                    df = excel_file.parse(turma_nome)
                 
                 # Normalizar nome da turma (remover sufixos para manter consistência)
                 nome_base = turma_nome.replace(' - IA', '').replace(' - 4º Bim', '')
@@ -116,40 +156,39 @@ class LeitorDadosExcel:
         
         return dados_turmas, info_bimestre
     
-    def processar_aluno_por_uc(self, linha_aluno):
+    def processar_aluno_por_uc(self, linha_aluno, mapa=None):
         """
         Processa dados de um aluno separando por UC (matéria)
-        ESTRUTURA CORRIGIDA: Número | Nome | Nota_UCP1 | Faltas_UCP1 | Nota_UCP2 | Faltas_UCP2 | Nota_UCP3 | Faltas_UCP3
+        As colunas vêm do mapa de colunas da planilha; sem mapa, valem as posições fixas:
+        Número | Nome | Nota_UCP1 | Faltas_UCP1 | Nota_UCP2 | Faltas_UCP2 | Nota_UCP3 | Faltas_UCP3
+        """
+        if mapa is None:
+            mapa = mapa_posicional(len(linha_aluno))
+        valores = linha_aluno.tolist()
+
+        def valor(posicao):
+            return self._extrair_valor_numerico(valores[posicao]) if posicao is not None else 0
+
+        return self._montar_aluno(
+            valores[mapa['nome']],
+            {uc: (valor(nota), valor(faltas)) for uc, nota, faltas in mapa['ucs']},
+            tuple(valor(posicao) for posicao in mapa['projeto'])
+        )
+
+    def _montar_aluno(self, nome_aluno, valores_ucs, valores_projeto):
+        """
+        Dados de um aluno (situação por UC, média, faltas e situação geral) a partir dos valores já extraídos
+        valores_ucs: {uc: (nota, faltas)}; valores_projeto: (nota, faltas)
         """
-        # A primeira coluna é o número, segunda é o nome
-        nome_aluno = linha_aluno.iloc[1]  # CORRIGIDO: Nome está na posição 1
-        
         if pd.isna(nome_aluno) or nome_aluno == "":
             return None
         
         print(f"Processando: {nome_aluno}")
         
-        # ESTRUTURA CORRIGIDA: Número | Nome | UCP1_Nota | UCP1_Faltas | UCP2_Nota | UCP2_Faltas | UCP3_Nota | UCP3_Faltas
         dados_aluno = {
             'nome': str(nome_aluno).strip(),
-            'ucs': {
-                'UCP 1': {
-                    'nota': self._extrair_valor_numerico(linha_aluno.iloc[2]),      # Posição 2: Nota UCP1
-                    'faltas': self._extrair_valor_numerico(linha_aluno.iloc[3])     # Posição 3: Faltas UCP1
-                },
-                'UCP 2': {
-                    'nota': self._extrair_valor_numerico(linha_aluno.iloc[4]) if len(linha_aluno) > 4 else 0,    # Posição 4: Nota UCP2
-                    'faltas': self._extrair_valor_numerico(linha_aluno.iloc[5]) if len(linha_aluno) > 5 else 0   # Posição 5: Faltas UCP2
-                },
-                'UCP 3': {
-                    'nota': self._extrair_valor_numerico(linha_aluno.iloc[6]) if len(linha_aluno) > 6 else 0,    # Posição 6: Nota UCP3
-                    'faltas': self._extrair_valor_numerico(linha_aluno.iloc[7]) if len(linha_aluno) > 7 else 0   # Posição 7: Faltas UCP3
-                }
-            },
-            'projeto': {
-                'nota': self._extrair_valor_numerico(linha_aluno.iloc[8]) if len(linha_aluno) > 8 else 0,       # Posição 8: Projeto
-                'faltas': self._extrair_valor_numerico(linha_aluno.iloc[9]) if len(linha_aluno) > 9 else 0      # Posição 9: Faltas Projeto
-            }
+            'ucs': {uc: {'nota': nota, 'faltas': faltas} for uc, (nota, faltas) in valores_ucs.items()},
+            'projeto': {'nota': valores_projeto[0], 'faltas': valores_projeto[1]}
         }
         
         # Mostrar dados extraídos para verificação
@@ -231,16 +270,33 @@ class LeitorDadosExcel:
         print(f"Processando turma: {nome_turma}")
         print(f"Total de linhas na planilha: {len(df_turma)}")
         
-        # Começar da linha 3 (índice 2) - pular cabeçalhos
-        for index in range(2, len(df_turma)):
-            linha = df_turma.iloc[index]
-            aluno_dados = self.processar_aluno_por_uc(linha)
-            
-            if aluno_dados:
-                aluno_dados['turma'] = nome_turma
-                aluno_dados['bimestre'] = info_bimestre['bimestre']
-                alunos_processados.append(aluno_dados)
+        with medir('processar_turma', nome_turma):
+            mapa = obter_mapa_colunas(df_turma)
+            # Uma coluna inteira por vez, em vez de montar uma Series para cada linha
+            dados = df_turma.iloc[mapa['inicio_dados']:]
+
+            def coluna(posicao):
+                if posicao is None:
+                    return [0] * len(dados)
+                return [self._extrair_valor_numerico(v) for v in dados.iloc[:, posicao].tolist()]
+
+            nomes = dados.iloc[:, mapa['nome']].tolist()
+            colunas_ucs = {uc: (coluna(nota), coluna(faltas)) for uc, nota, faltas in mapa['ucs']}
+            notas_projeto, faltas_projeto = (coluna(posicao) for posicao in mapa['projeto'])
+
+            for i, nome_aluno in enumerate(nomes):
+                aluno_dados = self._montar_aluno(
+                    nome_aluno,
+                    {uc: (notas[i], faltas[i]) for uc, (notas, faltas) in colunas_ucs.items()},
+                    (notas_projeto[i], faltas_projeto[i])
+                )
+                
+                if aluno_dados:
+                    aluno_dados['turma'] = nome_turma
+                    aluno_dados['bimestre'] = info_bimestre['bimestre']
+                    alunos_processados.append(aluno_dados)
         
+        contar('alunos_processados', len(alunos_processados))
         print(f"{nome_turma}: {len(alunos_processados)} alunos processados")
         return alunos_processados
     
@@ -250,13 +306,34 @@ class LeitorDadosExcel:
         """
         print("Iniciando processamento completo dos dados...")
         
-        dados_brutos, info_bimestre = self.carregar_dados_bimestre(caminho_arquivo, bimestre_especifico)
-        
-        if not dados_brutos:
-            return None, info_bimestre
+        nome_arquivo = os.path.basename(caminho_arquivo)
+        with medir('obter_dados_completos', nome_arquivo), medir_memoria('obter_dados_completos', nome_arquivo):
+            dados_brutos, info_bimestre = self.carregar_dados_bimestre(caminho_arquivo, bimestre_especifico)
+            
+            if not dados_brutos:
+                return None, info_bimestre
+            
+            # Processar cada turma
+            alunos_por_turma = {
+                nome_turma: self.processar_turma_completa(dados_turma['dataframe'], nome_turma, info_bimestre)
+                for nome_turma, dados_turma in dados_brutos.items()
+            }
+            
+            versao = info_bimestre.get('versao_arquivo') or calcular_versao_arquivo(caminho_arquivo, bimestre_especifico)
+            with medir('agregar'):
+                dados_processados = self.agregar_turmas(alunos_por_turma, info_bimestre, versao)
         
+        print("Processamento completo concluído!")
+        return dados_processados, info_bimestre
+    
+    def agregar_turmas(self, alunos_por_turma, info_bimestre, versao):
+        """
+        Monta os dados processados (estatísticas por turma e resumo geral)
+        a partir dos alunos já classificados de cada turma
+        """
         dados_processados = {
             'info_bimestre': info_bimestre,
+            'versao': versao,
             'turmas': {},
             'resumo_geral': {
                 'total_alunos': 0,
@@ -268,14 +345,7 @@ class LeitorDadosExcel:
             }
         }
         
-        # Processar cada turma
-        for nome_turma, dados_turma in dados_brutos.items():
-            alunos = self.processar_turma_completa(
-                dados_turma['dataframe'], 
-                nome_turma, 
-                info_bimestre
-            )
-            
+        for nome_turma, alunos in alunos_por_turma.items():
             # Calcular estatísticas da turma
             total_alunos = len(alunos)
             if total_alunos > 0:
@@ -311,8 +381,19 @@ class LeitorDadosExcel:
                 
                 print(f"Estatísticas {nome_turma}: Média={media_turma:.1f}, Risco={percentual_risco:.1f}%")
         
-        print("Processamento completo concluído!")
-        return dados_processados, info_bimestre
+        return dados_processados
+
+def calcular_versao_arquivo(caminho_arquivo, bimestre=None, stat=None):
+    """
+    Identificador da versão dos dados (arquivo + tamanho + data de modificação + bimestre pedido)
+    """
+    try:
+        if stat is None:
+            stat = os.stat(caminho_arquivo)
+        base = f"{os.path.abspath(caminho_arquivo)}|{stat.st_size}|{stat.st_mtime_ns}|{bimestre}"
+    except (OSError, TypeError):
+        base = f"{caminho_arquivo}|{datetime.now().isoformat()}|{bimestre}"
+    return hashlib.sha1(base.encode('utf-8')).hexdigest()[:16]
 
 # Funções auxiliares para compatibilidade com código existente
 def carregar_dados_excel(caminho_arquivo):
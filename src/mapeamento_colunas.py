@@ -0,0 +1,185 @@
+# Módulo responsável por descobrir, pelo cabeçalho, em que coluna está cada dado da planilha de uma turma
+#
+#   from src.mapeamento_colunas import obter_mapa_colunas
+#
+#   mapa = obter_mapa_colunas(df_turma)
+#   mapa['nome']         -> posição da coluna ALUNO
+#   mapa['ucs']          -> [('UCP 1', col_nota, col_faltas), ...] (quantas UCs houver)
+#   mapa['projeto']      -> (col_nota, col_faltas) do projeto (ICT, DL, EP...)
+#   mapa['inicio_dados'] -> primeira linha de alunos
+#
+# Uma coluna a mais (ou uma UC a mais) na planilha não desloca mais os valores.
+# Cabeçalho em duas linhas (nomes das UCs em cima, NOTA/FALTAS embaixo) também
+# é reconhecido.
+# Se o cabeçalho não for reconhecido, cai nas posições fixas de sempre
+# (Número | Nome | UCP1 | Faltas | UCP2 | Faltas | UCP3 | Faltas | ICT | Faltas).
+
+import hashlib
+import re
+import threading
+import unicodedata
+
+import pandas as pd
+
+# O cabeçalho fica nas primeiras linhas (título, bimestre, cabeçalho)
+LINHAS_PROCURA_CABECALHO = 6
+MAX_MAPAS_GUARDADOS = 64
+
+# UCs que sempre aparecem nos dados do aluno (valor 0 se a planilha não tiver a coluna)
+UCS_PADRAO = ('UCP 1', 'UCP 2', 'UCP 3')
+
+_PADRAO_NOME = re.compile(r'^(ALUNO|ALUNA|NOME|ESTUDANTE)')
+_PADRAO_UC = re.compile(r'^(UCP|UC)\s*(\d+)$')
+_PADRAO_FALTAS = re.compile(r'^FALTAS?\b')
+
+_mapas = {}
+_lock = threading.Lock()
+
+
+def _normalizar(valor):
+    """
+    Texto da célula em maiúsculas, sem acentos e sem espaços nas pontas ('' para vazio)
+    """
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)):
+        return ''
+    texto = unicodedata.normalize('NFKD', str(valor).strip().upper())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def mapa_posicional(total_colunas):
+    """
+    Mapa das posições fixas (formato original da planilha), só com as colunas que existem
+    """
+    def coluna(posicao):
+        return posicao if posicao < total_colunas else None
+
+    return {
+        'linha_cabecalho': None,
+        'inicio_dados': 2,
+        'nome': 1,
+        'ucs': [(uc, coluna(2 + 2 * i), coluna(3 + 2 * i)) for i, uc in enumerate(UCS_PADRAO)],
+        'projeto': (coluna(8), coluna(9)),
+        'inferido': False
+    }
+
+
+def _linhas_candidatas(df):
+    """
+    (índice da linha de dados, células normalizadas); o índice -1 é a linha de títulos do pandas
+    """
+    yield -1, [_normalizar(c) for c in df.columns]
+    for indice in range(min(LINHAS_PROCURA_CABECALHO, len(df))):
+        yield indice, [_normalizar(c) for c in df.iloc[indice].tolist()]
+
+
+def _localizar_cabecalho(df):
+    """
+    (índice, células, linhas do cabeçalho) da primeira linha com a coluna do aluno e
+    pelo menos uma UC; None se não houver.
+
+    Se a linha não tem nenhuma coluna FALTAS e a de baixo tem (cabeçalho em duas
+    linhas: UCs em cima, NOTA/FALTAS embaixo), as duas são juntas coluna a coluna.
+    """
+    candidatas = list(_linhas_candidatas(df))
+    for i, (indice, celulas) in enumerate(candidatas):
+        if any(_PADRAO_NOME.match(c) for c in celulas) and any(_PADRAO_UC.match(c) for c in celulas):
+            abaixo = candidatas[i + 1][1] if i + 1 < len(candidatas) else []
+            if not any(_PADRAO_FALTAS.match(c) for c in celulas) and any(_PADRAO_FALTAS.match(c) for c in abaixo):
+                return indice, [c or c_abaixo for c, c_abaixo in zip(celulas, abaixo)], 2
+            return indice, celulas, 1
+    return None
+
+
+def _resolver_mapa(indice, celulas, linhas_cabecalho=1):
+    """
+    Mapa de colunas a partir das células da linha de cabeçalho.
+
+    UC1, UC 1 e UCP1 viram todas "UCP n". Uma coluna FALTAS vale para a nota
+    logo antes dela. O projeto (ICT, DL, EP... muda com o curso) é a primeira
+    outra coluna com título depois da última UC e seguida de FALTAS: colunas
+    como MÉDIA no meio das UCs não são confundidas com ele.
+    """
+    nome = next((posicao for posicao, celula in enumerate(celulas) if _PADRAO_NOME.match(celula)), None)
+    ucs = {}
+    ultima_nota = None  # UC da coluna logo antes desta
+
+    for posicao, celula in enumerate(celulas):
+        uc = _PADRAO_UC.match(celula)
+        if uc:
+            nome_uc = f"UCP {int(uc.group(2))}"
+            if nome_uc not in ucs:
+                ucs[nome_uc] = [posicao, None]
+            ultima_nota = nome_uc
+        elif _PADRAO_FALTAS.match(celula) and ultima_nota is not None:
+            if ucs[ultima_nota][1] is None:
+                ucs[ultima_nota][1] = posicao
+            ultima_nota = None
+        else:
+            ultima_nota = None
+
+    projeto = (None, None)
+    fim_ucs = max(posicao for colunas in ucs.values() for posicao in colunas if posicao is not None)
+    for posicao in range(fim_ucs + 1, len(celulas) - 1):
+        celula = celulas[posicao]
+        if (celula and posicao != nome and not _PADRAO_UC.match(celula) and not _PADRAO_FALTAS.match(celula)
+                and _PADRAO_FALTAS.match(celulas[posicao + 1])):
+            projeto = (posicao, posicao + 1)
+            break
+
+    sem_faltas = [uc for uc, (nota, faltas) in ucs.items() if faltas is None]
+    if sem_faltas:
+        print(f"Aviso: coluna de faltas não encontrada para {', '.join(sem_faltas)}: faltas ficam 0 nessas UCs")
+
+    for uc in UCS_PADRAO:
+        ucs.setdefault(uc, [None, None])
+
+    return {
+        'linha_cabecalho': indice,
+        'inicio_dados': indice + linhas_cabecalho,
+        'nome': nome,
+        'ucs': [(uc, colunas[0], colunas[1]) for uc, colunas in ucs.items()],
+        'projeto': projeto,
+        'inferido': True
+    }
+
+
+def inferir_mapa_colunas(df):
+    """
+    Mapa de colunas da planilha lido do cabeçalho (sem cache); posições fixas se não houver cabeçalho
+    """
+    cabecalho = _localizar_cabecalho(df)
+    if cabecalho is None:
+        return mapa_posicional(df.shape[1])
+    return _resolver_mapa(*cabecalho)
+
+
+def obter_mapa_colunas(df):
+    """
+    Mapa de colunas da planilha, guardado pela assinatura do cabeçalho.
+
+    Achar a linha de cabeçalho custa poucas células; a assinatura (posição,
+    textos normalizados e número de colunas) indexa o mapa já resolvido, então
+    turmas e arquivos com o mesmo layout reaproveitam o mesmo mapa.
+    """
+    cabecalho = _localizar_cabecalho(df)
+    if cabecalho is None:
+        print(f"Cabeçalho não reconhecido ({df.shape[1]} colunas): usando as posições fixas")
+        return mapa_posicional(df.shape[1])
+
+    indice, celulas, linhas_cabecalho = cabecalho
+    assinatura = hashlib.md5(
+        f"{indice}|{linhas_cabecalho}|{df.shape[1]}|{'|'.join(celulas)}".encode('utf-8')
+    ).hexdigest()
+    with _lock:
+        mapa = _mapas.get(assinatura)
+    if mapa is not None:
+        return mapa
+
+    mapa = _resolver_mapa(indice, celulas, linhas_cabecalho)
+    with _lock:
+        if len(_mapas) >= MAX_MAPAS_GUARDADOS:
+            _mapas.pop(next(iter(_mapas)))
+        _mapas[assinatura] = mapa
+    ucs = ', '.join(uc for uc, nota, _ in mapa['ucs'] if nota is not None)
+    print(f"Layout de colunas reconhecido: {ucs}")
+    return mapa
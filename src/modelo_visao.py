@@ -0,0 +1,86 @@
+# Módulo responsável pelo modelo de visão "preguiçoso" das páginas com vários painéis
+
+import threading
+from collections import OrderedDict
+
+from src.instrumentacao import medir, contar
+
+
+class _CacheVisoes:
+    """
+    Cache LRU compartilhado no processo, indexado por (versão dos dados, escopo, chave)
+    """
+
+    def __init__(self, max_entradas=256):
+        self.max_entradas = max_entradas
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave, calcular):
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                contar('cache_visoes.acerto')
+                return self._itens[chave]
+
+        # Calcula fora do lock para não travar outras sessões
+        contar('cache_visoes.falha')
+        with medir('montar_painel', '/'.join(str(parte) for parte in chave[1:])):
+            valor = calcular()
+
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_entradas:
+                self._itens.popitem(last=False)
+        return valor
+
+    def itens(self):
+        """
+        Cópia das entradas (chave, valor), da menos para a mais usada
+        """
+        with self._lock:
+            return list(self._itens.items())
+
+
+cache_visoes = _CacheVisoes()
+
+
+def versao_dados(dados_processados):
+    """
+    Identificador da versão do conjunto de dados (usado como chave de memoização)
+    """
+    if not dados_processados:
+        return None
+    return dados_processados.get('versao') or f"id-{id(dados_processados)}"
+
+
+class ModeloVisaoLazy:
+    """
+    Calcula cada painel de uma página só quando ele é aberto pela primeira vez.
+
+    O resultado fica memoizado para a versão dos dados: trocar de aba e voltar,
+    ou outra sessão abrindo o mesmo painel, não recalcula nada. Uma nova versão
+    dos dados gera chaves novas e as antigas saem do cache por LRU.
+    """
+
+    def __init__(self, dados_processados, escopo=''):
+        self.versao = versao_dados(dados_processados)
+        self.escopo = escopo
+
+    def painel(self, chave, calcular):
+        """
+        Retorna o resultado do painel, calculando apenas na primeira vez
+        """
+        if self.versao is None:
+            return calcular()
+        return cache_visoes.obter((self.versao, self.escopo, chave), calcular)
+
+    def sub_modelo(self, escopo):
+        """
+        Modelo para uma parte da página (ex.: uma turma específica)
+        """
+        filho = ModeloVisaoLazy(None)
+        filho.versao = self.versao
+        filho.escopo = f"{self.escopo}/{escopo}" if self.escopo else escopo
+        return filho
@@ -0,0 +1,336 @@
+# Módulo responsável por observar a pasta dados/ e deixar planilhas novas ou alteradas já processadas
+#
+# Uso:
+#   python -m src.monitor_pasta                # observa dados/ até Ctrl+C
+#   python -m src.monitor_pasta --uma-vez      # processa o que estiver pendente e sai (cron)
+#
+# O resultado vai para o cache em disco de dados processados (dados/.cache), o
+# mesmo que a interface, a API e a fila de processamento consultam: quando o
+# primeiro professor abre o painel, a planilha exportada pela secretaria já
+# está pronta. Usa inotify (pacote watchdog) quando disponível e, sem ele,
+# varre a pasta periodicamente.
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from src.cache_processados import obter_cache_processados
+from src.catalogo_dados import ARQUIVOS_BIMESTRE, calcular_hash_arquivo
+from src.leitura_dados import LeitorDadosExcel
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog é opcional: sem ele a pasta é varrida periodicamente
+    FileSystemEventHandler = object
+    Observer = None
+
+PASTA_DADOS = 'dados/'
+# Tempo sem mudança de tamanho/data para considerar que a cópia terminou
+ESPERA_SEGUNDOS = 2.0
+INTERVALO_VARREDURA = 5.0
+
+
+class MonitorPasta:
+    """
+    Fila de arquivos pendentes com debounce.
+
+    Cada evento (ou varredura) só marca o arquivo como pendente; ele é
+    processado quando tamanho e data de modificação ficam parados por
+    espera_segundos, o que evita ler uma planilha ainda sendo copiada.
+    Conteúdo já presente no cache (mesmo hash) não é processado de novo.
+    """
+
+    def __init__(self, pasta_dados=PASTA_DADOS, espera_segundos=ESPERA_SEGUNDOS,
+                 intervalo_varredura=INTERVALO_VARREDURA, incluir_backups=False, usar_inotify=True,
+                 verboso=False):
+        self.pasta_dados = pasta_dados
+        self.espera_segundos = espera_segundos
+        self.intervalo_varredura = intervalo_varredura
+        self.incluir_backups = incluir_backups
+        self.usar_inotify = usar_inotify
+        self.verboso = verboso
+        self.leitor = LeitorDadosExcel()
+        self.cache = obter_cache_processados(os.path.join(pasta_dados, '.cache'))
+        self.carregar = self.cache.carregador(self.leitor.obter_dados_completos)
+        self._bimestres_por_nome = {arquivo: bim for bim, arquivo in ARQUIVOS_BIMESTRE.items()}
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        # caminho -> (assinatura, instante em que a assinatura foi vista)
+        self._pendentes = {}
+        # caminho -> assinatura já tratada (processada, inalterada ou com erro)
+        self._tratados = {}
+
+    # ===== Detecção =====
+
+    def deve_observar(self, caminho):
+        nome = os.path.basename(caminho)
+        if not nome.endswith('.xlsx') or nome.startswith(('.', '~$')):
+            return False
+        if nome.startswith('backup_') and not self.incluir_backups:
+            return False
+        return os.path.dirname(os.path.abspath(caminho)) == os.path.abspath(self.pasta_dados)
+
+    def notificar(self, caminho):
+        """
+        Marca o arquivo como pendente (chamado pelos eventos e pela varredura)
+        """
+        if not self.deve_observar(caminho):
+            return
+        assinatura = _assinatura(caminho)
+        if assinatura is None:
+            return
+        with self._lock:
+            if self._tratados.get(caminho) == assinatura:
+                return
+            anterior = self._pendentes.get(caminho)
+            if anterior is None or anterior[0] != assinatura:
+                self._pendentes[caminho] = (assinatura, _instante_visto(assinatura))
+        self._acordar.set()
+
+    def varrer(self):
+        """
+        Confere todos os arquivos da pasta (início e modo sem inotify)
+        """
+        try:
+            nomes = os.listdir(self.pasta_dados)
+        except OSError as e:
+            print(f"Aviso: não foi possível listar {self.pasta_dados}: {e}", file=sys.stderr)
+            return
+        for nome in sorted(nomes):
+            self.notificar(os.path.join(self.pasta_dados, nome))
+
+    def pendentes(self):
+        with self._lock:
+            return len(self._pendentes)
+
+    # ===== Processamento =====
+
+    def processar_pendentes(self):
+        """
+        Processa os pendentes que já estão estáveis. Retorna os resultados.
+        """
+        agora = time.monotonic()
+        prontos = []
+        with self._lock:
+            for caminho, (assinatura, visto_em) in list(self._pendentes.items()):
+                atual = _assinatura(caminho)
+                if atual is None:
+                    del self._pendentes[caminho]  # Apagado ou renomeado antes de terminar
+                elif atual != assinatura:
+                    self._pendentes[caminho] = (atual, agora)  # Ainda sendo escrito
+                elif agora - visto_em >= self.espera_segundos:
+                    del self._pendentes[caminho]
+                    prontos.append((caminho, assinatura))
+
+        resultados = []
+        for caminho, assinatura in prontos:
+            resultados.extend(self.processar(caminho))
+            with self._lock:
+                self._tratados[caminho] = assinatura
+        return resultados
+
+    def processar(self, caminho):
+        """
+        Deixa o arquivo no cache para cada bimestre em que ele pode ser pedido
+        """
+        try:
+            hash_conteudo = calcular_hash_arquivo(caminho)
+        except OSError as e:
+            return [self._registrar(caminho, None, 'erro', erro=str(e))]
+
+        bimestres = self._bimestres(caminho)
+        if not bimestres:
+            return [self._registrar(caminho, None, 'ignorado', erro='formato não reconhecido')]
+
+        resultados = []
+        for bimestre in bimestres:
+            if self.cache.contem(hash_conteudo, bimestre):
+                resultados.append(self._registrar(caminho, bimestre, 'inalterado'))
+                continue
+
+            inicio = time.monotonic()
+            try:
+                saida = contextlib.nullcontext() if self.verboso else contextlib.redirect_stdout(io.StringIO())
+                with saida:
+                    dados, info_bimestre = self.carregar(caminho, bimestre)
+            except Exception as e:
+                resultados.append(self._registrar(caminho, bimestre, 'erro', erro=f"{type(e).__name__}: {e}"))
+                continue
+
+            if not dados:
+                descricao = (info_bimestre or {}).get('descricao')
+                resultados.append(self._registrar(
+                    caminho, bimestre, 'erro',
+                    erro=f"nenhuma turma encontrada no formato {descricao}" if descricao else "nenhuma turma encontrada"
+                ))
+                continue
+            resultados.append(self._registrar(
+                caminho, bimestre, 'processado', duracao=time.monotonic() - inicio,
+                turmas=dados['resumo_geral']['total_turmas'], alunos=dados['resumo_geral']['total_alunos']
+            ))
+        return resultados
+
+    def _bimestres(self, caminho):
+        """
+        Bimestres com que a planilha é pedida: o do nome do arquivo (interface)
+        e o detectado no conteúdo (API, arquivos com nome fora do padrão)
+        """
+        bimestres = []
+        por_nome = self._bimestres_por_nome.get(os.path.basename(caminho))
+        if por_nome:
+            bimestres.append(por_nome)
+        detectado = self.leitor.detectar_bimestre_arquivo(caminho).get('bimestre')
+        if detectado in ARQUIVOS_BIMESTRE and detectado not in bimestres:
+            bimestres.append(detectado)
+        return bimestres
+
+    def _registrar(self, caminho, bimestre, estado, **detalhes):
+        resultado = dict(detalhes, arquivo=caminho, bimestre=bimestre, estado=estado)
+        texto = f"[{datetime.now().strftime('%H:%M:%S')}] {estado:<10} {os.path.basename(caminho)}"
+        if bimestre:
+            texto += f" ({bimestre})"
+        if 'duracao' in detalhes:
+            texto += f" - {detalhes['turmas']} turmas, {detalhes['alunos']} alunos em {detalhes['duracao']:.2f}s"
+        if 'erro' in detalhes:
+            texto += f": {detalhes['erro']}"
+        print(texto, file=sys.stderr if estado == 'erro' else sys.stdout)
+        return resultado
+
+    # ===== Execução =====
+
+    def executar(self):
+        """
+        Observa a pasta até parar() (ou Ctrl+C)
+        """
+        observador = self._iniciar_observador()
+        modo = 'inotify' if observador is not None else f'varredura a cada {self.intervalo_varredura:g}s'
+        print(f"Observando {self.pasta_dados} ({modo})")
+
+        self.varrer()
+        ultima_varredura = time.monotonic()
+        try:
+            while not self._parar.is_set():
+                espera = self.espera_segundos / 2 if self.pendentes() else self.intervalo_varredura
+                self._acordar.wait(espera)
+                self._acordar.clear()
+                if observador is None and time.monotonic() - ultima_varredura >= self.intervalo_varredura:
+                    self.varrer()
+                    ultima_varredura = time.monotonic()
+                self.processar_pendentes()
+        finally:
+            if observador is not None:
+                observador.stop()
+                observador.join()
+
+    def executar_uma_vez(self):
+        """
+        Processa o que estiver pendente agora (esperando cópias em andamento) e retorna os resultados
+        """
+        self.varrer()
+        resultados = []
+        while self.pendentes():
+            resultados.extend(self.processar_pendentes())
+            if self.pendentes():
+                time.sleep(min(self.espera_segundos / 2, 1.0))
+        return resultados
+
+    def parar(self):
+        self._parar.set()
+        self._acordar.set()
+
+    def _iniciar_observador(self):
+        if Observer is None or not self.usar_inotify:
+            return None
+        try:
+            observador = Observer()
+            observador.schedule(_EventosPasta(self), self.pasta_dados, recursive=False)
+            observador.start()
+            return observador
+        except Exception as e:  # Limite de inotify, sistema de arquivos de rede etc.
+            print(f"inotify indisponível ({e}); usando varredura periódica", file=sys.stderr)
+            return None
+
+
+class _EventosPasta(FileSystemEventHandler):
+    def __init__(self, monitor):
+        super().__init__()
+        self.monitor = monitor
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.monitor.notificar(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.monitor.notificar(event.src_path)
+
+    def on_closed(self, event):
+        if not event.is_directory:
+            self.monitor.notificar(event.src_path)
+
+    def on_moved(self, event):
+        # Gravações atômicas (temporário + rename) chegam como "moved" para o nome final
+        if not event.is_directory:
+            self.monitor.notificar(event.dest_path)
+
+
+def _assinatura(caminho):
+    try:
+        stat = os.stat(caminho)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _instante_visto(assinatura):
+    """
+    Arquivos parados há mais que a espera (ex.: já estavam na pasta) contam como estáveis
+    """
+    parado_ha = time.time() - assinatura[1] / 1e9
+    return time.monotonic() - max(parado_ha, 0)
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m src.monitor_pasta',
+        description='Observa a pasta de dados e processa planilhas novas ou alteradas.'
+    )
+    parser.add_argument('pasta', nargs='?', default=PASTA_DADOS, help=f'pasta observada (padrão: {PASTA_DADOS})')
+    parser.add_argument('--espera', type=float, default=ESPERA_SEGUNDOS,
+                        help='segundos sem mudança para considerar a cópia concluída (padrão: %(default)s)')
+    parser.add_argument('--intervalo', type=float, default=INTERVALO_VARREDURA,
+                        help='intervalo da varredura sem inotify, em segundos (padrão: %(default)s)')
+    parser.add_argument('--varredura', action='store_true', help='não usar inotify, só varredura periódica')
+    parser.add_argument('--incluir-backups', action='store_true', help='processar também os backup_*.xlsx')
+    parser.add_argument('--uma-vez', action='store_true', help='processar o que estiver pendente e sair')
+    parser.add_argument('--verboso', action='store_true', help='mostrar o log do processamento')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    if not os.path.isdir(args.pasta):
+        print(f"Erro: pasta {args.pasta} não encontrada", file=sys.stderr)
+        return 2
+    monitor = MonitorPasta(args.pasta, args.espera, args.intervalo, args.incluir_backups,
+                           usar_inotify=not args.varredura, verboso=args.verboso)
+    if args.uma_vez:
+        resultados = monitor.executar_uma_vez()
+        return 1 if any(r['estado'] == 'erro' for r in resultados) else 0
+
+    try:
+        monitor.executar()
+    except KeyboardInterrupt:
+        monitor.parar()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
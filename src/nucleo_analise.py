@@ -0,0 +1,168 @@
+# Módulo responsável pelos cálculos da análise de risco (sem Streamlit e sem Plotly)
+#
+# Usado pela interface (analise_risco.py), pelos relatórios, pela linha de comando
+# e pelos processos de fundo: importar este módulo não carrega nenhuma biblioteca
+# de interface nem de gráficos.
+
+CORES_SITUACAO = {
+    'ALTO_RISCO': '#FF4B4B',      # Vermelho
+    'RISCO_MODERADO': '#FFA500',   # Laranja
+    'ATENCAO': '#FFD700',          # Amarelo
+    'OK': '#00C851'                # Verde
+}
+LABELS_SITUACAO = {
+    'ALTO_RISCO': 'Alto Risco',
+    'RISCO_MODERADO': 'Risco Moderado',
+    'ATENCAO': 'Atenção',
+    'OK': 'Situação OK'
+}
+# Do mais grave para o menos grave
+ORDEM_SITUACAO = ['ALTO_RISCO', 'RISCO_MODERADO', 'ATENCAO', 'OK']
+SITUACOES_RISCO = ('ALTO_RISCO', 'RISCO_MODERADO')
+FILTROS_SITUACAO = {
+    "Alto Risco": "ALTO_RISCO",
+    "Risco Moderado": "RISCO_MODERADO",
+    "Atenção": "ATENCAO",
+    "OK": "OK"
+}
+
+
+def nome_turma_exibicao(nome_turma):
+    """
+    Nome da turma sem o sufixo " - IA" do formato da planilha
+    """
+    return nome_turma.replace(' - IA', '')
+
+
+def ucs_dos_alunos(alunos):
+    """
+    Nomes das UCs presentes nos alunos (qualquer iterável), na ordem da planilha
+    """
+    ucs = {}
+    for aluno in alunos:
+        ucs.update(dict.fromkeys(aluno['ucs']))
+    return list(ucs)
+
+
+def calcular_estatisticas_uc(alunos, uc_nome):
+    """
+    Estatísticas de uma UC (só notas lançadas); None se nenhuma nota foi lançada
+    """
+    dados_uc = []
+    for aluno in alunos:
+        uc_dados = aluno['ucs'].get(uc_nome)
+        if uc_dados and uc_dados['nota'] > 0:  # Só considerar notas lançadas
+            dados_uc.append({
+                'nome': aluno['nome'],
+                'nota': uc_dados['nota'],
+                'faltas': uc_dados['faltas'],
+                'situacao': aluno['situacao_por_uc'][uc_nome]
+            })
+
+    if not dados_uc:
+        return None
+
+    notas = [d['nota'] for d in dados_uc]
+    faltas = [d['faltas'] for d in dados_uc]
+
+    # Contar situações nesta UC
+    contadores_uc = {'ALTO_RISCO': 0, 'RISCO_MODERADO': 0, 'ATENCAO': 0, 'OK': 0}
+    for d in dados_uc:
+        contadores_uc[d['situacao']] += 1
+
+    return {
+        'media': sum(notas) / len(notas),
+        'maior_nota': max(notas),
+        'menor_nota': min(notas),
+        'media_faltas': sum(faltas) / len(faltas),
+        'contadores': contadores_uc,
+        'alunos_risco': [d for d in dados_uc if d['situacao'] in SITUACOES_RISCO]
+    }
+
+
+def filtrar_ordenar_alunos(alunos, situacao_filtro, ordem_filtro):
+    """
+    Filtro de situação ("Todos", "Alto Risco", ...) e ordenação ("Nome", "Média", ...)
+    """
+    alunos_filtrados = alunos.copy()
+
+    if situacao_filtro != "Todos":
+        situacao = FILTROS_SITUACAO[situacao_filtro]
+        alunos_filtrados = [a for a in alunos_filtrados if a['situacao_geral'] == situacao]
+
+    if ordem_filtro == "Nome":
+        alunos_filtrados.sort(key=lambda x: x['nome'])
+    elif ordem_filtro == "Média":
+        alunos_filtrados.sort(key=lambda x: x['media_geral'], reverse=True)
+    elif ordem_filtro == "Total de Faltas":
+        alunos_filtrados.sort(key=lambda x: x['total_faltas'], reverse=True)
+    elif ordem_filtro == "Situação":
+        alunos_filtrados.sort(key=lambda x: ORDEM_SITUACAO.index(x['situacao_geral']))
+
+    return alunos_filtrados
+
+
+def ucs_em_risco(aluno):
+    """
+    UCs do aluno em risco: [{'uc', 'nota', 'faltas', 'situacao'}]
+    """
+    return [
+        {
+            'uc': uc_nome,
+            'nota': aluno['ucs'][uc_nome]['nota'],
+            'faltas': aluno['ucs'][uc_nome]['faltas'],
+            'situacao': situacao_uc
+        }
+        for uc_nome, situacao_uc in aluno['situacao_por_uc'].items()
+        if situacao_uc in SITUACOES_RISCO
+    ]
+
+
+def coletar_alunos_risco(dados_processados):
+    """
+    Alunos em risco de todas as turmas (com 'nome_turma' e 'ucs_risco'),
+    do mais grave para o menos grave
+    """
+    alunos_risco = []
+    for nome_turma, dados_turma in dados_processados.get('turmas', {}).items():
+        for aluno in dados_turma['alunos']:
+            if aluno['situacao_geral'] in SITUACOES_RISCO:
+                aluno_info = aluno.copy()
+                aluno_info['nome_turma'] = nome_turma_exibicao(nome_turma)
+                aluno_info['ucs_risco'] = ucs_em_risco(aluno)
+                alunos_risco.append(aluno_info)
+
+    alunos_risco.sort(key=lambda x: (ORDEM_SITUACAO.index(x['situacao_geral']), x['media_geral']))
+    return alunos_risco
+
+
+def resumo_turmas(dados_processados):
+    """
+    Uma linha por turma com contagem por situação, média e % de risco
+    """
+    linhas = []
+    for nome_turma, dados_turma in dados_processados.get('turmas', {}).items():
+        stats = dados_turma['estatisticas']
+        contadores = stats['contadores_situacao']
+        linhas.append({
+            'Turma': nome_turma_exibicao(nome_turma),
+            'Total Alunos': stats['total_alunos'],
+            'Alto Risco': contadores['ALTO_RISCO'],
+            'Risco Moderado': contadores['RISCO_MODERADO'],
+            'Atenção': contadores['ATENCAO'],
+            'Situação OK': contadores['OK'],
+            'Média da Turma': stats['media_turma'],
+            '% Risco': stats['percentual_risco']
+        })
+    return linhas
+
+
+def percentual_situacao_boa(resumo_geral):
+    """
+    % de alunos com situação OK ou só em atenção
+    """
+    total = resumo_geral.get('total_alunos', 0)
+    if total <= 0:
+        return 0
+    alunos_ok = resumo_geral.get('alunos_ok', 0) + resumo_geral.get('alunos_atencao', 0)
+    return round((alunos_ok / total) * 100, 1)
@@ -0,0 +1,199 @@
+# Módulo responsável pela página de comparação entre a versão atual e outra versão (bimestre ou backup)
+
+import threading
+
+import streamlit as st
+
+from src.comparacao_versoes import comparar_versoes
+from src.registro_dados import registro_global
+
+# Backups comprimidos são descomprimidos uma vez na área temporária e reaproveitados
+DONO_BACKUPS_DESCOMPRIMIDOS = 'comparacao-backups'
+_backups_descomprimidos = {}
+_backups_descomprimidos_lock = threading.Lock()
+
+
+class PaginaComparacao:
+    """
+    Página "Comparar Versões": o que mudou entre os dados carregados e outro
+    arquivo de bimestre ou um backup.
+    """
+
+    def __init__(self, gestor_arquivos, leitor_dados):
+        self.gestor_arquivos = gestor_arquivos
+        self.leitor_dados = leitor_dados
+
+    def criar(self, dados_atuais, caminho_atual=None):
+        """
+        Cria a página completa
+        """
+        st.title("🔀 Comparar Versões")
+        info_bimestre = dados_atuais.get('info_bimestre', {})
+        st.info(f"📅 **Versão atual:** {info_bimestre.get('descricao', 'N/A')}")
+
+        opcoes = self.opcoes_versoes(caminho_atual)
+        if not opcoes:
+            st.warning("⚠️ Não há outra versão (bimestre ou backup) para comparar")
+            return
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            rotulo = st.selectbox("Comparar com:", [o['rotulo'] for o in opcoes])
+        with col2:
+            st.write("")
+            atual_como_base = st.checkbox("Atual como base", value=False,
+                                          help="Por padrão a outra versão é o 'antes' e a atual o 'depois'")
+        opcao = next(o for o in opcoes if o['rotulo'] == rotulo)
+
+        with st.spinner("Carregando versão para comparação..."):
+            outros_dados = self._carregar_opcao(opcao)
+        if not outros_dados:
+            st.error("❌ Não foi possível carregar a versão escolhida")
+            return
+
+        if atual_como_base:
+            resultado = comparar_versoes(dados_atuais, outros_dados)
+        else:
+            resultado = comparar_versoes(outros_dados, dados_atuais)
+
+        self._mostrar_resumo(resultado['resumo'])
+        self._mostrar_transicoes(resultado['transicoes'])
+        self._mostrar_alteracoes(resultado['alteracoes'])
+
+        if not resultado['novos'].empty:
+            with st.expander(f"➕ Alunos só na versão 'depois' ({len(resultado['novos'])})"):
+                st.dataframe(resultado['novos'], use_container_width=True, hide_index=True)
+        if not resultado['removidos'].empty:
+            with st.expander(f"➖ Alunos só na versão 'antes' ({len(resultado['removidos'])})"):
+                st.dataframe(resultado['removidos'], use_container_width=True, hide_index=True)
+
+    def opcoes_versoes(self, caminho_atual=None):
+        """
+        Outros bimestres e backups disponíveis: [{'rotulo', 'caminho', 'bimestre', 'hash', 'origem'}]
+        """
+        opcoes = []
+        for bim, entrada in self.gestor_arquivos.catalogo.bimestres_disponiveis().items():
+            if entrada['caminho'] == caminho_atual:
+                continue
+            opcoes.append({
+                'rotulo': f"📄 {self.gestor_arquivos._get_nome_bimestre_display(bim)} ({entrada['nome']})",
+                'caminho': entrada['caminho'],
+                # Formato detectado no conteúdo (o nome do arquivo nem sempre corresponde)
+                'bimestre': (entrada.get('formato') or {}).get('bimestre') or bim,
+                'hash': entrada.get('hash'),
+                'origem': 'bimestre'
+            })
+        for backup in self.gestor_arquivos._listar_backups():
+            opcoes.append({
+                'rotulo': f"📋 {backup['nome']} ({backup['tamanho']})",
+                'caminho': backup['caminho'],
+                'bimestre': backup.get('bimestre'),
+                'hash': backup.get('hash'),
+                'origem': backup['origem']
+            })
+        return opcoes
+
+    def _carregar_opcao(self, opcao):
+        """
+        Dados processados da opção escolhida, pelo registro compartilhado.
+        O handle fica na sessão para a versão não sair do registro enquanto é comparada.
+        """
+        handle = st.session_state.get('handle_comparacao')
+        if handle is not None and st.session_state.get('rotulo_comparacao') == opcao['rotulo']:
+            dados = handle.dados
+            if dados:
+                return dados
+
+        try:
+            area = self.gestor_arquivos.area_temporaria
+            if opcao['origem'] == 'repositorio':
+                caminho = caminho_backup_descomprimido(
+                    self.gestor_arquivos.repositorio_backups, area, opcao['hash']
+                )
+            else:
+                caminho = opcao['caminho']
+
+            with area.em_uso(caminho):
+                handle, _ = registro_global.carregar(
+                    caminho, opcao['bimestre'], self.leitor_dados.obter_dados_completos
+                )
+        except Exception as e:
+            st.error(f"Erro ao carregar versão: {str(e)}")
+            return None
+
+        if handle is None:
+            return None
+        st.session_state.handle_comparacao = handle
+        st.session_state.rotulo_comparacao = opcao['rotulo']
+        return handle.dados
+
+    def _mostrar_resumo(self, resumo):
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Alunos alterados", resumo['alunos_alterados'],
+                      help=f"{resumo['alunos_comparados']} alunos presentes nas duas versões")
+        with col2:
+            st.metric("Pioraram", resumo['pioraram'], delta=f"-{resumo['pioraram']}", delta_color="inverse")
+        with col3:
+            st.metric("Melhoraram", resumo['melhoraram'], delta=f"+{resumo['melhoraram']}")
+        with col4:
+            st.metric("Notas / faltas alteradas", f"{resumo['notas_alteradas']} / {resumo['faltas_alteradas']}")
+        with col5:
+            st.metric("Novos / removidos", f"{resumo['novos']} / {resumo['removidos']}")
+
+    def _mostrar_transicoes(self, transicoes):
+        st.subheader("🔁 Mudanças de situação")
+        if transicoes.empty:
+            st.success("Nenhum aluno mudou de situação")
+            return
+        st.dataframe(
+            transicoes.rename(columns={'de': 'De', 'para': 'Para', 'quantidade': 'Alunos'}),
+            use_container_width=True, hide_index=True
+        )
+
+    def _mostrar_alteracoes(self, alteracoes):
+        st.subheader("📝 Alunos com alterações")
+        if alteracoes.empty:
+            st.success("🎉 Nenhuma nota, falta ou situação mudou entre as versões")
+            return
+
+        col1, col2 = st.columns(2)
+        with col1:
+            turmas = st.multiselect("Turmas:", sorted(alteracoes['turma'].unique()))
+        with col2:
+            tendencias = st.multiselect("Tendência:", ['piorou', 'melhorou', 'igual'])
+
+        filtradas = alteracoes
+        if turmas:
+            filtradas = filtradas[filtradas['turma'].isin(turmas)]
+        if tendencias:
+            filtradas = filtradas[filtradas['tendencia'].isin(tendencias)]
+
+        st.dataframe(
+            filtradas.rename(columns={
+                'turma': 'Turma', 'nome': 'Nome', 'situacao_antes': 'Situação antes',
+                'situacao_depois': 'Situação depois', 'media_antes': 'Média antes',
+                'media_depois': 'Média depois', 'variacao_media': 'Δ Média',
+                'variacao_faltas': 'Δ Faltas', 'tendencia': 'Tendência', 'alteracoes': 'Alterações'
+            }),
+            use_container_width=True, hide_index=True
+        )
+
+
+def caminho_backup_descomprimido(repositorio, area, hash_conteudo):
+    """
+    Caminho de uma cópia descomprimida do backup na área temporária (criada uma vez por processo)
+    """
+    with _backups_descomprimidos_lock:
+        caminho = _backups_descomprimidos.get(hash_conteudo)
+        if caminho is not None and area.tocar(caminho):
+            return caminho
+
+        def escrever(f_destino):
+            with repositorio.abrir(hash_conteudo) as f_blob:
+                for bloco in iter(lambda: f_blob.read(1024 * 1024), b''):
+                    f_destino.write(bloco)
+
+        caminho, _ = area.criar(DONO_BACKUPS_DESCOMPRIMIDOS, escrever)
+        _backups_descomprimidos[hash_conteudo] = caminho
+        return caminho
@@ -0,0 +1,126 @@
+# Módulo responsável pela página da rede de escolas (visão da coordenação regional)
+
+import pandas as pd
+import streamlit as st
+
+from src import nucleo_analise
+from src.rede_escolas import ARQUIVO_CONFIGURACAO, linhas_escolas, linhas_ucs, obter_rede_escolas
+
+
+class PaginaRede:
+    """
+    Página "Rede de Escolas": totais da rede, uma linha por escola e o detalhe de uma escola.
+
+    Os totais e as tabelas saem dos agregados parciais de cada escola; só o
+    detalhe de uma escola e a lista de alunos em risco leem os alunos (do cache em disco).
+    """
+
+    def __init__(self, gestor_arquivos):
+        self.gestor_arquivos = gestor_arquivos
+
+    def criar(self):
+        """
+        Cria a página completa
+        """
+        st.title("🏫 Rede de Escolas")
+
+        try:
+            rede = obter_rede_escolas()
+        except (OSError, ValueError) as e:
+            st.error(f"❌ Erro na configuração das escolas ({ARQUIVO_CONFIGURACAO}): {e}")
+            return
+        if rede is None:
+            st.info(f"📋 Nenhuma rede configurada: crie {ARQUIVO_CONFIGURACAO} (ou aponte EDURADAR_ESCOLAS) "
+                    "com a pasta de planilhas de cada escola.")
+            return
+
+        disponiveis = rede.bimestres_disponiveis()
+        if not disponiveis:
+            st.warning("⚠️ Nenhuma planilha de bimestre encontrada nas pastas das escolas")
+            return
+
+        nome_bimestre = self.gestor_arquivos._get_nome_bimestre_display
+        bimestre = st.selectbox(
+            "Bimestre:",
+            list(disponiveis),
+            index=len(disponiveis) - 1,
+            format_func=lambda b: f"{nome_bimestre(b)} ({disponiveis[b]} de {len(rede.escolas)} escolas)"
+        )
+
+        with st.spinner("📊 Processando as planilhas das escolas..."):
+            dados_rede = rede.obter_dados(bimestre)
+
+        self._mostrar_totais(dados_rede, len(rede.escolas))
+
+        falhas = {e['nome']: e['erro'] for e in dados_rede['escolas'].values() if e['erro']}
+        if falhas:
+            with st.expander(f"⚠️ {len(falhas)} escola(s) fora da visão da rede"):
+                for nome, erro in falhas.items():
+                    st.write(f"**{nome}:** {erro}")
+
+        st.subheader("📊 Resumo por Escola")
+        linhas = sorted(linhas_escolas(dados_rede), key=lambda linha: linha['% Risco'], reverse=True)
+        st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True)
+
+        st.subheader("📚 UCs na Rede")
+        st.dataframe(pd.DataFrame(linhas_ucs(dados_rede)), use_container_width=True, hide_index=True)
+
+        self._mostrar_escola(rede, dados_rede, bimestre)
+
+        st.markdown("---")
+        if st.checkbox("⚠️ Listar alunos em risco de toda a rede"):
+            self._mostrar_alunos_risco(rede, dados_rede)
+
+    def _mostrar_totais(self, dados_rede, total_escolas):
+        resumo = dados_rede['resumo_geral']
+        carregadas = sum(1 for e in dados_rede['escolas'].values() if e['parcial'] is not None)
+
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Escolas", f"{carregadas} de {total_escolas}")
+        with col2:
+            st.metric("Total de Alunos", resumo['total_alunos'], help=f"{resumo['total_turmas']} turmas")
+        with col3:
+            st.metric("Alto Risco", resumo['alunos_risco_alto'])
+        with col4:
+            st.metric("Risco Moderado", resumo['alunos_risco_moderado'])
+        with col5:
+            st.metric("% Situação Boa", f"{nucleo_analise.percentual_situacao_boa(resumo)}%")
+
+    def _mostrar_escola(self, rede, dados_rede, bimestre):
+        """
+        Turmas de uma escola escolhida (só esta escola é percorrida)
+        """
+        escolas = {id_escola: e['nome'] for id_escola, e in dados_rede['escolas'].items() if e['parcial'] is not None}
+        if not escolas:
+            return
+
+        st.subheader("🔍 Detalhar Escola")
+        id_escola = st.selectbox("Escola:", list(escolas), format_func=escolas.get)
+        dados_escola = rede.dados_escola(id_escola, bimestre)
+        if not dados_escola:
+            st.warning("⚠️ Dados da escola indisponíveis")
+            return
+        st.dataframe(pd.DataFrame(nucleo_analise.resumo_turmas(dados_escola)),
+                     use_container_width=True, hide_index=True)
+
+    def _mostrar_alunos_risco(self, rede, dados_rede):
+        with st.spinner("📊 Lendo os alunos das escolas..."):
+            alunos_risco = rede.alunos_risco(dados_rede)
+        if not alunos_risco:
+            st.success("🎉 Nenhum aluno em risco na rede")
+            return
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    'Turma': aluno['nome_turma'],
+                    'Nome': aluno['nome'],
+                    'Situação': nucleo_analise.LABELS_SITUACAO[aluno['situacao_geral']],
+                    'Média': aluno['media_geral'],
+                    'Total de Faltas': aluno['total_faltas'],
+                    'UCs em Risco': ', '.join(uc['uc'] for uc in aluno['ucs_risco'])
+                }
+                for aluno in alunos_risco
+            ]),
+            use_container_width=True, hide_index=True
+        )
@@ -0,0 +1,299 @@
+# Módulo responsável pelo perfil de memória (tracemalloc) e pelo tamanho dos dados em memória
+#
+#   from src.perfil_memoria import medir_memoria, tamanho_profundo
+#
+#   with medir_memoria('obter_dados_completos', nome_arquivo):
+#       ...
+#   tamanho_profundo(st.session_state.handle_dados.dados)
+#
+# O tracemalloc deixa o processo bem mais lento, então fica desligado até ser
+# ativado no debug da página de Configurações (ou com EDURADAR_PERFIL_MEMORIA=1).
+# Desligado, medir_memoria() não faz nada. tamanho_profundo() funciona sempre.
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import deque
+from datetime import datetime
+
+MAX_MEDICOES = 30
+TOP_LOCAIS = 10
+
+# Não entram na conta: são compartilhados por todo o processo
+_TIPOS_IGNORADOS = (
+    type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+    type(threading.Lock()), type(threading.RLock()), threading.Thread
+)
+
+
+def tamanho_profundo(obj, excluir=()):
+    """
+    Estimativa em bytes de obj e de tudo o que ele referencia (sem contar duas vezes).
+
+    DataFrames e arrays usam o tamanho informado pelo pandas/numpy; figuras do
+    plotly são medidas pelo JSON equivalente. Objetos em excluir (e o que só é
+    alcançável por eles) ficam de fora: use para não contar o registro
+    compartilhado ao medir uma sessão.
+    """
+    pd = sys.modules.get('pandas')
+    np = sys.modules.get('numpy')
+    vistos = {id(o) for o in excluir}
+    total = 0
+    pilha = [obj]
+    while pilha:
+        atual = pilha.pop()
+        if id(atual) in vistos:
+            continue
+        vistos.add(id(atual))
+        if isinstance(atual, _TIPOS_IGNORADOS):
+            continue
+
+        if pd is not None and isinstance(atual, (pd.DataFrame, pd.Series, pd.Index)):
+            uso = atual.memory_usage(deep=True)
+            total += int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+            continue
+        if np is not None and isinstance(atual, np.ndarray):
+            total += atual.nbytes
+            continue
+        if hasattr(atual, 'to_plotly_json') and not isinstance(atual, type):
+            pilha.append(atual.to_plotly_json())
+            continue
+
+        try:
+            total += sys.getsizeof(atual)
+        except TypeError:
+            continue
+        if isinstance(atual, dict):
+            pilha.extend(atual.keys())
+            pilha.extend(atual.values())
+        elif isinstance(atual, (list, tuple, set, frozenset, deque)):
+            pilha.extend(atual)
+        elif not isinstance(atual, (str, bytes, bytearray, int, float, complex, bool)):
+            atributos = getattr(atual, '__dict__', None)
+            if isinstance(atributos, dict):
+                pilha.append(atributos)
+            for classe in type(atual).__mro__:
+                for nome in getattr(classe, '__slots__', ()):
+                    if hasattr(atual, nome):
+                        pilha.append(getattr(atual, nome))
+    return total
+
+
+def tamanhos(itens, excluir=()):
+    """
+    Linhas {'item', 'kb'} (maiores primeiro) para {nome: objeto}
+    """
+    linhas = [
+        {'item': str(nome), 'kb': round(tamanho_profundo(obj, excluir) / 1024, 1)}
+        for nome, obj in itens.items()
+    ]
+    linhas.sort(key=lambda linha: linha['kb'], reverse=True)
+    return linhas
+
+
+def memoria_processo_mb():
+    """
+    Pico de memória residente do processo (MB), ou None se não disponível
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return round(pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024, 1)
+
+
+def memoria_residente_mb(pid=None):
+    """
+    Memória residente atual (MB) do processo pid (padrão: este).
+    Sem /proc (fora do Linux) cai no pico de memoria_processo_mb, só para este processo.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            paginas = int(f.read().split()[1])
+        return round(paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return memoria_processo_mb() if pid is None else None
+
+
+class _MedicaoMemoria:
+    """
+    Snapshot do tracemalloc antes e depois do bloco; guarda a diferença por linha de código
+    """
+
+    def __init__(self, perfil, nome, detalhe):
+        self.perfil = perfil
+        self.nome = nome
+        self.detalhe = detalhe
+        self.antes = None
+
+    def __enter__(self):
+        # Uma medição por vez no processo (o tracemalloc é global): as outras não medem
+        if not self.perfil.ativo or not self.perfil._medindo.acquire(blocking=False):
+            return self
+        try:
+            self.antes = tracemalloc.take_snapshot()
+            self.memoria_antes, pico = tracemalloc.get_traced_memory()
+            # O pico é zerado para medir só o bloco; o do processo continua em _pico_bytes
+            self.perfil._acumular_pico(pico)
+            tracemalloc.reset_peak()
+            self.inicio = time.perf_counter()
+        except Exception:
+            self.antes = None
+            self.perfil._medindo.release()
+        return self
+
+    def __exit__(self, tipo_erro, erro, tb):
+        if self.antes is None:
+            return False
+        if not tracemalloc.is_tracing():
+            # Desativado no meio do bloco (botão do debug): nada a registrar
+            self.antes = None
+            self.perfil._medindo.release()
+            return False
+        try:
+            duracao = time.perf_counter() - self.inicio
+            atual, pico = tracemalloc.get_traced_memory()
+            depois = tracemalloc.take_snapshot()
+            self.perfil._registrar({
+                'nome': self.nome,
+                'detalhe': self.detalhe,
+                'quando': datetime.now().strftime('%H:%M:%S'),
+                'duracao_ms': round(duracao * 1000, 1),
+                'liquido_kb': round((atual - self.memoria_antes) / 1024, 1),
+                'pico_kb': round((pico - self.memoria_antes) / 1024, 1),
+                'erro': tipo_erro.__name__ if tipo_erro is not None else None,
+                'locais': _top_diferencas(depois, self.antes)
+            })
+        except Exception as e:
+            print(f"Perfil de memória de {self.nome} falhou: {e}")
+        finally:
+            self.antes = None
+            self.perfil._medindo.release()
+        return False
+
+
+def _filtrar(snapshot):
+    """
+    Tira do snapshot as alocações do próprio tracemalloc e deste módulo
+    """
+    return snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+
+
+def _local(estatistica):
+    quadro = estatistica.traceback[0]
+    return f"{_caminho_curto(quadro.filename)}:{quadro.lineno}"
+
+
+def _caminho_curto(caminho):
+    """
+    Caminho relativo ao projeto ou ao site-packages, para caber na tabela
+    """
+    for raiz in (os.getcwd(), *sys.path):
+        if raiz and caminho.startswith(raiz + os.sep):
+            return caminho[len(raiz) + 1:]
+    return caminho
+
+
+def _top_diferencas(depois, antes, limite=TOP_LOCAIS):
+    diferencas = _filtrar(depois).compare_to(_filtrar(antes), 'lineno')
+    diferencas = [d for d in diferencas if d.size_diff > 0][:limite]
+    return [
+        {'local': _local(d), 'kb': round(d.size_diff / 1024, 1), 'blocos': d.count_diff}
+        for d in diferencas
+    ]
+
+
+class PerfilMemoria:
+    """
+    Liga/desliga o tracemalloc e guarda as últimas medições de medir_memoria()
+    """
+
+    def __init__(self, max_medicoes=MAX_MEDICOES):
+        self._medicoes = deque(maxlen=max_medicoes)
+        self._lock = threading.Lock()
+        self._medindo = threading.Lock()
+        # Maior pico visto antes de cada reset_peak() das medições
+        self._pico_bytes = 0
+
+    @property
+    def ativo(self):
+        return tracemalloc.is_tracing()
+
+    def ativar(self, quadros=1):
+        if not tracemalloc.is_tracing():
+            with self._lock:
+                self._pico_bytes = 0
+            tracemalloc.start(quadros)
+
+    def desativar(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def medir(self, nome, detalhe=None):
+        """
+        with medir('fase', detalhe): ... (não faz nada com o tracemalloc desligado)
+        """
+        return _MedicaoMemoria(self, nome, detalhe)
+
+    def memoria_rastreada(self):
+        """
+        (atual, pico) em KB desde a ativação, ou None com o tracemalloc desligado
+        """
+        if not self.ativo:
+            return None
+        atual, pico = tracemalloc.get_traced_memory()
+        with self._lock:
+            pico = max(pico, self._pico_bytes)
+        return round(atual / 1024, 1), round(pico / 1024, 1)
+
+    def top_alocacoes(self, limite=15):
+        """
+        Linhas de código com mais memória alocada (ainda viva) desde a ativação
+        """
+        if not self.ativo:
+            return []
+        estatisticas = _filtrar(tracemalloc.take_snapshot()).statistics('lineno')[:limite]
+        return [
+            {'local': _local(e), 'kb': round(e.size / 1024, 1), 'blocos': e.count}
+            for e in estatisticas
+        ]
+
+    def medicoes(self):
+        """
+        Medições guardadas, da mais recente para a mais antiga
+        """
+        with self._lock:
+            return list(reversed(self._medicoes))
+
+    def limpar(self):
+        with self._lock:
+            self._medicoes.clear()
+
+    def _acumular_pico(self, pico):
+        with self._lock:
+            self._pico_bytes = max(self._pico_bytes, pico)
+
+    def _registrar(self, medicao):
+        with self._lock:
+            self._medicoes.append(medicao)
+
+
+perfil_memoria_global = PerfilMemoria()
+if os.environ.get('EDURADAR_PERFIL_MEMORIA', '').lower() in ('1', 'true', 'sim'):
+    perfil_memoria_global.ativar()
+
+
+def medir_memoria(nome, detalhe=None):
+    """
+    Atalho para perfil_memoria_global.medir
+    """
+    return perfil_memoria_global.medir(nome, detalhe)
@@ -0,0 +1,252 @@
+# Módulo responsável pelo processamento das planilhas em segundo plano (fila de trabalhos)
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from src.area_temporaria import obter_area_temporaria
+from src.cache_processados import obter_cache_processados
+from src.instrumentacao import medir
+from src.leitura_dados import LeitorDadosExcel, calcular_versao_arquivo
+from src.nucleo_analise import ORDEM_SITUACAO
+from src.registro_dados import registro_global
+
+NA_FILA = 'na_fila'
+PROCESSANDO = 'processando'
+PRONTO = 'pronto'
+ERRO = 'erro'
+
+LABELS_ESTADO = {
+    NA_FILA: '⏳ Na fila',
+    PROCESSANDO: '⚙️ Processando',
+    PRONTO: '✅ Pronto',
+    ERRO: '❌ Erro'
+}
+
+# Um trabalho com erro é devolvido (sem tentar de novo) por este tempo
+EXPIRACAO_ERRO_SEGUNDOS = 30
+
+_contador_trabalhos = itertools.count(1)
+
+
+class TrabalhoProcessamento:
+    """
+    Um arquivo (em uma versão) a ser lido, validado, classificado e guardado.
+
+    Quando pronto, o handle mantém a versão no registro compartilhado até a
+    sessão que pediu o trabalho trocar para ela (FilaProcessamento.liberar).
+    """
+
+    def __init__(self, caminho, bimestre, versao):
+        self.id = next(_contador_trabalhos)
+        self.caminho = caminho
+        self.bimestre = bimestre
+        self.versao = versao
+        self.estado = NA_FILA
+        self.handle = None
+        self.info_bimestre = None
+        self.erro = None
+        self.criado_em = datetime.now()
+        self.concluido_em = None
+        self.duracao_segundos = None
+        self._concluido = threading.Event()
+
+    @property
+    def concluido(self):
+        return self._concluido.is_set()
+
+    def aguardar(self, timeout=None):
+        """
+        Espera o trabalho terminar; retorna True se terminou
+        """
+        return self._concluido.wait(timeout)
+
+    def resumo(self):
+        """
+        Informações para a interface (sem o handle)
+        """
+        return {
+            'id': self.id,
+            'arquivo': self.caminho,
+            'bimestre': self.bimestre,
+            'estado': self.estado,
+            'erro': self.erro,
+            'criado_em': self.criado_em.strftime('%d/%m/%Y %H:%M:%S'),
+            'duracao_segundos': self.duracao_segundos
+        }
+
+    def __repr__(self):
+        return f"TrabalhoProcessamento(id={self.id}, caminho={self.caminho!r}, estado={self.estado!r})"
+
+
+class FilaProcessamento:
+    """
+    Fila de trabalhos atendida por threads de fundo.
+
+    Pedir de novo o mesmo arquivo na mesma versão devolve o trabalho que já
+    existe, então a interface pode chamar enviar() a cada rerun sem enfileirar
+    nada a mais. Um trabalho com erro só é devolvido por expiracao_erro_segundos
+    (depois disso a versão é tentada de novo); um trabalho pronto cujo handle já
+    foi liberado é refeito (a leitura sai do registro ou do cache em disco).
+    Threads (e não processos) porque o resultado precisa ficar no registro em
+    memória deste processo, compartilhado pelas sessões.
+    """
+
+    def __init__(self, funcao_carregar, workers=2, max_historico=50, registro=None, area_temporaria=None,
+                 expiracao_erro_segundos=EXPIRACAO_ERRO_SEGUNDOS):
+        self.funcao_carregar = funcao_carregar
+        self.max_historico = max_historico
+        self.expiracao_erro_segundos = expiracao_erro_segundos
+        self.registro = registro or registro_global
+        self.area_temporaria = area_temporaria or obter_area_temporaria()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='processamento')
+        self._lock = threading.Lock()
+        self._trabalhos = {}
+        self._por_versao = {}
+        self._etapas = []
+
+    def adicionar_etapa(self, etapa):
+        """
+        etapa(dados_processados) roda no worker depois de cada carga (ex.: gravar no SQLite)
+        """
+        with self._lock:
+            if etapa not in self._etapas:
+                self._etapas.append(etapa)
+
+    def enviar(self, caminho, bimestre):
+        """
+        Enfileira o arquivo (ou devolve o trabalho que já existe para esta versão)
+        """
+        versao = calcular_versao_arquivo(caminho, bimestre)
+        with self._lock:
+            trabalho = self._por_versao.get(versao)
+            if trabalho is not None and self._reaproveitavel(trabalho):
+                return trabalho
+
+            trabalho = TrabalhoProcessamento(caminho, bimestre, versao)
+            self._trabalhos[trabalho.id] = trabalho
+            self._por_versao[versao] = trabalho
+            self._compactar()
+
+        self._executor.submit(self._executar, trabalho)
+        return trabalho
+
+    def liberar(self, trabalho):
+        """
+        Solta o handle do trabalho pronto (a sessão já trocou para a versão).
+
+        Sem isso cada upload temporário (caminho único) deixaria a versão presa
+        no registro enquanto o trabalho estivesse no histórico.
+        """
+        with self._lock:
+            trabalho.handle = None
+
+    def obter(self, id_trabalho):
+        with self._lock:
+            return self._trabalhos.get(id_trabalho)
+
+    def trabalhos(self):
+        """
+        Trabalhos do histórico, do mais recente para o mais antigo
+        """
+        with self._lock:
+            return sorted(self._trabalhos.values(), key=lambda t: t.id, reverse=True)
+
+    def _executar(self, trabalho):
+        with medir('processamento_fundo', os.path.basename(trabalho.caminho)):
+            self._executar_trabalho(trabalho)
+
+    def _executar_trabalho(self, trabalho):
+        inicio = time.monotonic()
+        trabalho.estado = PROCESSANDO
+        try:
+            # Uploads temporários não são apagados no meio da leitura
+            with self.area_temporaria.em_uso(trabalho.caminho):
+                handle, info_bimestre = self.registro.carregar(
+                    trabalho.caminho, trabalho.bimestre, self.funcao_carregar
+                )
+            trabalho.info_bimestre = info_bimestre
+            if handle is None:
+                raise ValueError((info_bimestre or {}).get('descricao') or 'nenhuma turma encontrada')
+
+            self._validar(handle.dados)
+            with self._lock:
+                etapas = list(self._etapas)
+            for etapa in etapas:
+                with medir('etapa', getattr(etapa, '__qualname__', repr(etapa))):
+                    etapa(handle.dados)
+
+            with self._lock:
+                # Versões anteriores do mesmo arquivo não precisam mais ficar presas no registro
+                for anterior in self._trabalhos.values():
+                    if anterior.id < trabalho.id and anterior.caminho == trabalho.caminho:
+                        anterior.handle = None
+                trabalho.handle = handle
+                trabalho.estado = PRONTO
+        except Exception as e:
+            trabalho.erro = f"{type(e).__name__}: {e}"
+            trabalho.estado = ERRO
+            print(f"Processamento de {trabalho.caminho} falhou: {trabalho.erro}")
+        finally:
+            trabalho.duracao_segundos = round(time.monotonic() - inicio, 3)
+            trabalho.concluido_em = time.monotonic()
+            trabalho._concluido.set()
+
+    def _validar(self, dados):
+        """
+        Confere se o resultado pode ser mostrado (turmas com alunos e situações conhecidas)
+        """
+        turmas = dados.get('turmas') or {}
+        if not turmas:
+            raise ValueError("nenhuma turma com alunos encontrada")
+        for nome_turma, dados_turma in turmas.items():
+            for aluno in dados_turma['alunos']:
+                if aluno.get('situacao_geral') not in ORDEM_SITUACAO:
+                    raise ValueError(f"situação desconhecida para {aluno.get('nome')} em {nome_turma}")
+
+    def _reaproveitavel(self, trabalho):
+        """
+        Se enviar() pode devolver o trabalho existente da mesma versão
+        """
+        if not trabalho.concluido:
+            return True
+        if trabalho.estado == ERRO:
+            return time.monotonic() - trabalho.concluido_em < self.expiracao_erro_segundos
+        return trabalho.handle is not None
+
+    def _compactar(self):
+        """
+        Esquece os trabalhos concluídos mais antigos além do tamanho do histórico
+        e solta os handles de trabalhos cujo arquivo (ex.: temporário) já foi apagado
+        """
+        for trabalho in self._trabalhos.values():
+            if trabalho.handle is not None and not os.path.exists(trabalho.caminho):
+                trabalho.handle = None
+
+        excesso = len(self._trabalhos) - self.max_historico
+        if excesso <= 0:
+            return
+        concluidos = sorted(t.id for t in self._trabalhos.values() if t.concluido)
+        for id_trabalho in concluidos[:excesso]:
+            trabalho = self._trabalhos.pop(id_trabalho)
+            if self._por_versao.get(trabalho.versao) is trabalho:
+                del self._por_versao[trabalho.versao]
+
+
+_fila_global = None
+_fila_global_lock = threading.Lock()
+
+
+def obter_fila_processamento():
+    """
+    Fila única no processo (leitura com o cache em disco de dados processados)
+    """
+    global _fila_global
+    with _fila_global_lock:
+        if _fila_global is None:
+            carregar = obter_cache_processados().carregador(LeitorDadosExcel().obter_dados_completos)
+            _fila_global = FilaProcessamento(carregar)
+        return _fila_global
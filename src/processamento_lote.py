@@ -0,0 +1,207 @@
+# Módulo responsável pelo processamento em lote das planilhas pela linha de comando (sem Streamlit)
+#
+# Uso:
+#   python -m src.processamento_lote dados/ --saida saida/ --formato json parquet
+#   python -m src.processamento_lote "dados/NOTAS BIMESTRAIS EPT 3º bimestre.xlsx" --limite-risco 30
+#
+# Códigos de saída (para cron/scripts):
+#   0 - tudo processado
+#   1 - algum arquivo falhou
+#   2 - nenhum arquivo encontrado / argumentos inválidos
+#   3 - processado, mas alguma turma passou do --limite-risco
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from src.escrita_atomica import gravar_atomico
+
+SAIDA_OK = 0
+SAIDA_FALHA = 1
+SAIDA_SEM_ARQUIVOS = 2
+SAIDA_LIMITE_RISCO = 3
+
+FORMATOS_SAIDA = ('json', 'parquet')
+
+
+def listar_planilhas(caminhos, incluir_backups=False):
+    """
+    Expande arquivos e pastas em uma lista de planilhas .xlsx (sem temporários e travas)
+    """
+    planilhas = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            for nome in sorted(os.listdir(caminho)):
+                if not nome.endswith('.xlsx') or nome.startswith(('.', '~$')):
+                    continue
+                if nome.startswith('backup_') and not incluir_backups:
+                    continue
+                planilhas.append(os.path.join(caminho, nome))
+        elif os.path.isfile(caminho):
+            planilhas.append(caminho)
+        else:
+            print(f"Aviso: {caminho} não encontrado", file=sys.stderr)
+    return planilhas
+
+
+def processar_planilha(caminho, pasta_saida, formatos=FORMATOS_SAIDA, bimestre=None, verboso=False):
+    """
+    Processa uma planilha e grava os resultados em pasta_saida.
+    Retorna um resumo (dict simples, serializável) - nunca levanta exceção.
+    """
+    from src.leitura_dados import LeitorDadosExcel
+
+    inicio = time.monotonic()
+    resumo = {'arquivo': caminho, 'ok': False, 'saidas': []}
+    try:
+        saida_leitor = contextlib.nullcontext() if verboso else contextlib.redirect_stdout(io.StringIO())
+        with saida_leitor:
+            dados, info_bimestre = LeitorDadosExcel().obter_dados_completos(caminho, bimestre)
+
+        if not dados:
+            resumo['erro'] = info_bimestre.get('descricao', 'nenhuma turma encontrada')
+            return resumo
+
+        base = os.path.join(pasta_saida, os.path.splitext(os.path.basename(caminho))[0])
+        if 'json' in formatos:
+            conteudo = json.dumps(dados, ensure_ascii=False, default=str).encode('utf-8')
+            gravar_atomico(f"{base}.json", lambda f: f.write(conteudo))
+            resumo['saidas'].append(f"{base}.json")
+        if 'parquet' in formatos:
+            from src.exportacao import exportar
+            exportar('alunos', [dados], f"{base}.parquet")
+            resumo['saidas'].append(f"{base}.parquet")
+
+        resumo_geral = dados['resumo_geral']
+        resumo.update({
+            'ok': True,
+            'bimestre': info_bimestre.get('bimestre'),
+            'descricao': info_bimestre.get('descricao'),
+            'versao': dados.get('versao'),
+            'turmas': resumo_geral['total_turmas'],
+            'alunos': resumo_geral['total_alunos'],
+            'alto_risco': resumo_geral['alunos_risco_alto'],
+            'risco_moderado': resumo_geral['alunos_risco_moderado'],
+            'percentual_risco_turmas': {
+                nome.replace(' - IA', ''): turma['estatisticas']['percentual_risco']
+                for nome, turma in dados['turmas'].items()
+            }
+        })
+    except Exception as e:
+        resumo['erro'] = f"{type(e).__name__}: {e}"
+    finally:
+        resumo['duracao_segundos'] = round(time.monotonic() - inicio, 3)
+    return resumo
+
+
+def _processar_tarefa(tarefa):
+    return processar_planilha(*tarefa)
+
+
+def processar_lote(planilhas, pasta_saida, formatos=FORMATOS_SAIDA, bimestre=None,
+                   processos=None, verboso=False):
+    """
+    Processa várias planilhas em paralelo (uma por processo). Retorna a lista de resumos.
+    """
+    os.makedirs(pasta_saida, exist_ok=True)
+    tarefas = [(caminho, pasta_saida, tuple(formatos), bimestre, verboso) for caminho in planilhas]
+    processos = processos or min(len(tarefas), os.cpu_count() or 1)
+
+    if processos > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=processos) as pool:
+                return list(pool.map(_processar_tarefa, tarefas))
+        except (OSError, RuntimeError) as e:
+            print(f"Pool de processos indisponível ({e}); processando sequencialmente", file=sys.stderr)
+    return [_processar_tarefa(t) for t in tarefas]
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m src.processamento_lote',
+        description='Processa planilhas de notas sem abrir a interface web.'
+    )
+    parser.add_argument('caminhos', nargs='*', default=['dados/'],
+                        help='planilhas .xlsx ou pastas (padrão: dados/)')
+    parser.add_argument('--saida', default='saida/', help='pasta dos resultados (padrão: saida/)')
+    parser.add_argument('--formato', nargs='+', choices=FORMATOS_SAIDA, default=['json'],
+                        help='formatos gravados por planilha (padrão: json)')
+    parser.add_argument('--bimestre', choices=['2_bimestre', '3_bimestre', '4_bimestre'],
+                        help='forçar o formato do bimestre (padrão: detectar)')
+    parser.add_argument('--processos', type=int, default=None,
+                        help='processos em paralelo (padrão: um por CPU)')
+    parser.add_argument('--incluir-backups', action='store_true',
+                        help='processar também os backup_*.xlsx das pastas')
+    parser.add_argument('--limite-risco', type=float, default=None,
+                        help='sair com código 3 se alguma turma tiver %% de risco acima deste valor')
+    parser.add_argument('--json', action='store_true', help='imprimir o resumo em JSON')
+    parser.add_argument('--verboso', action='store_true', help='mostrar o log do processamento')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+
+    if 'parquet' in args.formato:
+        from src.exportacao import formatos_disponiveis
+        if 'parquet' not in formatos_disponiveis():
+            print("Erro: saída parquet requer o pacote pyarrow", file=sys.stderr)
+            return SAIDA_SEM_ARQUIVOS
+
+    planilhas = listar_planilhas(args.caminhos, args.incluir_backups)
+    if not planilhas:
+        print("Nenhuma planilha encontrada", file=sys.stderr)
+        return SAIDA_SEM_ARQUIVOS
+
+    inicio = time.monotonic()
+    resumos = processar_lote(planilhas, args.saida, args.formato, args.bimestre,
+                             args.processos, args.verboso)
+
+    acima_limite = []
+    if args.limite_risco is not None:
+        for resumo in resumos:
+            for turma, percentual in resumo.get('percentual_risco_turmas', {}).items():
+                if percentual > args.limite_risco:
+                    acima_limite.append({'arquivo': resumo['arquivo'], 'turma': turma, 'percentual_risco': percentual})
+
+    resumo_lote = {
+        'executado_em': datetime.now().isoformat(timespec='seconds'),
+        'duracao_segundos': round(time.monotonic() - inicio, 3),
+        'arquivos': len(resumos),
+        'falhas': sum(1 for r in resumos if not r['ok']),
+        'turmas_acima_limite': acima_limite,
+        'resultados': resumos
+    }
+    conteudo = json.dumps(resumo_lote, ensure_ascii=False, indent=1).encode('utf-8')
+    gravar_atomico(os.path.join(args.saida, 'resumo.json'), lambda f: f.write(conteudo))
+
+    if args.json:
+        print(conteudo.decode('utf-8'))
+    else:
+        for resumo in resumos:
+            if resumo['ok']:
+                print(f"OK    {resumo['arquivo']}: {resumo['descricao']} - {resumo['turmas']} turmas, "
+                      f"{resumo['alunos']} alunos, {resumo['alto_risco']} alto risco, "
+                      f"{resumo['risco_moderado']} risco moderado ({resumo['duracao_segundos']}s)")
+            else:
+                print(f"FALHA {resumo['arquivo']}: {resumo.get('erro')}")
+        for item in acima_limite:
+            print(f"RISCO {item['arquivo']}: {item['turma']} com {item['percentual_risco']}% em risco")
+        print(f"{resumo_lote['arquivos']} arquivo(s), {resumo_lote['falhas']} falha(s) "
+              f"em {resumo_lote['duracao_segundos']}s - resumo em {os.path.join(args.saida, 'resumo.json')}")
+
+    if resumo_lote['falhas']:
+        return SAIDA_FALHA
+    if acima_limite:
+        return SAIDA_LIMITE_RISCO
+    return SAIDA_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,520 @@
+# Módulo responsável pela rede de escolas: uma pasta de planilhas por escola, processadas em
+# paralelo e reunidas numa visão da rede
+#
+# Configuração (escolas.json na pasta atual, ou o caminho em EDURADAR_ESCOLAS):
+#   {"escolas": [
+#     {"id": "centro", "nome": "EPT Centro", "pasta": "escolas/centro"},
+#     {"id": "norte", "nome": "EPT Zona Norte", "pasta": "/srv/notas/norte"}
+#   ]}
+# Pastas relativas são relativas ao arquivo de configuração. Cada pasta segue o
+# padrão de dados/ (NOTAS BIMESTRAIS EPT 3º bimestre.xlsx...).
+#
+# Cada escola é um fragmento: lido e classificado num processo separado (com o
+# cache em disco por conteúdo, então uma planilha que não mudou não é lida de
+# novo) e resumido num agregado parcial com somas e contagens. Os totais da rede
+# saem da soma dos parciais, sem percorrer os alunos de novo; só as escolas cuja
+# planilha mudou são reprocessadas. Em memória ficam só os parciais: os alunos
+# de uma escola são lidos do cache em disco quando pedidos (poucas de cada vez).
+#
+# Uso pela linha de comando:
+#   python -m src.rede_escolas escolas.json --bimestre 3_bimestre
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from src.cache_processados import obter_cache_processados
+from src.catalogo_dados import ARQUIVOS_BIMESTRE, obter_catalogo
+from src.instrumentacao import medir
+from src.leitura_dados import LeitorDadosExcel, calcular_versao_arquivo
+from src.nucleo_analise import ORDEM_SITUACAO, SITUACOES_RISCO, coletar_alunos_risco
+
+ARQUIVO_CONFIGURACAO = os.environ.get('EDURADAR_ESCOLAS', 'escolas.json')
+SEPARADOR_TURMA = ' / '
+# Dados completos (alunos) de escolas mantidos em memória; o resto fica no cache em disco
+MAX_ESCOLAS_EM_MEMORIA = 4
+UCS = ('UCP 1', 'UCP 2', 'UCP 3')
+
+
+def carregar_configuracao(caminho=ARQUIVO_CONFIGURACAO):
+    """
+    Lista de escolas [{'id', 'nome', 'pasta'}] do arquivo de configuração.
+    id e nome não podem se repetir: o nome da escola entra na chave das turmas ("Escola / turma").
+    """
+    with open(caminho, encoding='utf-8') as f:
+        configuracao = json.load(f)
+
+    base = os.path.dirname(os.path.abspath(caminho))
+    escolas = []
+    ids = set()
+    nomes = set()
+    for item in configuracao.get('escolas', []):
+        if not item.get('id') or not item.get('pasta'):
+            raise ValueError(f"escola sem 'id' ou 'pasta' em {caminho}: {item}")
+        if item['id'] in ids:
+            raise ValueError(f"escola repetida em {caminho}: {item['id']}")
+        nome = item.get('nome') or item['id']
+        if nome in nomes:
+            raise ValueError(f"nome de escola repetido em {caminho}: {nome} (id {item['id']})")
+        ids.add(item['id'])
+        nomes.add(nome)
+        escolas.append({
+            'id': item['id'],
+            'nome': nome,
+            'pasta': os.path.join(base, item['pasta'])
+        })
+    if not escolas:
+        raise ValueError(f"nenhuma escola configurada em {caminho}")
+    return escolas
+
+
+def agregado_parcial(dados):
+    """
+    Somas e contagens de uma escola (um fragmento), para combinar com as de outras escolas
+    """
+    parcial = {
+        'total_turmas': 0,
+        'total_alunos': 0,
+        'contadores': {situacao: 0 for situacao in ORDEM_SITUACAO},
+        'soma_medias': 0.0,
+        'alunos_com_media': 0,
+        'ucs': {uc: {'soma_notas': 0.0, 'notas_lancadas': 0, 'soma_faltas': 0, 'alunos_risco': 0} for uc in UCS}
+    }
+    for dados_turma in dados.get('turmas', {}).values():
+        parcial['total_turmas'] += 1
+        for aluno in dados_turma['alunos']:
+            parcial['total_alunos'] += 1
+            parcial['contadores'][aluno['situacao_geral']] += 1
+            if aluno['media_geral'] > 0:
+                parcial['soma_medias'] += aluno['media_geral']
+                parcial['alunos_com_media'] += 1
+            for uc, uc_dados in aluno['ucs'].items():
+                soma = parcial['ucs'].setdefault(
+                    uc, {'soma_notas': 0.0, 'notas_lancadas': 0, 'soma_faltas': 0, 'alunos_risco': 0}
+                )
+                if uc_dados['nota'] > 0:
+                    soma['soma_notas'] += uc_dados['nota']
+                    soma['notas_lancadas'] += 1
+                    soma['soma_faltas'] += uc_dados['faltas']
+                    if aluno['situacao_por_uc'].get(uc) in SITUACOES_RISCO:
+                        soma['alunos_risco'] += 1
+    return parcial
+
+
+def combinar_parciais(parciais):
+    """
+    Soma vários agregados parciais num só (mesmo formato)
+    """
+    total = {
+        'total_turmas': 0,
+        'total_alunos': 0,
+        'contadores': {situacao: 0 for situacao in ORDEM_SITUACAO},
+        'soma_medias': 0.0,
+        'alunos_com_media': 0,
+        'ucs': {}
+    }
+    for parcial in parciais:
+        for chave in ('total_turmas', 'total_alunos', 'soma_medias', 'alunos_com_media'):
+            total[chave] += parcial[chave]
+        for situacao, quantidade in parcial['contadores'].items():
+            total['contadores'][situacao] += quantidade
+        for uc, soma in parcial['ucs'].items():
+            destino = total['ucs'].setdefault(uc, dict.fromkeys(soma, 0))
+            for chave, valor in soma.items():
+                destino[chave] += valor
+    return total
+
+
+def resumo_geral_parcial(parcial):
+    """
+    resumo_geral (mesmo formato do de uma planilha) a partir de um agregado parcial
+    """
+    contadores = parcial['contadores']
+    return {
+        'total_alunos': parcial['total_alunos'],
+        'total_turmas': parcial['total_turmas'],
+        'alunos_risco_alto': contadores['ALTO_RISCO'],
+        'alunos_risco_moderado': contadores['RISCO_MODERADO'],
+        'alunos_atencao': contadores['ATENCAO'],
+        'alunos_ok': contadores['OK']
+    }
+
+
+def _indicadores(parcial):
+    total = parcial['total_alunos']
+    em_risco = sum(parcial['contadores'][s] for s in SITUACOES_RISCO)
+    media = parcial['soma_medias'] / parcial['alunos_com_media'] if parcial['alunos_com_media'] else 0
+    return round(media, 2), round(em_risco / total * 100, 1) if total else 0
+
+
+def linhas_escolas(dados_rede):
+    """
+    Uma linha por escola (tabela da rede), calculada só com os agregados parciais
+    """
+    linhas = []
+    for escola in dados_rede['escolas'].values():
+        parcial = escola.get('parcial')
+        if parcial is None:
+            continue
+        media, percentual_risco = _indicadores(parcial)
+        contadores = parcial['contadores']
+        linhas.append({
+            'Escola': escola['nome'],
+            'Turmas': parcial['total_turmas'],
+            'Total Alunos': parcial['total_alunos'],
+            'Alto Risco': contadores['ALTO_RISCO'],
+            'Risco Moderado': contadores['RISCO_MODERADO'],
+            'Atenção': contadores['ATENCAO'],
+            'Situação OK': contadores['OK'],
+            'Média': media,
+            '% Risco': percentual_risco
+        })
+    return linhas
+
+
+def linhas_ucs(dados_rede):
+    """
+    Uma linha por UC com média, faltas e alunos em risco na rede inteira
+    """
+    linhas = []
+    for uc, soma in sorted(dados_rede['parcial']['ucs'].items()):
+        lancadas = soma['notas_lancadas']
+        linhas.append({
+            'UC': uc,
+            'Notas lançadas': lancadas,
+            'Média': round(soma['soma_notas'] / lancadas, 2) if lancadas else None,
+            'Média Faltas': round(soma['soma_faltas'] / lancadas, 1) if lancadas else None,
+            'Alunos em Risco': soma['alunos_risco']
+        })
+    return linhas
+
+
+def _ler_escola(caminho, bimestre):
+    """
+    (dados, info_bimestre) da planilha de uma escola, pelo cache em disco
+    """
+    carregar = obter_cache_processados().carregador(LeitorDadosExcel().obter_dados_completos)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return carregar(caminho, bimestre)
+
+
+def _carregar_escola(caminho, bimestre):
+    """
+    Processa a planilha de uma escola (no processo do pool); retorna (info_bimestre, parcial, turmas, erro).
+    Os alunos não voltam para o processo principal: ficam no cache em disco.
+    """
+    try:
+        dados, info_bimestre = _ler_escola(caminho, bimestre)
+        if not dados:
+            return info_bimestre, None, [], (info_bimestre or {}).get('descricao') or 'nenhuma turma encontrada'
+        return info_bimestre, agregado_parcial(dados), list(dados['turmas']), None
+    except Exception as e:
+        return None, None, [], f"{type(e).__name__}: {e}"
+
+
+class RedeEscolas:
+    """
+    Fragmentos (escola x versão da planilha) processados e a visão combinada da rede.
+
+    Os fragmentos (agregado parcial e nomes das turmas) ficam em memória por
+    versão: um rerun que não mudou nada só confere o stat das planilhas. Escolas
+    novas ou alteradas são processadas em paralelo, em processos (a leitura do
+    Excel é CPU pura e não rende em threads). Os alunos de uma escola só são
+    lidos (do cache em disco) para o detalhe dela e para a lista de risco, e no
+    máximo MAX_ESCOLAS_EM_MEMORIA escolas ficam carregadas.
+    """
+
+    def __init__(self, escolas, processos=None):
+        self.escolas = escolas
+        self.processos = processos or min(len(escolas), os.cpu_count() or 1)
+        self._lock = threading.Lock()
+        # Uma sessão processa as escolas pendentes; as outras esperam e aproveitam o resultado
+        self._processando = threading.Lock()
+        self._fragmentos = {}  # (id da escola, bimestre) -> fragmento da versão mais recente processada
+        self._visoes = {}  # bimestre -> dados da rede montados
+        self._dados = OrderedDict()  # (id da escola, bimestre) -> dados completos (LRU)
+        self._alunos_risco = {}  # bimestre -> (versão da visão, lista)
+
+    def catalogo(self, escola):
+        return obter_catalogo(escola['pasta'], ARQUIVOS_BIMESTRE)
+
+    def bimestres_disponiveis(self):
+        """
+        {bimestre: quantas escolas têm a planilha}
+        """
+        contagem = {}
+        for escola in self.escolas:
+            try:
+                bimestres = self.catalogo(escola).bimestres_disponiveis()
+            except OSError:
+                continue
+            for bimestre in bimestres:
+                contagem[bimestre] = contagem.get(bimestre, 0) + 1
+        return dict(sorted(contagem.items()))
+
+    def obter_dados(self, bimestre):
+        """
+        Visão da rede no bimestre: resumo_geral somado, o agregado parcial da rede e, em
+        'escolas', cada escola com o agregado parcial e as chaves das turmas ("Escola / turma")
+        """
+        with medir('rede_escolas', bimestre):
+            planilhas = self._planilhas(bimestre)
+            with self._processando:
+                with self._lock:
+                    pendentes = [
+                        (escola, caminho, versao) for escola, caminho, versao in planilhas
+                        if caminho and self._fragmentos.get((escola['id'], bimestre), {}).get('versao') != versao
+                    ]
+                if pendentes:
+                    self._processar(pendentes, bimestre)
+
+            assinatura = hashlib.sha1('|'.join(
+                f"{escola['id']}={versao}" for escola, _, versao in planilhas
+            ).encode('utf-8')).hexdigest()[:16]
+            with self._lock:
+                visao = self._visoes.get(bimestre)
+                if visao is None or visao['versao'] != assinatura:
+                    with medir('montar_rede'):
+                        visao = self._montar(planilhas, bimestre, assinatura)
+                    self._visoes[bimestre] = visao
+                return visao
+
+    def _planilhas(self, bimestre):
+        """
+        [(escola, caminho ou None, versão ou None)] da planilha do bimestre em cada escola
+        """
+        planilhas = []
+        for escola in self.escolas:
+            try:
+                entrada = self.catalogo(escola).bimestres_disponiveis().get(bimestre)
+            except OSError:
+                entrada = None
+            caminho = entrada['caminho'] if entrada else None
+            versao = calcular_versao_arquivo(caminho, bimestre) if caminho else None
+            planilhas.append((escola, caminho, versao))
+        return planilhas
+
+    def _processar(self, pendentes, bimestre):
+        """
+        Processa as escolas pendentes: em paralelo se houver mais de uma e mais de um processo
+        """
+        inicio = time.monotonic()
+        tarefas = [(caminho, bimestre) for _, caminho, _ in pendentes]
+        resultados = None
+        if len(tarefas) > 1 and self.processos > 1:
+            try:
+                # spawn: o servidor do Streamlit tem várias threads e um fork copiaria travas presas
+                contexto = multiprocessing.get_context('spawn')
+                with ProcessPoolExecutor(max_workers=min(self.processos, len(tarefas)), mp_context=contexto) as pool:
+                    resultados = list(pool.map(_carregar_escola, *zip(*tarefas)))
+            except (OSError, RuntimeError) as e:
+                print(f"Pool de processos indisponível ({e}); processando as escolas sequencialmente")
+        if resultados is None:
+            resultados = []
+            for caminho, bim in tarefas:
+                with medir('escola', caminho):
+                    resultados.append(_carregar_escola(caminho, bim))
+
+        duracao = round(time.monotonic() - inicio, 3)
+        with self._lock:
+            for (escola, caminho, versao), (info_bimestre, parcial, turmas, erro) in zip(pendentes, resultados):
+                self._fragmentos[(escola['id'], bimestre)] = {
+                    'versao': versao,
+                    'caminho': caminho,
+                    'info_bimestre': info_bimestre,
+                    'parcial': parcial,
+                    'turmas': turmas,
+                    'erro': erro
+                }
+                self._dados.pop((escola['id'], bimestre), None)
+        print(f"Rede de escolas: {len(pendentes)} escola(s) processada(s) em {duracao}s")
+
+    def _montar(self, planilhas, bimestre, assinatura):
+        """
+        Junta os fragmentos (só agregados parciais: nenhum aluno é percorrido)
+        """
+        escolas = {}
+        parciais = []
+        descricao = None
+        for escola, caminho, versao in planilhas:
+            fragmento = self._fragmentos.get((escola['id'], bimestre))
+            if caminho is None or fragmento is None:
+                escolas[escola['id']] = {'nome': escola['nome'], 'turmas': [], 'parcial': None,
+                                         'erro': 'planilha do bimestre não encontrada'}
+                continue
+
+            chaves = [f"{escola['nome']}{SEPARADOR_TURMA}{nome_turma}" for nome_turma in fragmento['turmas']]
+            if fragmento['parcial'] is not None:
+                parciais.append(fragmento['parcial'])
+                descricao = descricao or (fragmento['info_bimestre'] or {}).get('descricao')
+            escolas[escola['id']] = {
+                'nome': escola['nome'],
+                'caminho': caminho,
+                'versao': versao,
+                'turmas': chaves,
+                'parcial': fragmento['parcial'],
+                'erro': fragmento['erro']
+            }
+
+        parcial_rede = combinar_parciais(parciais)
+        carregadas = len(parciais)
+        return {
+            'info_bimestre': {
+                'bimestre': bimestre,
+                'descricao': f"{descricao or bimestre} - rede com {carregadas} de {len(planilhas)} escolas",
+                'turmas_carregadas': parcial_rede['total_turmas']
+            },
+            'versao': assinatura,
+            'resumo_geral': resumo_geral_parcial(parcial_rede),
+            'parcial': parcial_rede,
+            'escolas': escolas
+        }
+
+    def dados_escola(self, id_escola, bimestre):
+        """
+        Dados processados (formato de uma planilha) de uma escola, ou None.
+        Lidos do cache em disco na primeira vez; só as últimas MAX_ESCOLAS_EM_MEMORIA ficam em memória.
+        """
+        chave = (id_escola, bimestre)
+        with self._lock:
+            fragmento = self._fragmentos.get(chave)
+            if fragmento is None or fragmento['parcial'] is None:
+                return None
+            dados = self._dados.get(chave)
+            if dados is not None:
+                self._dados.move_to_end(chave)
+                return dados
+
+        with medir('dados_escola', id_escola):
+            try:
+                dados, _ = _ler_escola(fragmento['caminho'], bimestre)
+            except Exception as e:
+                print(f"Rede de escolas: não foi possível ler {fragmento['caminho']}: {e}")
+                return None
+        if not dados:
+            return None
+
+        with self._lock:
+            self._dados[chave] = dados
+            self._dados.move_to_end(chave)
+            while len(self._dados) > MAX_ESCOLAS_EM_MEMORIA:
+                self._dados.popitem(last=False)
+        return dados
+
+    def alunos_risco(self, dados_rede):
+        """
+        Alunos em risco de toda a rede (turma como "Escola / turma"), do mais grave para o menos grave.
+        Lê uma escola por vez; a lista fica guardada até a visão da rede mudar.
+        """
+        bimestre = dados_rede['info_bimestre']['bimestre']
+        with self._lock:
+            guardado = self._alunos_risco.get(bimestre)
+        if guardado is not None and guardado[0] == dados_rede['versao']:
+            return guardado[1]
+
+        alunos = []
+        for id_escola, escola in dados_rede['escolas'].items():
+            dados = self.dados_escola(id_escola, bimestre) if escola['parcial'] is not None else None
+            if dados is None:
+                continue
+            for aluno in coletar_alunos_risco(dados):
+                aluno['nome_turma'] = f"{escola['nome']}{SEPARADOR_TURMA}{aluno['nome_turma']}"
+                alunos.append(aluno)
+        alunos.sort(key=lambda x: (ORDEM_SITUACAO.index(x['situacao_geral']), x['media_geral']))
+
+        with self._lock:
+            self._alunos_risco[bimestre] = (dados_rede['versao'], alunos)
+        return alunos
+
+
+_redes = {}
+_redes_lock = threading.Lock()
+
+
+def obter_rede_escolas(caminho_configuracao=ARQUIVO_CONFIGURACAO):
+    """
+    Rede (compartilhada no processo) do arquivo de configuração, ou None se ele não existe.
+    O arquivo é relido quando muda.
+    """
+    try:
+        mtime = os.stat(caminho_configuracao).st_mtime_ns
+    except OSError:
+        return None
+    chave = os.path.abspath(caminho_configuracao)
+    with _redes_lock:
+        rede, mtime_rede = _redes.get(chave, (None, None))
+        if rede is None or mtime_rede != mtime:
+            rede = RedeEscolas(carregar_configuracao(caminho_configuracao))
+            _redes[chave] = (rede, mtime)
+        return rede
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m src.rede_escolas',
+        description='Processa as planilhas de todas as escolas da rede e mostra o resumo por escola.'
+    )
+    parser.add_argument('configuracao', nargs='?', default=ARQUIVO_CONFIGURACAO,
+                        help=f"arquivo com as escolas (padrão: {ARQUIVO_CONFIGURACAO})")
+    parser.add_argument('--bimestre', choices=list(ARQUIVOS_BIMESTRE),
+                        help='bimestre (padrão: o disponível em mais escolas)')
+    parser.add_argument('--processos', type=int, default=None, help='processos em paralelo (padrão: um por CPU)')
+    parser.add_argument('--json', action='store_true', help='imprimir o resumo em JSON')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    try:
+        rede = RedeEscolas(carregar_configuracao(args.configuracao), args.processos)
+    except (OSError, ValueError) as e:
+        print(f"Erro na configuração das escolas: {e}", file=sys.stderr)
+        return 2
+
+    bimestre = args.bimestre
+    if bimestre is None:
+        disponiveis = rede.bimestres_disponiveis()
+        if not disponiveis:
+            print("Nenhuma planilha de bimestre encontrada nas pastas das escolas", file=sys.stderr)
+            return 2
+        bimestre = max(disponiveis, key=lambda b: (disponiveis[b], b))
+
+    inicio = time.monotonic()
+    dados_rede = rede.obter_dados(bimestre)
+    duracao = round(time.monotonic() - inicio, 3)
+    falhas = {id_escola: e['erro'] for id_escola, e in dados_rede['escolas'].items() if e['erro']}
+
+    if args.json:
+        print(json.dumps({
+            'bimestre': bimestre,
+            'duracao_segundos': duracao,
+            'resumo_geral': dados_rede['resumo_geral'],
+            'escolas': linhas_escolas(dados_rede),
+            'ucs': linhas_ucs(dados_rede),
+            'falhas': falhas
+        }, ensure_ascii=False, indent=1))
+    else:
+        print(dados_rede['info_bimestre']['descricao'])
+        for linha in linhas_escolas(dados_rede):
+            print(f"  {linha['Escola']}: {linha['Turmas']} turmas, {linha['Total Alunos']} alunos, "
+                  f"{linha['Alto Risco']} alto risco, média {linha['Média']}, {linha['% Risco']}% em risco")
+        for id_escola, erro in falhas.items():
+            print(f"  FALHA {id_escola}: {erro}")
+        resumo = dados_rede['resumo_geral']
+        print(f"Rede: {resumo['total_turmas']} turmas, {resumo['total_alunos']} alunos, "
+              f"{resumo['alunos_risco_alto']} alto risco, {resumo['alunos_risco_moderado']} risco moderado "
+              f"({duracao}s)")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
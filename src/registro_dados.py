@@ -0,0 +1,159 @@
+# Módulo responsável pelo registro compartilhado (entre sessões) dos dados processados
+
+import threading
+import time
+import weakref
+
+from src.instrumentacao import contar
+from src.leitura_dados import calcular_versao_arquivo
+
+
+class HandleDataset:
+    """
+    Referência leve a uma versão do registro; é isso que fica no st.session_state.
+
+    Enquanto existir algum handle vivo a versão não é descartada do registro.
+    Quando a sessão termina o handle é coletado e a versão pode sair por LRU.
+    """
+
+    def __init__(self, registro, versao, caminho, bimestre):
+        self._registro = registro
+        self.versao = versao
+        self.caminho = caminho
+        self.bimestre = bimestre
+
+    @property
+    def dados(self):
+        """
+        Dados processados compartilhados (somente leitura!)
+        """
+        return self._registro.obter(self)
+
+    def __repr__(self):
+        return f"HandleDataset(versao={self.versao!r}, caminho={self.caminho!r})"
+
+
+class RegistroDatasets:
+    """
+    Registro único no processo com os datasets processados, por versão.
+
+    Todas as sessões que abrem o mesmo arquivo compartilham o mesmo objeto em
+    memória; a sessão guarda só um HandleDataset. Os dados compartilhados são
+    tratados como imutáveis: filtros e ordenações das páginas montam listas
+    novas (nucleo_analise.filtrar_ordenar_alunos) sem alterar o dataset.
+    """
+
+    def __init__(self, max_versoes_sem_uso=4):
+        self.max_versoes_sem_uso = max_versoes_sem_uso
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self._carregando = {}
+
+    def carregar(self, caminho, bimestre, funcao_carregar):
+        """
+        Retorna (handle, info_bimestre) da versão atual do arquivo.
+
+        Se outra sessão já processou essa versão, nada é lido do disco.
+        funcao_carregar(caminho, bimestre) -> (dados_processados, info_bimestre)
+        """
+        versao = calcular_versao_arquivo(caminho, bimestre)
+
+        with self._lock:
+            entrada = self._entradas.get(versao)
+            if entrada is None:
+                # Só uma sessão processa cada versão; as outras esperam o resultado
+                trava = self._carregando.setdefault(versao, threading.Lock())
+            else:
+                trava = None
+
+        if trava is None:
+            contar('registro.acerto')
+        else:
+            versao_pedida = versao
+            with trava:
+                try:
+                    with self._lock:
+                        entrada = self._entradas.get(versao)
+                    if entrada is None:
+                        contar('registro.falha')
+                        dados, info = funcao_carregar(caminho, bimestre)
+                        if not dados:
+                            return None, info
+                        # O arquivo pode ter sido trocado entre o stat e a leitura;
+                        # vale a versão efetivamente lida
+                        versao = dados.get('versao') or versao
+                        dados['versao'] = versao
+                        with self._lock:
+                            entrada = self._entradas.get(versao)
+                        if entrada is None:
+                            entrada = self._registrar(versao, dados, info)
+                finally:
+                    with self._lock:
+                        if self._carregando.get(versao_pedida) is trava:
+                            del self._carregando[versao_pedida]
+
+        handle = HandleDataset(self, versao, caminho, bimestre)
+        with self._lock:
+            entrada['handles'].add(handle)
+            entrada['ultimo_uso'] = time.monotonic()
+        return handle, entrada['info_bimestre']
+
+    def obter(self, handle):
+        """
+        Dados da versão apontada pelo handle (None se a versão foi descartada)
+        """
+        with self._lock:
+            entrada = self._entradas.get(handle.versao)
+            if entrada is not None:
+                entrada['ultimo_uso'] = time.monotonic()
+                entrada['handles'].add(handle)
+                return entrada['dados']
+        return None
+
+    def versoes(self):
+        """
+        Resumo das versões em memória (para a página de configurações)
+        """
+        with self._lock:
+            return [
+                {
+                    'versao': versao,
+                    'descricao': entrada['info_bimestre'].get('descricao', 'N/A'),
+                    'sessoes': len(entrada['handles']),
+                    'ultimo_uso': entrada['ultimo_uso']
+                }
+                for versao, entrada in self._entradas.items()
+            ]
+
+    def dados_por_versao(self):
+        """
+        {versão: dados processados} das versões em memória (para medir o uso de memória)
+        """
+        with self._lock:
+            return {versao: entrada['dados'] for versao, entrada in self._entradas.items()}
+
+    def _registrar(self, versao, dados, info_bimestre):
+        entrada = {
+            'dados': dados,
+            'info_bimestre': info_bimestre,
+            'handles': weakref.WeakSet(),
+            'ultimo_uso': time.monotonic()
+        }
+        with self._lock:
+            self._entradas[versao] = entrada
+            self._compactar()
+        return entrada
+
+    def _compactar(self):
+        """
+        Descarta as versões mais antigas que nenhuma sessão está usando
+        """
+        sem_uso = [(e['ultimo_uso'], v) for v, e in self._entradas.items() if len(e['handles']) == 0]
+        excesso = len(sem_uso) - self.max_versoes_sem_uso
+        if excesso > 0:
+            for _, versao in sorted(sem_uso)[:excesso]:
+                del self._entradas[versao]
+
+
+# Registro único do processo (compartilhado por todas as sessões do Streamlit)
+registro_global = RegistroDatasets()
@@ -0,0 +1,257 @@
+# Módulo responsável pelos relatórios impressos por turma (HTML autocontido, gerados em lote)
+
+import html
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from src.escrita_atomica import gravar_atomico
+from src.nucleo_analise import (
+    CORES_SITUACAO, LABELS_SITUACAO, SITUACOES_RISCO, calcular_estatisticas_uc, nome_turma_exibicao, ucs_dos_alunos
+)
+
+# Cada relatório leva ~1 ms; abaixo disso por processo, subir o pool custa mais que gerar
+TURMAS_POR_PROCESSO = 16
+
+ESTILO = """
+body { font-family: Arial, Helvetica, sans-serif; color: #333; margin: 24px; }
+h1 { margin-bottom: 4px; }
+.subtitulo { color: #666; margin-top: 0; }
+.metricas { display: flex; gap: 12px; margin: 16px 0; }
+.metrica { flex: 1; border: 1px solid #ddd; border-radius: 8px; padding: 10px; }
+.metrica .valor { font-size: 1.6em; font-weight: bold; }
+.metrica .rotulo { color: #666; font-size: 0.85em; }
+table { border-collapse: collapse; width: 100%; margin: 8px 0 16px; font-size: 0.9em; }
+th, td { border: 1px solid #ddd; padding: 4px 6px; text-align: left; }
+th { background: #f0f2f6; }
+.situacao { display: inline-block; width: 10px; height: 10px; border-radius: 2px; margin-right: 4px; }
+.rodape { color: #999; font-size: 0.8em; margin-top: 24px; }
+@media print { body { margin: 0; } h2 { page-break-after: avoid; } table { page-break-inside: auto; } }
+"""
+
+
+# ===== Relatório de uma turma =====
+
+def gerar_relatorio_turma(nome_turma, dados_turma, info_bimestre, gerado_em=None):
+    """
+    HTML autocontido (CSS e gráficos SVG embutidos) com resumo, estatísticas por UC
+    e lista de alunos em risco de uma turma
+    """
+    alunos = dados_turma['alunos']
+    stats = dados_turma['estatisticas']
+    contadores = stats['contadores_situacao']
+    turma = nome_turma_exibicao(nome_turma)
+    gerado_em = gerado_em or datetime.now().strftime('%d/%m/%Y %H:%M')
+
+    estatisticas_ucs = {uc: calcular_estatisticas_uc(alunos, uc) for uc in ucs_dos_alunos(alunos)}
+    alunos_risco = sorted(
+        (a for a in alunos if a['situacao_geral'] in SITUACOES_RISCO),
+        key=lambda a: (a['situacao_geral'] != 'ALTO_RISCO', a['media_geral'])
+    )
+    alunos_problema = contadores['ALTO_RISCO'] + contadores['RISCO_MODERADO']
+
+    partes = [
+        '<!DOCTYPE html>',
+        '<html lang="pt-BR"><head><meta charset="utf-8">',
+        f'<title>Conselho de Classe - {_e(turma)}</title>',
+        f'<style>{ESTILO}</style></head><body>',
+        f'<h1>Conselho de Classe - {_e(turma)}</h1>',
+        f'<p class="subtitulo">{_e(info_bimestre.get("descricao", "N/A"))}</p>',
+        '<div class="metricas">',
+        _metrica('Total de Alunos', stats['total_alunos']),
+        _metrica('Média da Turma', f"{stats['media_turma']:.1f}"),
+        _metrica('% em Risco', f"{stats['percentual_risco']:.1f}%"),
+        _metrica('Alunos Problemáticos', alunos_problema),
+        '</div>',
+        '<h2>Situação dos alunos</h2>',
+        _svg_barras_situacao(contadores),
+        '<h2>Análise por UC</h2>',
+        _tabela_ucs(estatisticas_ucs),
+        _svg_medias_ucs(estatisticas_ucs),
+        f'<h2>Alunos em risco ({len(alunos_risco)})</h2>',
+        _tabela_alunos_risco(alunos_risco),
+        f'<p class="rodape">Gerado em {_e(gerado_em)}</p>',
+        '</body></html>'
+    ]
+    return '\n'.join(partes)
+
+
+def _e(texto):
+    return html.escape(str(texto))
+
+
+def _metrica(rotulo, valor):
+    return (f'<div class="metrica"><div class="valor">{_e(valor)}</div>'
+            f'<div class="rotulo">{_e(rotulo)}</div></div>')
+
+
+def _marcador_situacao(situacao):
+    return (f'<span class="situacao" style="background:{CORES_SITUACAO.get(situacao, "#999")}"></span>'
+            f'{_e(LABELS_SITUACAO.get(situacao, situacao))}')
+
+
+def _tabela_ucs(estatisticas_ucs):
+    linhas = ['<table><tr><th>UC</th><th>Média</th><th>Maior nota</th><th>Menor nota</th>'
+              '<th>Média de faltas</th><th>Alto risco</th><th>Risco moderado</th>'
+              '<th>Atenção</th><th>OK</th></tr>']
+    for uc, est in estatisticas_ucs.items():
+        if est is None:
+            linhas.append(f'<tr><td>{_e(uc)}</td><td colspan="8">Nenhuma nota lançada</td></tr>')
+            continue
+        c = est['contadores']
+        linhas.append(
+            f"<tr><td>{_e(uc)}</td><td>{est['media']:.1f}</td><td>{est['maior_nota']:.1f}</td>"
+            f"<td>{est['menor_nota']:.1f}</td><td>{est['media_faltas']:.1f}</td>"
+            f"<td>{c['ALTO_RISCO']}</td><td>{c['RISCO_MODERADO']}</td><td>{c['ATENCAO']}</td><td>{c['OK']}</td></tr>"
+        )
+    linhas.append('</table>')
+    return ''.join(linhas)
+
+
+def _tabela_alunos_risco(alunos_risco):
+    if not alunos_risco:
+        return '<p>Nenhum aluno em risco nesta turma.</p>'
+    linhas = ['<table><tr><th>#</th><th>Nome</th><th>Situação</th><th>Média</th>'
+              '<th>Faltas</th><th>UCs em risco</th></tr>']
+    for i, aluno in enumerate(alunos_risco, 1):
+        ucs_risco = '; '.join(
+            f"{uc} (nota {aluno['ucs'][uc]['nota']:.1f}, {aluno['ucs'][uc]['faltas']:g} faltas)"
+            for uc, situacao in aluno['situacao_por_uc'].items()
+            if situacao in SITUACOES_RISCO
+        )
+        linhas.append(
+            f"<tr><td>{i}</td><td>{_e(aluno['nome'])}</td><td>{_marcador_situacao(aluno['situacao_geral'])}</td>"
+            f"<td>{aluno['media_geral']:.1f}</td><td>{aluno['total_faltas']:g}</td><td>{_e(ucs_risco)}</td></tr>"
+        )
+    linhas.append('</table>')
+    return ''.join(linhas)
+
+
+# ===== Gráficos SVG (sem dependências) =====
+
+def _svg_barras_situacao(contadores, largura=640, altura_barra=26):
+    total = max(sum(contadores.values()), 1)
+    largura_rotulo = 130
+    largura_util = largura - largura_rotulo - 60
+    altura = altura_barra * len(contadores) + 10
+    partes = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura}" height="{altura}" '
+              f'role="img" aria-label="Situação dos alunos">']
+    for i, (situacao, quantidade) in enumerate(contadores.items()):
+        y = 5 + i * altura_barra
+        largura_barra = largura_util * quantidade / total
+        partes.append(
+            f'<text x="0" y="{y + altura_barra * 0.65:.0f}" font-size="13">{_e(LABELS_SITUACAO[situacao])}</text>'
+            f'<rect x="{largura_rotulo}" y="{y + 3}" width="{largura_barra:.1f}" height="{altura_barra - 8}" '
+            f'fill="{CORES_SITUACAO[situacao]}"/>'
+            f'<text x="{largura_rotulo + largura_barra + 6:.1f}" y="{y + altura_barra * 0.65:.0f}" '
+            f'font-size="13">{quantidade} ({100 * quantidade / total:.0f}%)</text>'
+        )
+    partes.append('</svg>')
+    return ''.join(partes)
+
+
+def _svg_medias_ucs(estatisticas_ucs, largura=640, altura=220):
+    medias = [(uc, est['media']) for uc, est in estatisticas_ucs.items() if est is not None]
+    if not medias:
+        return ''
+    base = altura - 30
+    escala = (base - 20) / 10.0
+    largura_coluna = (largura - 40) / len(medias)
+    partes = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{largura}" height="{altura}" '
+              f'role="img" aria-label="Média por UC">',
+              f'<line x1="30" y1="{base}" x2="{largura}" y2="{base}" stroke="#999"/>']
+    # Linhas de referência nas notas 5 e 7 (limites de risco)
+    for nota, cor in ((5, '#FF4B4B'), (7, '#FFA500')):
+        y = base - nota * escala
+        partes.append(f'<line x1="30" y1="{y:.1f}" x2="{largura}" y2="{y:.1f}" stroke="{cor}" '
+                      f'stroke-dasharray="4 3"/><text x="0" y="{y + 4:.1f}" font-size="11">{nota}</text>')
+    for i, (uc, media) in enumerate(medias):
+        x = 40 + i * largura_coluna + largura_coluna * 0.2
+        largura_barra = largura_coluna * 0.6
+        altura_barra = media * escala
+        partes.append(
+            f'<rect x="{x:.1f}" y="{base - altura_barra:.1f}" width="{largura_barra:.1f}" '
+            f'height="{altura_barra:.1f}" fill="#667eea"/>'
+            f'<text x="{x + largura_barra / 2:.1f}" y="{base - altura_barra - 4:.1f}" font-size="12" '
+            f'text-anchor="middle">{media:.1f}</text>'
+            f'<text x="{x + largura_barra / 2:.1f}" y="{base + 18}" font-size="12" '
+            f'text-anchor="middle">{_e(uc)}</text>'
+        )
+    partes.append('</svg>')
+    return ''.join(partes)
+
+
+# ===== Geração em lote =====
+
+def _gerar_tarefa(tarefa):
+    nome_turma, dados_turma, info_bimestre, gerado_em = tarefa
+    return nome_arquivo_relatorio(nome_turma), gerar_relatorio_turma(nome_turma, dados_turma, info_bimestre, gerado_em)
+
+
+def nome_arquivo_relatorio(nome_turma):
+    nome = nome_turma.replace(' - IA', '').replace('º', '').strip()
+    return ''.join(c if c.isalnum() else '_' for c in nome).strip('_') + '.html'
+
+
+def _indice(info_bimestre, nomes_arquivos, gerado_em):
+    itens = ''.join(f'<li><a href="{_e(arquivo)}">{_e(turma)}</a></li>' for turma, arquivo in nomes_arquivos)
+    return (f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8">'
+            f'<title>Relatórios por turma</title><style>{ESTILO}</style></head><body>'
+            f'<h1>Relatórios por turma</h1><p class="subtitulo">{_e(info_bimestre.get("descricao", "N/A"))}</p>'
+            f'<ul>{itens}</ul><p class="rodape">Gerado em {_e(gerado_em)}</p></body></html>')
+
+
+def escrever_relatorios_zip(f, dados_processados, processos=None):
+    """
+    Gera o relatório de cada turma em paralelo (pool de processos) e grava
+    tudo em um zip no arquivo binário f. Retorna o número de relatórios.
+    """
+    info_bimestre = dados_processados.get('info_bimestre', {})
+    gerado_em = datetime.now().strftime('%d/%m/%Y %H:%M')
+    tarefas = [
+        (nome_turma, dados_turma, info_bimestre, gerado_em)
+        for nome_turma, dados_turma in dados_processados.get('turmas', {}).items()
+    ]
+    if processos is None:
+        processos = min(os.cpu_count() or 1, -(-len(tarefas) // TURMAS_POR_PROCESSO))
+
+    if processos > 1:
+        try:
+            # spawn: o servidor do Streamlit tem várias threads e um fork copiaria travas presas
+            contexto = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as pool:
+                resultados = list(pool.map(_gerar_tarefa, tarefas,
+                                           chunksize=max(1, len(tarefas) // (processos * 4))))
+        except (OSError, RuntimeError) as e:
+            # Ambientes sem multiprocessing (ex.: sandbox): gera na thread atual
+            print(f"Pool de processos indisponível ({e}); gerando relatórios sequencialmente")
+            resultados = [_gerar_tarefa(t) for t in tarefas]
+    else:
+        resultados = [_gerar_tarefa(t) for t in tarefas]
+
+    with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for nome_arquivo, conteudo in resultados:
+            zf.writestr(nome_arquivo, conteudo)
+        zf.writestr('index.html', _indice(
+            info_bimestre,
+            [(t[0].replace(' - IA', ''), nome_arquivo) for t, (nome_arquivo, _) in zip(tarefas, resultados)],
+            gerado_em
+        ))
+    return len(resultados)
+
+
+def gerar_relatorios_zip(dados_processados, caminho_zip, processos=None):
+    """
+    Grava o zip com os relatórios de todas as turmas (gravação atômica).
+    Retorna {'relatorios', 'caminho', 'duracao_segundos'}.
+    """
+    inicio = time.monotonic()
+    total = gravar_atomico(caminho_zip, lambda f: escrever_relatorios_zip(f, dados_processados, processos))
+    return {
+        'relatorios': total,
+        'caminho': caminho_zip,
+        'duracao_segundos': round(time.monotonic() - inicio, 3)
+    }
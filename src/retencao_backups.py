@@ -0,0 +1,146 @@
+# Módulo responsável pela política de retenção e compactação dos backups
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class PoliticaRetencao:
+    """
+    Decide quais backups ficam.
+
+    Padrão: todos os de hoje, o último de cada dia nos últimos 30 dias e,
+    para sempre, o último de cada bimestre.
+    """
+
+    def __init__(self, manter_hoje=True, dias_diarios=30, um_por_bimestre=True):
+        self.manter_hoje = manter_hoje
+        self.dias_diarios = dias_diarios
+        self.um_por_bimestre = um_por_bimestre
+
+    def selecionar(self, entradas, agora=None):
+        """
+        Retorna o conjunto de ids (id(entrada)) dos backups que devem ser mantidos
+        """
+        agora = agora or datetime.now()
+        hoje = agora.date()
+        limite_diario = hoje - timedelta(days=self.dias_diarios)
+
+        manter = set()
+        ultimo_por_dia = {}
+        ultimo_por_bimestre = {}
+
+        for entrada in entradas:
+            data = self._data_entrada(entrada)
+            if data is None:
+                # Sem data reconhecível: não arriscar apagar
+                manter.add(id(entrada))
+                continue
+
+            if self.manter_hoje and data.date() == hoje:
+                manter.add(id(entrada))
+
+            if data.date() > limite_diario:
+                chave_dia = (self._grupo(entrada), data.date())
+                if chave_dia not in ultimo_por_dia or data > ultimo_por_dia[chave_dia][0]:
+                    ultimo_por_dia[chave_dia] = (data, entrada)
+
+            if self.um_por_bimestre:
+                chave_bim = self._grupo(entrada)
+                if chave_bim not in ultimo_por_bimestre or data > ultimo_por_bimestre[chave_bim][0]:
+                    ultimo_por_bimestre[chave_bim] = (data, entrada)
+
+        manter.update(id(entrada) for _, entrada in ultimo_por_dia.values())
+        manter.update(id(entrada) for _, entrada in ultimo_por_bimestre.values())
+        return manter
+
+    def _grupo(self, entrada):
+        # Backups antigos importados não têm bimestre: agrupar pelo nome do arquivo
+        return entrada.get('bimestre') or entrada.get('nome_arquivo')
+
+    def _data_entrada(self, entrada):
+        try:
+            return datetime.strptime(entrada['timestamp'], '%Y%m%d_%H%M%S')
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+class CompactadorBackups:
+    """
+    Aplica a política de retenção em uma thread de fundo.
+
+    Só uma compactação roda por vez por repositório; pedir outra enquanto uma
+    está rodando não faz nada. O resultado (bytes liberados etc.) fica em
+    status() para a interface mostrar quando quiser.
+    """
+
+    def __init__(self, repositorio, politica=None):
+        self.repositorio = repositorio
+        self.politica = politica or PoliticaRetencao()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ultimo_resultado = None
+
+    def iniciar_em_segundo_plano(self, incluir_legados=False):
+        """
+        Dispara a compactação sem bloquear; retorna False se já havia uma rodando
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(
+                target=self._executar,
+                args=(incluir_legados,),
+                name='compactacao-backups',
+                daemon=True
+            )
+            self._thread.start()
+            return True
+
+    def compactar(self, incluir_legados=False):
+        """
+        Executa a compactação na thread atual e retorna o resultado
+        """
+        inicio = time.monotonic()
+        importacao = {'importados': 0, 'bytes_liberados': 0}
+        if incluir_legados:
+            importacao = self.repositorio.importar_backups_legados()
+
+        resultado = self.repositorio.manter_somente(self.politica)
+        resultado['legados_importados'] = importacao['importados']
+        resultado['bytes_liberados'] += importacao['bytes_liberados']
+        resultado['duracao_segundos'] = round(time.monotonic() - inicio, 3)
+        resultado['concluido_em'] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        return resultado
+
+    def status(self):
+        """
+        {'executando': bool, 'ultimo_resultado': dict ou None}
+        """
+        return {
+            'executando': self._thread is not None and self._thread.is_alive(),
+            'ultimo_resultado': self._ultimo_resultado
+        }
+
+    def _executar(self, incluir_legados):
+        try:
+            self._ultimo_resultado = self.compactar(incluir_legados)
+        except Exception as e:
+            self._ultimo_resultado = {'erro': str(e),
+                                      'concluido_em': datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+        print(f"Compactação de backups: {self._ultimo_resultado}")
+
+
+_compactadores = {}
+_compactadores_lock = threading.Lock()
+
+
+def obter_compactador(repositorio):
+    """
+    Compactador único (no processo) para o repositório informado
+    """
+    with _compactadores_lock:
+        chave = repositorio.caminho_manifesto
+        if chave not in _compactadores:
+            _compactadores[chave] = CompactadorBackups(repositorio)
+        return _compactadores[chave]
@@ -0,0 +1,409 @@
+# Módulo responsável pela API HTTP local (JSON) com os dados processados das planilhas
+#
+# Uso:
+#   python -m src.servidor_api --porta 8765
+#
+# Rotas (GET ou HEAD, respostas JSON):
+#   /api/bimestres                       bimestres disponíveis e a versão de cada um
+#   /api/<bimestre>/resumo               resumo geral do bimestre
+#   /api/<bimestre>/turmas               estatísticas de cada turma
+#   /api/<bimestre>/turmas/<turma>       estatísticas e alunos de uma turma
+#   /api/<bimestre>/alunos               alunos de todas as turmas (?situacao=ALTO_RISCO,ATENCAO&turma=...)
+#   /api/<bimestre>/risco                alunos em risco com as UCs em risco
+#   /api/<bimestre>/comparacao/<outro>   o que mudou do bimestre <outro> para <bimestre>
+# <bimestre> é o código (ex.: 3_bimestre) ou "atual" (o último disponível).
+#
+# Toda resposta tem um ETag derivado da versão do dataset. A versão sai só de um
+# stat no arquivo, então um If-None-Match ainda válido recebe 304 sem que nada
+# seja lido ou processado; clientes que fazem polling praticamente não custam nada.
+
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from src.cache_processados import obter_cache_processados
+from src.catalogo_dados import obter_catalogo, ARQUIVOS_BIMESTRE
+from src.instrumentacao import medir
+from src.leitura_dados import LeitorDadosExcel, calcular_versao_arquivo
+from src.nucleo_analise import ORDEM_SITUACAO, coletar_alunos_risco, nome_turma_exibicao, percentual_situacao_boa
+from src.registro_dados import registro_global
+
+PASTA_DADOS = 'dados/'
+PORTA_PADRAO = 8765
+# Respostas menores que isso não compensam a compressão
+TAMANHO_MINIMO_GZIP = 1024
+MAX_RESPOSTAS = 256
+
+
+class ErroApi(Exception):
+    """
+    Erro devolvido ao cliente como {'erro': mensagem} com o status HTTP informado
+    """
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class RespostaPronta:
+    """
+    Corpo JSON de uma rota em uma versão, serializado e comprimido uma única vez
+    """
+
+    __slots__ = ('etag', 'corpo', 'corpo_gzip')
+
+    def __init__(self, etag, conteudo):
+        self.etag = etag
+        self.corpo = json.dumps(conteudo, ensure_ascii=False, default=str).encode('utf-8')
+        self.corpo_gzip = None
+        if len(self.corpo) >= TAMANHO_MINIMO_GZIP:
+            self.corpo_gzip = gzip.compress(self.corpo, compresslevel=6)
+
+
+class ServicoDadosNotas:
+    """
+    Resolve as rotas da API sobre o registro compartilhado (sem nada de HTTP).
+
+    As respostas prontas ficam em um LRU indexado pelo ETag; o dataset de cada
+    bimestre é processado uma vez por versão (registro_global evita que
+    requisições simultâneas processem o mesmo arquivo duas vezes).
+    """
+
+    def __init__(self, pasta_dados=PASTA_DADOS, max_respostas=MAX_RESPOSTAS, verboso=False):
+        self.catalogo = obter_catalogo(pasta_dados, ARQUIVOS_BIMESTRE)
+        # Planilhas já processadas (pela interface ou pelo monitor da pasta) saem do cache em disco
+        self.carregar = obter_cache_processados().carregador(LeitorDadosExcel().obter_dados_completos)
+        self.max_respostas = max_respostas
+        self.verboso = verboso
+        self._lock = threading.Lock()
+        self._respostas = OrderedDict()
+        # Um handle por bimestre mantém no registro a versão que está sendo servida
+        self._handles = {}
+
+    def responder(self, caminho_url, etags_cliente=()):
+        """
+        (status, etag, RespostaPronta). Se o cliente já tem o ETag atual: (304, etag, None)
+        """
+        chave, versao, montar = self.resolver(caminho_url)
+        etag = '"%s"' % hashlib.sha1(f"{versao}|{chave}".encode('utf-8')).hexdigest()[:24]
+        if etag in etags_cliente or '*' in etags_cliente:
+            return 304, etag, None
+
+        with self._lock:
+            resposta = self._respostas.get(etag)
+            if resposta is not None:
+                self._respostas.move_to_end(etag)
+                return 200, etag, resposta
+
+        resposta = RespostaPronta(etag, montar())
+        with self._lock:
+            self._respostas[etag] = resposta
+            while len(self._respostas) > self.max_respostas:
+                self._respostas.popitem(last=False)
+        return 200, etag, resposta
+
+    def resolver(self, caminho_url):
+        """
+        (chave da rota, versão dos dados, função que monta o conteúdo).
+        Nada aqui lê planilha: a versão sai do catálogo e de stats.
+        """
+        url = urlsplit(caminho_url)
+        partes = [unquote(p) for p in url.path.split('/') if p]
+        consulta = sorted(parse_qsl(url.query))
+        chave = '/'.join(partes) + '?' + '&'.join(f"{k}={v}" for k, v in consulta)
+
+        if not partes or partes[0] != 'api':
+            raise ErroApi(404, "rota não encontrada (use /api/bimestres)")
+        partes = partes[1:]
+
+        if partes in ([], ['bimestres']):
+            bimestres = self.catalogo.bimestres_disponiveis()
+            versoes = {bim: self._versao(bim, entrada) for bim, entrada in bimestres.items()}
+            return chave, '+'.join(versoes.values()), lambda: self._listar_bimestres(bimestres, versoes)
+
+        bim, entrada = self._entrada(partes[0])
+        versao = self._versao(bim, entrada)
+        recurso = partes[1:]
+
+        if recurso == ['resumo']:
+            construir = self._resumo
+        elif recurso == ['turmas']:
+            construir = self._turmas
+        elif len(recurso) == 2 and recurso[0] == 'turmas':
+            construir = lambda dados: self._turma(dados, recurso[1])
+        elif recurso == ['alunos']:
+            situacoes = self._situacoes(consulta)
+            turmas = {v for k, v in consulta if k == 'turma'}
+            construir = lambda dados: self._alunos(dados, situacoes, turmas)
+        elif recurso == ['risco']:
+            construir = coletar_alunos_risco
+        elif len(recurso) == 2 and recurso[0] == 'comparacao':
+            bim_outro, entrada_outro = self._entrada(recurso[1])
+            versao = f"{self._versao(bim_outro, entrada_outro)}+{versao}"
+            construir = lambda dados: self._comparacao(self._dados(bim_outro, entrada_outro), dados)
+        else:
+            raise ErroApi(404, f"recurso não encontrado: {'/'.join(recurso) or '(vazio)'}")
+
+        return chave, versao, lambda: construir(self._dados(bim, entrada))
+
+    # ===== Dados =====
+
+    def _entrada(self, codigo):
+        """
+        (código, entrada do catálogo) do bimestre pedido; "atual" é o último disponível
+        """
+        bimestres = self.catalogo.bimestres_disponiveis()
+        if codigo == 'atual':
+            if not bimestres:
+                raise ErroApi(404, "nenhum bimestre disponível")
+            codigo = list(bimestres)[-1]
+        entrada = bimestres.get(codigo)
+        if entrada is None:
+            raise ErroApi(404, f"bimestre não disponível: {codigo}")
+        return codigo, entrada
+
+    def _bimestre_formato(self, bim, entrada):
+        # Formato detectado no conteúdo (o nome do arquivo nem sempre corresponde)
+        return (entrada.get('formato') or {}).get('bimestre') or bim
+
+    def _versao(self, bim, entrada):
+        return calcular_versao_arquivo(entrada['caminho'], self._bimestre_formato(bim, entrada))
+
+    def _dados(self, bim, entrada):
+        """
+        Dados processados do bimestre (processados só se a versão ainda não está no registro)
+        """
+        handle, info_bimestre = registro_global.carregar(
+            entrada['caminho'], self._bimestre_formato(bim, entrada), self.carregar
+        )
+        if handle is None:
+            raise ErroApi(422, f"não foi possível processar {entrada['nome']}: "
+                               f"{(info_bimestre or {}).get('descricao', 'formato não reconhecido')}")
+        with self._lock:
+            self._handles[bim] = handle
+        return handle.dados
+
+    def _situacoes(self, consulta):
+        situacoes = set()
+        for chave, valor in consulta:
+            if chave == 'situacao':
+                situacoes.update(s.strip().upper() for s in valor.split(',') if s.strip())
+        invalidas = situacoes - set(ORDEM_SITUACAO)
+        if invalidas:
+            raise ErroApi(400, f"situação inválida: {', '.join(sorted(invalidas))} "
+                               f"(use {', '.join(ORDEM_SITUACAO)})")
+        return situacoes
+
+    # ===== Conteúdo das rotas =====
+
+    def _listar_bimestres(self, bimestres, versoes):
+        return [
+            {
+                'bimestre': bim,
+                'arquivo': entrada['nome'],
+                'descricao': (entrada.get('formato') or {}).get('descricao'),
+                'tamanho': entrada.get('tamanho'),
+                'modificado': entrada.get('modificado'),
+                'versao': versoes[bim]
+            }
+            for bim, entrada in bimestres.items()
+        ]
+
+    def _resumo(self, dados):
+        return {
+            'versao': dados.get('versao'),
+            'info_bimestre': dados.get('info_bimestre', {}),
+            'resumo_geral': dados.get('resumo_geral', {}),
+            'percentual_situacao_boa': percentual_situacao_boa(dados.get('resumo_geral', {}))
+        }
+
+    def _turmas(self, dados):
+        return [
+            dict(dados_turma['estatisticas'], turma=nome_turma_exibicao(nome_turma), nome_planilha=nome_turma)
+            for nome_turma, dados_turma in dados.get('turmas', {}).items()
+        ]
+
+    def _turma(self, dados, turma):
+        for nome_turma, dados_turma in dados.get('turmas', {}).items():
+            if turma in (nome_turma, nome_turma_exibicao(nome_turma)):
+                return {
+                    'turma': nome_turma_exibicao(nome_turma),
+                    'nome_planilha': nome_turma,
+                    'estatisticas': dados_turma['estatisticas'],
+                    'alunos': dados_turma['alunos']
+                }
+        raise ErroApi(404, f"turma não encontrada: {turma}")
+
+    def _alunos(self, dados, situacoes, turmas):
+        alunos = []
+        for nome_turma, dados_turma in dados.get('turmas', {}).items():
+            turma = nome_turma_exibicao(nome_turma)
+            if turmas and nome_turma not in turmas and turma not in turmas:
+                continue
+            for aluno in dados_turma['alunos']:
+                if not situacoes or aluno['situacao_geral'] in situacoes:
+                    alunos.append(dict(aluno, turma=turma))
+        return alunos
+
+    def _comparacao(self, dados_antes, dados_depois):
+        # pandas só é carregado se alguém pedir uma comparação
+        from src.comparacao_versoes import comparar_versoes, conjunto_alteracoes_para_dict
+        return conjunto_alteracoes_para_dict(comparar_versoes(dados_antes, dados_depois))
+
+
+# ===== HTTP =====
+
+def _etags(cabecalho):
+    """
+    ETags de um If-None-Match (ETags fracos valem para GET)
+    """
+    if not cabecalho:
+        return set()
+    etags = set()
+    for item in cabecalho.split(','):
+        item = item.strip()
+        if item.startswith('W/'):
+            item = item[2:]
+        if item:
+            etags.add(item)
+    return etags
+
+
+def _aceita_gzip(cabecalho):
+    """
+    Se o Accept-Encoding aceita gzip (respeitando q=0)
+    """
+    for item in (cabecalho or '').split(','):
+        nome, _, parametros = item.partition(';')
+        if nome.strip().lower() not in ('gzip', '*'):
+            continue
+        parametros = parametros.replace(' ', '')
+        if parametros.startswith('q='):
+            try:
+                return float(parametros[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+class ManipuladorApi(BaseHTTPRequestHandler):
+    """
+    Uma requisição (cada conexão roda em sua própria thread)
+    """
+
+    server_version = 'EduRadarAPI/1.0'
+    # Keep-alive: clientes que fazem polling reaproveitam a conexão
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._responder(enviar_corpo=True)
+
+    def do_HEAD(self):
+        self._responder(enviar_corpo=False)
+
+    def _responder(self, enviar_corpo):
+        servico = self.server.servico
+        try:
+            with medir('api', urlsplit(self.path).path):
+                status, etag, resposta = servico.responder(self.path, _etags(self.headers.get('If-None-Match')))
+        except ErroApi as e:
+            self._enviar_erro(e.status, str(e), enviar_corpo)
+            return
+        except Exception as e:
+            print(f"Erro na API ({self.path}): {type(e).__name__}: {e}", file=sys.stderr)
+            self._enviar_erro(500, "erro interno ao montar a resposta", enviar_corpo)
+            return
+
+        self.send_response(status)
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if resposta is None:
+            self.end_headers()
+            return
+
+        corpo = resposta.corpo
+        if resposta.corpo_gzip is not None and _aceita_gzip(self.headers.get('Accept-Encoding')):
+            corpo = resposta.corpo_gzip
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if enviar_corpo:
+            self.wfile.write(corpo)
+
+    def _enviar_erro(self, status, mensagem, enviar_corpo):
+        corpo = json.dumps({'erro': mensagem}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        if enviar_corpo:
+            self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        if self.server.servico.verboso:
+            super().log_message(formato, *args)
+
+
+def criar_servidor(host='127.0.0.1', porta=PORTA_PADRAO, servico=None):
+    """
+    Servidor HTTP (uma thread por conexão) pronto para serve_forever()
+    """
+    servidor = ThreadingHTTPServer((host, porta), ManipuladorApi)
+    servidor.daemon_threads = True
+    servidor.servico = servico or ServicoDadosNotas()
+    return servidor
+
+
+def _criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m src.servidor_api',
+        description='API HTTP local (JSON) com turmas, alunos, listas de risco e resumos.'
+    )
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='endereço de escuta (padrão: 127.0.0.1, só a própria máquina)')
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help=f'porta (padrão: {PORTA_PADRAO})')
+    parser.add_argument('--pasta', default=PASTA_DADOS, help=f'pasta das planilhas (padrão: {PASTA_DADOS})')
+    parser.add_argument('--aquecer', action='store_true',
+                        help='processar todos os bimestres antes de aceitar conexões')
+    parser.add_argument('--verboso', action='store_true', help='registrar cada requisição')
+    return parser
+
+
+def main(argv=None):
+    args = _criar_parser().parse_args(argv)
+    servico = ServicoDadosNotas(args.pasta, verboso=args.verboso)
+
+    if args.aquecer:
+        for bim, entrada in servico.catalogo.bimestres_disponiveis().items():
+            try:
+                servico._dados(bim, entrada)
+            except ErroApi as e:
+                print(f"Aviso: {e}", file=sys.stderr)
+
+    try:
+        servidor = criar_servidor(args.host, args.porta, servico)
+    except OSError as e:
+        print(f"Erro: não foi possível abrir {args.host}:{args.porta} ({e})", file=sys.stderr)
+        return 1
+
+    print(f"API em http://{args.host}:{servidor.server_address[1]}/api/bimestres (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
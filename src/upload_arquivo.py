@@ -1,22 +1,34 @@
 # Módulo responsável pelo upload e gestão de arquivos com seleção de bimestre
 
 import streamlit as st
-import tempfile
 import os
-import shutil
 from datetime import datetime
 import pandas as pd
 
+from src.catalogo_dados import obter_catalogo, calcular_hash_arquivo, ARQUIVOS_BIMESTRE
+from src.backups import obter_repositorio_backups
+from src.escrita_atomica import trava_arquivo, gravar_atomico, copiar_em_blocos, TamanhoExcedidoError
+from src.retencao_backups import obter_compactador
+from src.area_temporaria import obter_area_temporaria, CotaExcedidaError
+from src.processamento_fundo import obter_fila_processamento
+
 class GestorArquivos:
-    def __init__(self):
+    def __init__(self, tamanho_maximo_upload_mb=50, tamanho_bloco_upload_kb=1024):
         self.pasta_dados = "dados/"
-        self.arquivos_suportados = {
-            '2_bimestre': 'NOTAS BIMESTRAIS EPT 2º bimestre.xlsx',
-            '3_bimestre': 'NOTAS BIMESTRAIS EPT 3º bimestre.xlsx', 
-            '4_bimestre': 'NOTAS BIMESTRAIS EPT 4º bimestre.xlsx'
-        }
+        self.arquivos_suportados = dict(ARQUIVOS_BIMESTRE)
         self.bimestre_atual = None
         self.caminho_atual = None
+        # Uploads são copiados em blocos: memória de pico limitada ao tamanho do bloco
+        self.tamanho_maximo_upload = tamanho_maximo_upload_mb * 1024 * 1024
+        self.tamanho_bloco_upload = tamanho_bloco_upload_kb * 1024
+        # Índice da pasta compartilhado entre sessões (evita stat/listdir a cada rerun)
+        self.catalogo = obter_catalogo(self.pasta_dados, self.arquivos_suportados)
+        # Backups deduplicados por conteúdo (dados/backups/)
+        self.repositorio_backups = obter_repositorio_backups(self.pasta_dados)
+        # Retenção (hoje / diário por 30 dias / um por bimestre) rodando em segundo plano
+        self.compactador = obter_compactador(self.repositorio_backups)
+        # Uploads do "Usar Agora": arquivos da sessão, com cota e limpeza automática
+        self.area_temporaria = obter_area_temporaria()
 
     def criar_interface_completa(self):
         """
@@ -28,6 +40,9 @@ class GestorArquivos:
         # Seção 1: Seleção de Bimestre
         self._criar_selecao_bimestre()
         
+        # Arquivo temporário da sessão (se houver) tem prioridade sobre o salvo
+        self._aplicar_arquivo_temporario()
+        
         # Seção 2: Status do arquivo atual
         self._mostrar_status_arquivo()
         
@@ -45,17 +60,15 @@ class GestorArquivos:
         """
         st.sidebar.subheader("📅 Selecionar Bimestre")
         
-        # Verificar quais arquivos existem
+        # Verificar quais arquivos existem (lido do catálogo da pasta)
         bimestres_disponiveis = {}
-        for bim, arquivo in self.arquivos_suportados.items():
-            caminho_completo = os.path.join(self.pasta_dados, arquivo)
-            if os.path.exists(caminho_completo):
-                bimestres_disponiveis[bim] = {
-                    'nome': arquivo,
-                    'caminho': caminho_completo,
-                    'tamanho': self._formatar_tamanho(os.path.getsize(caminho_completo)),
-                    'modificado': datetime.fromtimestamp(os.path.getmtime(caminho_completo))
-                }
+        for bim, entrada in self.catalogo.bimestres_disponiveis().items():
+            bimestres_disponiveis[bim] = {
+                'nome': entrada['nome'],
+                'caminho': entrada['caminho'],
+                'tamanho': self._formatar_tamanho(entrada['tamanho']),
+                'modificado': datetime.fromtimestamp(entrada['modificado'])
+            }
         
         if not bimestres_disponiveis:
             st.sidebar.warning("⚠️ Nenhum arquivo de bimestre encontrado")
@@ -156,6 +169,10 @@ class GestorArquivos:
             st.sidebar.success(f"✅ **{novo_arquivo.name}** carregado")
             st.sidebar.write(f"📊 Tamanho: {self._formatar_tamanho(novo_arquivo.size)}")
             
+            if novo_arquivo.size > self.tamanho_maximo_upload:
+                st.sidebar.error(f"❌ Arquivo maior que o limite de {self._formatar_tamanho(self.tamanho_maximo_upload)}")
+                return
+            
             # Detectar formato do arquivo enviado
             formato_detectado = self._detectar_formato_upload(novo_arquivo)
             st.sidebar.info(f"🔍 Formato detectado: **{formato_detectado['descricao']}**")
@@ -165,11 +182,11 @@ class GestorArquivos:
             
             with col1:
                 if st.button("🔄 Usar Agora", help="Usar arquivo temporariamente"):
-                    caminho_temp = self._salvar_temporario(novo_arquivo)
+                    caminho_temp = self._salvar_temporario(novo_arquivo, formato_detectado)
                     if caminho_temp:
                         self.caminho_atual = caminho_temp
                         st.sidebar.success("📈 Usando arquivo temporário!")
-                        st.experimental_rerun()
+                        st.rerun()
             
             with col2:
                 if st.button("💾 Salvar", help="Salvar permanentemente"):
@@ -183,14 +200,11 @@ class GestorArquivos:
         Detecta formato de arquivo uploadado
         """
         try:
-            # Salvar temporariamente para análise
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                tmp_file.write(arquivo_uploaded.getbuffer())
-                tmp_path = tmp_file.name
-            
-            # Analisar planilhas
-            excel_file = pd.ExcelFile(tmp_path)
+            # Ler só os nomes das planilhas direto do upload (sem copiar para disco)
+            arquivo_uploaded.seek(0)
+            excel_file = pd.ExcelFile(arquivo_uploaded)
             sheet_names = excel_file.sheet_names
+            arquivo_uploaded.seek(0)
             
             # Verificar formatos
             if any("- IA" in sheet for sheet in sheet_names):
@@ -206,9 +220,6 @@ class GestorArquivos:
                 formato = "Formato não reconhecido"
                 codigo = 'desconhecido'
             
-            # Limpar arquivo temporário
-            os.unlink(tmp_path)
-            
             return {'descricao': formato, 'codigo': codigo}
             
         except Exception as e:
@@ -229,35 +240,151 @@ class GestorArquivos:
             
             caminho_destino = os.path.join(self.pasta_dados, nome_arquivo)
             
-            # Criar backup se arquivo existe
-            if os.path.exists(caminho_destino):
-                backup_nome = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{nome_arquivo}"
-                backup_path = os.path.join(self.pasta_dados, backup_nome)
-                shutil.copy2(caminho_destino, backup_path)
-                st.sidebar.info(f"📋 Backup criado: {backup_nome}")
+            # Backup + troca sob a trava do arquivo: dois salvamentos simultâneos
+            # não se misturam. Leitores não esperam a trava, pois a troca é um
+            # rename atômico e quem já abriu o arquivo continua na versão antiga.
+            with trava_arquivo(caminho_destino):
+                hash_atual = None
+                if os.path.exists(caminho_destino):
+                    hash_atual = self._hash_catalogado(caminho_destino) or calcular_hash_arquivo(caminho_destino)
+                
+                def antes_de_trocar(copia):
+                    # O hash do upload sai de graça da cópia em blocos
+                    if hash_atual is None:
+                        return True
+                    if copia['hash'] == hash_atual:
+                        st.sidebar.info("📋 Conteúdo idêntico ao arquivo atual, nada foi alterado")
+                        return False
+                    
+                    # Criar backup do arquivo que será substituído
+                    backup = self.repositorio_backups.criar_backup(
+                        caminho_destino, formato_info['codigo'], hash_conteudo=hash_atual
+                    )
+                    if backup['novo_blob']:
+                        st.sidebar.info(f"📋 Backup criado: {backup['timestamp']} ({self._formatar_tamanho(backup['tamanho_comprimido'])})")
+                    else:
+                        st.sidebar.info(f"📋 Backup registrado: {backup['timestamp']} (versão já guardada)")
+                    self.compactador.iniciar_em_segundo_plano()
+                    return True
+                
+                # Salvar novo arquivo (temporário na mesma pasta + fsync + rename)
+                copia = gravar_atomico(
+                    caminho_destino,
+                    lambda f: self._copiar_upload(arquivo_uploaded, f),
+                    antes_de_trocar
+                )
+                if copia['hash'] != hash_atual:
+                    self.catalogo.registrar_arquivo(caminho_destino, hash_conteudo=copia['hash'])
             
-            # Salvar novo arquivo
-            os.makedirs(self.pasta_dados, exist_ok=True)
-            with open(caminho_destino, "wb") as f:
-                f.write(arquivo_uploaded.getbuffer())
+            # Começa a processar a nova versão já, antes do próximo rerun pedir por ela
+            if formato_info['codigo'] in self.arquivos_suportados:
+                obter_fila_processamento().enviar(caminho_destino, formato_info['codigo'])
             
             return True
             
+        except TamanhoExcedidoError:
+            st.sidebar.error(f"Erro ao salvar: arquivo maior que o limite de {self._formatar_tamanho(self.tamanho_maximo_upload)}")
+            return False
         except Exception as e:
             st.sidebar.error(f"Erro ao salvar: {str(e)}")
             return False
     
-    def _salvar_temporario(self, arquivo_uploaded):
+    def _copiar_upload(self, arquivo_uploaded, destino):
         """
-        Salva arquivo temporariamente para uso imediato
+        Copia o upload em blocos para destino, respeitando o tamanho máximo.
+        Retorna {'bytes', 'hash'}.
+        """
+        if arquivo_uploaded.size is not None and arquivo_uploaded.size > self.tamanho_maximo_upload:
+            raise TamanhoExcedidoError(f"arquivo maior que o limite de {self.tamanho_maximo_upload} bytes")
+        
+        arquivo_uploaded.seek(0)
+        try:
+            return copiar_em_blocos(
+                arquivo_uploaded, destino,
+                tamanho_bloco=self.tamanho_bloco_upload,
+                tamanho_maximo=self.tamanho_maximo_upload
+            )
+        finally:
+            arquivo_uploaded.seek(0)
+    
+    def _hash_catalogado(self, caminho):
+        """
+        Hash do arquivo pelo catálogo (só relê o arquivo se mudou desde a indexação)
+        """
+        entrada = self.catalogo.entrada(os.path.basename(caminho))
+        stat = os.stat(caminho)
+        if entrada and entrada.get('hash') and entrada['tamanho'] == stat.st_size \
+                and entrada['mtime_ns'] == stat.st_mtime_ns:
+            return entrada['hash']
+        return None
+    
+    def _salvar_temporario(self, arquivo_uploaded, formato_info=None):
+        """
+        Salva arquivo temporariamente para uso imediato (área temporária da sessão)
         """
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-                tmp_file.write(arquivo_uploaded.getbuffer())
-                return tmp_file.name
+            caminho, _ = self.area_temporaria.criar(
+                self._dono_temporarios(),
+                lambda f: self._copiar_upload(arquivo_uploaded, f),
+                tamanho_previsto=arquivo_uploaded.size or 0
+            )
+        except TamanhoExcedidoError:
+            st.sidebar.error(f"Arquivo maior que o limite de {self._formatar_tamanho(self.tamanho_maximo_upload)}")
+            return None
+        except CotaExcedidaError as e:
+            st.sidebar.error(f"Sem espaço para arquivos temporários: {str(e)}")
+            return None
         except Exception as e:
             st.sidebar.error(f"Erro ao criar arquivo temporário: {str(e)}")
             return None
+        
+        # O temporário anterior da sessão deixa de ser usado
+        self._descartar_temporario()
+        codigo = (formato_info or {}).get('codigo')
+        st.session_state.arquivo_temporario = {
+            'caminho': caminho,
+            'nome': arquivo_uploaded.name,
+            'bimestre': codigo if codigo in self.arquivos_suportados else None
+        }
+        return caminho
+    
+    def _dono_temporarios(self):
+        """
+        Identificador da sessão na área temporária (arquivos apagados quando a sessão termina)
+        """
+        if 'dono_temporarios' not in st.session_state:
+            st.session_state.dono_temporarios = self.area_temporaria.novo_dono()
+        return st.session_state.dono_temporarios.id
+    
+    def _aplicar_arquivo_temporario(self):
+        """
+        Usa o arquivo temporário da sessão, se ainda existir na área temporária
+        """
+        temporario = st.session_state.get('arquivo_temporario')
+        if not temporario:
+            return
+        
+        if not self.area_temporaria.tocar(temporario['caminho']):
+            # Expirou ou foi despejado para liberar espaço
+            del st.session_state['arquivo_temporario']
+            st.sidebar.warning("⏳ O arquivo temporário expirou; voltando ao arquivo salvo")
+            return
+        
+        self.caminho_atual = temporario['caminho']
+        if temporario.get('bimestre'):
+            self.bimestre_atual = temporario['bimestre']
+        st.sidebar.info(f"📈 **Usando temporário:** {temporario['nome']}")
+        if st.sidebar.button("✖️ Descartar temporário", help="Voltar ao arquivo salvo"):
+            self._descartar_temporario()
+            st.rerun()
+    
+    def _descartar_temporario(self):
+        """
+        Apaga o arquivo temporário atual da sessão
+        """
+        temporario = st.session_state.pop('arquivo_temporario', None)
+        if temporario:
+            self.area_temporaria.remover(temporario['caminho'])
     
     def _mostrar_historico(self):
         """
@@ -268,7 +395,7 @@ class GestorArquivos:
         if backups:
             st.sidebar.markdown("---")
             with st.sidebar.expander(f"📚 Histórico ({len(backups)} backups)"):
-                for backup in backups[-5:]:  # Mostrar só os 5 mais recentes
+                for backup in backups[:5]:  # Mostrar só os 5 mais recentes (lista já vem do mais novo)
                     data_str = backup['nome'].replace('backup_', '').split('_')[0:2]
                     try:
                         if len(data_str) >= 2:
@@ -282,6 +409,32 @@ class GestorArquivos:
                     
                     st.write(f"📅 {data_formatada}")
                     st.caption(f"Tamanho: {backup['tamanho']}")
+                
+                self._mostrar_compactacao()
+    
+    def _mostrar_compactacao(self):
+        """
+        Controles e último resultado da compactação de backups
+        """
+        st.markdown("---")
+        status = self.compactador.status()
+        
+        if status['executando']:
+            st.caption("🧹 Compactação em andamento...")
+        elif st.button("🧹 Compactar backups", help="Mantém todos de hoje, um por dia nos últimos 30 dias e o último de cada bimestre"):
+            self.compactador.iniciar_em_segundo_plano(incluir_legados=True)
+            st.caption("🧹 Compactação iniciada em segundo plano")
+        
+        resultado = status['ultimo_resultado']
+        if resultado:
+            if 'erro' in resultado:
+                st.caption(f"⚠️ Última compactação falhou: {resultado['erro']}")
+            else:
+                st.caption(
+                    f"Última compactação ({resultado['concluido_em']}): "
+                    f"{resultado['entradas_removidas']} backups removidos, "
+                    f"{self._formatar_tamanho(resultado['bytes_liberados'])} liberados"
+                )
     
     def _listar_backups(self):
         """
@@ -289,19 +442,31 @@ class GestorArquivos:
         """
         backups = []
         try:
-            if os.path.exists(self.pasta_dados):
-                arquivos = os.listdir(self.pasta_dados)
-                for arquivo in arquivos:
-                    if arquivo.startswith("backup_") and arquivo.endswith(".xlsx"):
-                        caminho_completo = os.path.join(self.pasta_dados, arquivo)
-                        tamanho = os.path.getsize(caminho_completo)
-                        backups.append({
-                            'nome': arquivo,
-                            'tamanho': self._formatar_tamanho(tamanho),
-                            'caminho': caminho_completo
-                        })
-                # Ordenar por data (mais recente primeiro)
-                backups.sort(key=lambda x: x['nome'], reverse=True)
+            # Backups do repositório deduplicado
+            for entrada in self.repositorio_backups.listar():
+                backups.append({
+                    'nome': (f"backup_{entrada['timestamp']}_{entrada['nome_arquivo']}" if entrada['nome_arquivo']
+                             else f"backup_{entrada['timestamp']}.xlsx"),
+                    'tamanho': self._formatar_tamanho(entrada['tamanho']),
+                    'caminho': self.repositorio_backups.caminho_blob(entrada['hash']),
+                    'hash': entrada['hash'],
+                    'bimestre': entrada.get('bimestre'),
+                    'origem': 'repositorio'
+                })
+            
+            # Backups antigos (cópias inteiras em dados/backup_*.xlsx)
+            for entrada in self.catalogo.backups():
+                backups.append({
+                    'nome': entrada['nome'],
+                    'tamanho': self._formatar_tamanho(entrada['tamanho']),
+                    'caminho': entrada['caminho'],
+                    'hash': entrada.get('hash'),
+                    'bimestre': (entrada.get('formato') or {}).get('bimestre'),
+                    'origem': 'legado'
+                })
+            
+            # Ordenar por data (mais recente primeiro)
+            backups.sort(key=lambda x: x['nome'], reverse=True)
         except Exception:
             pass
         return backups
@@ -0,0 +1,44 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from src.area_temporaria import PREFIXO_PASTA_PROCESSO, AreaTemporaria
+
+
+def _pasta_processo(base, pid, idade_segundos):
+    pasta = base / f"{PREFIXO_PASTA_PROCESSO}{pid}"
+    pasta.mkdir(parents=True)
+    (pasta / 'upload-1.xlsx').write_bytes(b'x')
+    antigo = time.time() - idade_segundos
+    for caminho in (pasta / 'upload-1.xlsx', pasta):
+        os.utime(caminho, (antigo, antigo))
+    return pasta
+
+
+def test_limpeza_preserva_processo_rodando_mesmo_parado(tmp_path):
+    vivo = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    encerrado = subprocess.Popen([sys.executable, '-c', 'pass'])
+    encerrado.wait()
+    try:
+        pasta_viva = _pasta_processo(tmp_path, vivo.pid, 10 * 60 * 60)
+        pasta_encerrada = _pasta_processo(tmp_path, encerrado.pid, 0)
+
+        AreaTemporaria(str(tmp_path), idade_maxima_segundos=60)
+
+        assert pasta_viva.exists()
+        assert not pasta_encerrada.exists()
+    finally:
+        vivo.kill()
+        vivo.wait()
+
+
+def test_criar_recria_pasta_apagada(tmp_path):
+    area = AreaTemporaria(str(tmp_path))
+    dono = area.novo_dono()
+    shutil.rmtree(area.pasta)
+
+    caminho, _ = area.criar(dono.id, lambda f: f.write(b'dados'))
+
+    assert os.path.exists(caminho)
@@ -0,0 +1,33 @@
+from src.armazenamento_sqlite import RepositorioNotasSQLite
+
+
+def _dados(versao, total_alunos):
+    alunos = [{
+        'nome': f"ALUNO {i}", 'media_geral': 4.0, 'total_faltas': 30, 'situacao_geral': 'ALTO_RISCO',
+        'projeto': {'nota': 5.0, 'faltas': 0},
+        'ucs': {'UCP 1': {'nota': 3.0, 'faltas': 20}},
+        'situacao_por_uc': {'UCP 1': 'ALTO_RISCO'}
+    } for i in range(total_alunos)]
+    return {'versao': versao, 'info_bimestre': {'bimestre': '3_bimestre'}, 'turmas': {'T1': {'alunos': alunos}}}
+
+
+def test_ucs_em_risco_com_mais_alunos_que_o_limite_de_parametros():
+    repositorio = RepositorioNotasSQLite()
+    repositorio.carregar(_dados('v1', 1200))
+
+    alunos = repositorio.alunos_por_situacao('v1')
+    ucs = repositorio.ucs_em_risco([a['id'] for a in alunos])
+
+    assert len(ucs) == 1200
+    assert all(len(lista) == 1 for lista in ucs.values())
+
+
+def test_carga_mantem_so_as_versoes_mais_recentes():
+    repositorio = RepositorioNotasSQLite(max_versoes=2)
+    for versao in ('v1', 'v2', 'v3'):
+        repositorio.carregar(_dados(versao, 3))
+
+    assert not repositorio.contem('v1')
+    assert repositorio.contem('v2') and repositorio.contem('v3')
+    assert repositorio._consultar('SELECT COUNT(*) AS n FROM aluno')[0]['n'] == 6
+    assert repositorio._consultar('SELECT COUNT(*) AS n FROM uc_result')[0]['n'] == 6
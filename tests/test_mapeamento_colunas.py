@@ -0,0 +1,54 @@
+import pandas as pd
+
+from src.mapeamento_colunas import inferir_mapa_colunas
+
+
+def _planilha(linhas):
+    largura = max(len(linha) for linha in linhas)
+    linhas = [linha + [None] * (largura - len(linha)) for linha in linhas]
+    return pd.DataFrame(linhas[1:], columns=linhas[0])
+
+
+def test_cabecalho_em_uma_linha():
+    df = _planilha([
+        ['TURMA'],
+        [None, None, '3º BIMESTRE'],
+        ['NÚMERO', 'ALUNO', 'UCP1', 'FALTAS', 'UCP2', 'FALTAS', 'UCP3', 'FALTAS', 'ICT', 'FALTAS'],
+        [1, 'ANA', 7, 2, 8, 0, 9, 1, 10, 0],
+    ])
+
+    mapa = inferir_mapa_colunas(df)
+
+    assert mapa['nome'] == 1
+    assert mapa['ucs'] == [('UCP 1', 2, 3), ('UCP 2', 4, 5), ('UCP 3', 6, 7)]
+    assert mapa['projeto'] == (8, 9)
+    assert mapa['inicio_dados'] == 2
+
+
+def test_cabecalho_em_duas_linhas():
+    # Como em dados/backup_20250925_201825.xlsx: UCs em cima, NOTA/FALTAS embaixo
+    df = _planilha([
+        ['NOTAS e FREQUÊNCIA - 2º BIMESTRE'],
+        ['ALUNO (A)', 'UCP 1', None, 'UCP 2', None, 'UCP 3', None, 'Projeto Empreendedor', None],
+        [None, 'NOTA', 'FALTAS', 'NOTA', 'FALTA', 'NOTA', 'FALTA', 'NOTA', 'FALTAS'],
+        ['ANA', 7, 9, 10, 4, 9, 3, 8, '.'],
+    ])
+
+    mapa = inferir_mapa_colunas(df)
+
+    assert mapa['nome'] == 0
+    assert mapa['ucs'] == [('UCP 1', 1, 2), ('UCP 2', 3, 4), ('UCP 3', 5, 6)]
+    assert mapa['projeto'] == (7, 8)
+    assert mapa['inicio_dados'] == 2
+
+
+def test_media_entre_ucs_nao_vira_projeto():
+    df = _planilha([
+        ['TURMA'],
+        ['NÚMERO', 'ALUNO', 'UC1', 'FALTAS', 'MÉDIA', 'UC2', 'FALTAS', 'UC3', 'FALTAS', 'ICT', 'FALTAS'],
+    ])
+
+    mapa = inferir_mapa_colunas(df)
+
+    assert [uc for uc, _, _ in mapa['ucs']] == ['UCP 1', 'UCP 2', 'UCP 3']
+    assert mapa['projeto'] == (9, 10)
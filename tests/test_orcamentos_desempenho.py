@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from benchmarks.verificar_orcamentos import (
+    ARQUIVO_LINHA_BASE, ARQUIVO_ORCAMENTOS, OK, carregar_json, medir_cenarios, verificar
+)
+
+# Máquinas mais lentas que a de referência (ex.: CI compartilhado): EDURADAR_FATOR_ORCAMENTO=2
+FATOR_ORCAMENTO = float(os.environ.get('EDURADAR_FATOR_ORCAMENTO', '1'))
+
+ORCAMENTOS = carregar_json(ARQUIVO_ORCAMENTOS)
+
+
+@pytest.fixture(scope='module')
+def verificacao():
+    linha_base = carregar_json(ARQUIVO_LINHA_BASE) if os.path.exists(ARQUIVO_LINHA_BASE) else None
+    resultados = medir_cenarios(ORCAMENTOS)
+    return verificar(resultados, ORCAMENTOS, linha_base, FATOR_ORCAMENTO)
+
+
+@pytest.mark.parametrize('cenario', list(ORCAMENTOS['cenarios']))
+def test_fases_dentro_do_orcamento(verificacao, cenario):
+    linhas = [l for l in verificacao if l['cenario'] == cenario]
+    assert linhas, f"nenhuma fase medida em {cenario}"
+    falhas = [
+        f"{l['fase']}: {l['situacao']} (mediana {l['mediana_ms']} ms / orçamento {l['orcamento_ms']} ms, "
+        f"mín. {l['min_ms']} ms / base {l['linha_base_min_ms']} ms, pico {l['pico_kb']} KB)"
+        for l in linhas if l['situacao'] != OK
+    ]
+    assert not falhas, '\n'.join(falhas)
+
+
+def test_verificar_acusa_regressao_e_ignora_ruido():
+    orcamentos = {'tolerancia_linha_base': 0.3, 'folga_linha_base_ms': 25,
+                  'cenarios': {'c': {'orcamentos': {}}}}
+    linha_base = {'cenarios': {'c': {'curta': {'min_ms': 30}, 'lenta': {'min_ms': 25}, 'referencia_ms': 50}}}
+    resultados = {'c': {
+        'curta': {'mediana_ms': 46, 'min_ms': 45, 'pico_kb': None},   # +50%, mas só 15 ms
+        'lenta': {'mediana_ms': 260, 'min_ms': 250, 'pico_kb': None},  # 10x
+        'referencia_ms': 50
+    }}
+
+    situacoes = {l['fase']: l['situacao'] for l in verificar(resultados, orcamentos, linha_base)}
+
+    assert situacoes == {'curta': OK, 'lenta': 'mais lento que a linha de base'}
@@ -0,0 +1,18 @@
+from src.perfil_memoria import PerfilMemoria
+
+
+def test_pico_desde_a_ativacao_sobrevive_as_medicoes():
+    perfil = PerfilMemoria()
+    perfil.ativar()
+    try:
+        bloco = bytearray(8 * 1024 * 1024)
+        del bloco
+        with perfil.medir('depois do pico'):
+            pass
+
+        _, pico_kb = perfil.memoria_rastreada()
+        assert pico_kb >= 8 * 1024
+    finally:
+        perfil.desativar()
+
+    assert perfil.memoria_rastreada() is None
@@ -0,0 +1,58 @@
+from src.area_temporaria import AreaTemporaria
+from src.processamento_fundo import ERRO, PRONTO, FilaProcessamento
+from src.registro_dados import RegistroDatasets
+
+
+def _fila(tmp_path, funcao_carregar, **kwargs):
+    return FilaProcessamento(funcao_carregar, workers=1, registro=RegistroDatasets(),
+                             area_temporaria=AreaTemporaria(str(tmp_path / 'temporarios')), **kwargs)
+
+
+def _dados_validos(caminho, bimestre):
+    dados = {'turmas': {'T1': {'alunos': [{'nome': 'Ana', 'situacao_geral': 'OK'}]}}}
+    return dados, {'descricao': 'teste', 'turmas_carregadas': 1}
+
+
+def test_handle_liberado_e_arquivo_apagado_nao_prendem_a_versao(tmp_path):
+    arquivo = tmp_path / 'upload.xlsx'
+    arquivo.write_bytes(b'x')
+    fila = _fila(tmp_path, _dados_validos)
+
+    trabalho = fila.enviar(str(arquivo), None)
+    assert trabalho.aguardar(5) and trabalho.estado == PRONTO
+    assert fila.enviar(str(arquivo), None) is trabalho
+
+    fila.liberar(trabalho)
+    assert trabalho.handle is None
+    refeito = fila.enviar(str(arquivo), None)
+    assert refeito is not trabalho
+    assert refeito.aguardar(5) and refeito.handle is not None
+
+    # Temporário apagado sem a sessão aplicar o resultado
+    arquivo.unlink()
+    outro = tmp_path / 'outro.xlsx'
+    outro.write_bytes(b'y')
+    fila.enviar(str(outro), None)
+    assert refeito.handle is None
+
+
+def test_trabalho_com_erro_expira(tmp_path):
+    arquivo = tmp_path / 'quebrado.xlsx'
+    arquivo.write_bytes(b'x')
+    chamadas = []
+
+    def falhar(caminho, bimestre):
+        chamadas.append(caminho)
+        raise ValueError('planilha inválida')
+
+    fila = _fila(tmp_path, falhar, expiracao_erro_segundos=0)
+    trabalho = fila.enviar(str(arquivo), None)
+    assert trabalho.aguardar(5) and trabalho.estado == ERRO
+
+    novo = fila.enviar(str(arquivo), None)
+    assert novo is not trabalho
+    assert novo.aguardar(5)
+    assert len(chamadas) == 2
+
+    fila.expiracao_erro_segundos = 60
+    assert fila.enviar(str(arquivo), None) is novo
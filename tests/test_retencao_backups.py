@@ -0,0 +1,80 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+from src.backups import CARENCIA_BLOBS_SEGUNDOS, RepositorioBackups
+from src.retencao_backups import CompactadorBackups, PoliticaRetencao
+
+
+def _timestamp(data):
+    return data.strftime('%Y%m%d_%H%M%S')
+
+
+def _criar(repositorio, origem, conteudo, timestamp=None):
+    origem.write_bytes(conteudo)
+    return repositorio.criar_backup(str(origem), '3_bimestre', timestamp=timestamp)
+
+
+def test_compactacao_mantem_ultimo_do_dia(tmp_path):
+    repositorio = RepositorioBackups(str(tmp_path))
+    origem = tmp_path / 'notas.xlsx'
+    dia = datetime.now() - timedelta(days=10)
+    _criar(repositorio, origem, b'manha', _timestamp(dia.replace(hour=8)))
+    _criar(repositorio, origem, b'tarde', _timestamp(dia.replace(hour=16)))
+    _criar(repositorio, origem, b'hoje')
+
+    resultado = CompactadorBackups(repositorio).compactar()
+
+    timestamps = {e['timestamp'] for e in repositorio.listar()}
+    assert _timestamp(dia.replace(hour=8)) not in timestamps
+    assert _timestamp(dia.replace(hour=16)) in timestamps
+    assert resultado['entradas_removidas'] == 1
+    assert resultado['entradas_mantidas'] == 2
+
+
+def test_backup_criado_entre_listar_e_manter_somente_fica(tmp_path):
+    repositorio = RepositorioBackups(str(tmp_path))
+    origem = tmp_path / 'notas.xlsx'
+    _criar(repositorio, origem, b'antes')
+
+    # Outra sessão salva enquanto a compactação já tinha lido o manifesto
+    repositorio.listar()
+    novo = _criar(repositorio, origem, b'durante')
+    repositorio.manter_somente(PoliticaRetencao())
+
+    assert novo['hash'] in {e['hash'] for e in repositorio.listar()}
+
+
+
+def test_importa_backup_legado_so_com_data_e_hora(tmp_path):
+    repositorio = RepositorioBackups(str(tmp_path))
+    (tmp_path / 'backup_20250925_201825.xlsx').write_bytes(b'legado')
+    (tmp_path / 'backup_20250926_080000_notas.xlsx').write_bytes(b'legado com nome')
+
+    resultado = repositorio.importar_backups_legados()
+
+    entradas = {e['timestamp']: e for e in repositorio.listar()}
+    assert resultado['importados'] == 2
+    assert entradas['20250925_201825']['nome_arquivo'] == ''
+    assert entradas['20250926_080000']['nome_arquivo'] == 'notas.xlsx'
+    assert not list(tmp_path.glob('backup_*.xlsx'))
+    # A política de retenção consegue datar as duas entradas
+    assert len(PoliticaRetencao().selecionar(list(entradas.values()))) == 2
+
+
+def test_backup_reaproveitado_renova_blob_e_resiste_a_coleta(tmp_path):
+    repositorio = RepositorioBackups(str(tmp_path))
+    origem = tmp_path / 'notas.xlsx'
+    primeiro = _criar(repositorio, origem, b'igual')
+    blob = repositorio.caminho_blob(primeiro['hash'])
+    antigo = time.time() - 2 * CARENCIA_BLOBS_SEGUNDOS
+    os.utime(blob, (antigo, antigo))
+
+    # A compactação de outra sessão descartou a única entrada e o blob ficou órfão
+    repositorio._alterar_manifesto(lambda entradas: [])
+    segundo = _criar(repositorio, origem, b'igual')
+    repositorio._coletar_blobs_orfaos(set())
+
+    assert not segundo['novo_blob']
+    assert os.path.getmtime(blob) > antigo
+    assert os.path.exists(blob)